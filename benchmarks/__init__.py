@@ -0,0 +1 @@
+# Benchmark harness for netbox-sync, see benchmarks/run.py
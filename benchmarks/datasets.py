@@ -0,0 +1,215 @@
+"""Synthetic NetBox inventories for the benchmark harness.
+
+``build_inventory`` returns the master data keyed by REST endpoint path
+(``dcim/devices`` ...), ``build_slave_baseline`` the reference objects a
+slave needs before the synced types can be created (sites, roles, device
+types, platforms, tenants and VLANs).
+"""
+import random
+
+from benchmarks.fake_netbox import choice
+
+
+INTERFACE_TYPES = ["1000base-t", "10gbase-x-sfpp", "25gbase-x-sfp28", "virtual"]
+TENANT_SLUG = "ipamstuttgartip"
+# Slave tenant id used by Interfaces.sync_ip_addresses.
+SLAVE_IP_TENANT_ID = 66
+
+
+class _Ids:
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self):
+        self.value += 1
+        return self.value
+
+
+def _brief(obj, *fields):
+    return {key: obj[key] for key in ("id", "display", *fields) if key in obj}
+
+
+def _reference_data(ids, sites, vlans):
+    tenant = {"id": ids(), "name": "IPAM Stuttgart", "slug": TENANT_SLUG}
+    data = {
+        "tenancy/tenants": [tenant],
+        "dcim/sites": [{"id": ids(), "name": f"Site {n}", "slug": f"site-{n}"} for n in range(sites)],
+        "dcim/device-roles": [
+            {"id": ids(), "name": name.title(), "slug": name} for name in ("server", "switch", "hypervisor")
+        ],
+        "dcim/device-types": [
+            {"id": ids(), "model": f"Model {n}", "name": f"Model {n}", "slug": f"model-{n}"} for n in range(4)
+        ],
+        "dcim/platforms": [{"id": ids(), "name": name, "slug": name} for name in ("linux", "junos")],
+        "ipam/vlans": [{"id": ids(), "vid": vid, "name": f"VLAN {vid}"} for vid in range(100, 100 + vlans)],
+    }
+    for objects in data.values():
+        for obj in objects:
+            obj["display"] = obj["name"]
+    return data
+
+
+def build_inventory(
+    devices=1000,
+    interfaces_per_device=48,
+    device_bays_per_device=2,
+    virtual_machines=None,
+    interfaces_per_vm=2,
+    ip_ratio=0.25,
+    sites=10,
+    vlans=50,
+    seed=0,
+):
+    """Generate a master inventory with ``devices`` devices and their components."""
+    rng = random.Random(seed)
+    ids = _Ids()
+    data = _reference_data(ids, sites, vlans)
+    tenant = data["tenancy/tenants"][0]
+    site_refs = [_brief(site, "name", "slug") for site in data["dcim/sites"]]
+    roles = {role["slug"]: _brief(role, "name", "slug") for role in data["dcim/device-roles"]}
+    device_types = [_brief(device_type, "model", "slug") for device_type in data["dcim/device-types"]]
+    platforms = [_brief(platform, "name", "slug") for platform in data["dcim/platforms"]]
+    vlan_refs = [_brief(vlan, "vid", "name") for vlan in data["ipam/vlans"]]
+    tenant_ref = _brief(tenant, "name", "slug")
+
+    device_list = data["dcim/devices"] = []
+    interface_list = data["dcim/interfaces"] = []
+    bay_list = data["dcim/device-bays"] = []
+    ip_list = data["ipam/ip-addresses"] = []
+    for n in range(devices):
+        device = {
+            "id": ids(),
+            "name": f"dev{n:06d}",
+            "site": rng.choice(site_refs),
+            "role": roles[rng.choice(["server", "switch"])],
+            "device_type": rng.choice(device_types),
+            "status": choice("active"),
+            "serial": f"SN{n:08d}",
+            "rack": None,
+            "location": None,
+            "position": None,
+            "face": None,
+            "platform": rng.choice(platforms),
+            "tenant": tenant_ref,
+        }
+        device["display"] = device["name"]
+        device_list.append(device)
+        device_ref = _brief(device, "name")
+
+        parent = None
+        for index in range(interfaces_per_device):
+            interface = {
+                "id": ids(),
+                "name": f"eth{index}",
+                "display": f"eth{index}",
+                "device": device_ref,
+                "type": choice(rng.choice(INTERFACE_TYPES)),
+                "description": "",
+                "parent": None,
+                "mgmt_only": index == 0,
+                "enabled": True,
+                "mtu": rng.choice([None, 1500, 9000]),
+                "mode": None,
+                "untagged_vlan": None,
+                "tagged_vlans": [],
+                "tenant": tenant_ref,
+            }
+            # Every eighth interface is a tagged sub-interface of the previous one.
+            if parent is not None and index % 8 == 7:
+                interface["parent"] = _brief(parent, "name")
+                interface["mode"] = choice("tagged")
+                interface["untagged_vlan"] = rng.choice(vlan_refs)
+                interface["tagged_vlans"] = rng.sample(vlan_refs, 3)
+            parent = interface
+            interface_list.append(interface)
+            if rng.random() < ip_ratio:
+                address = f"10.{(len(ip_list) >> 16) & 255}.{(len(ip_list) >> 8) & 255}.{len(ip_list) & 255}/32"
+                ip_list.append(
+                    {
+                        "id": ids(),
+                        "address": address,
+                        "display": address,
+                        "status": choice("active"),
+                        "role": None,
+                        "vrf": None,
+                        "assigned_object_type": "dcim.interface",
+                        "assigned_object_id": interface["id"],
+                    }
+                )
+
+        for index in range(device_bays_per_device):
+            name = f"bay{index}"
+            bay_list.append(
+                {"id": ids(), "name": name, "display": name, "device": device_ref, "description": "", "tenant": tenant_ref}
+            )
+
+    cluster_type = {"id": ids(), "name": "VMware", "display": "VMware", "slug": "vmware", "description": ""}
+    cluster_group = {"id": ids(), "name": "Group A", "display": "Group A", "slug": "group-a", "description": ""}
+    data["virtualization/cluster-types"] = [cluster_type]
+    data["virtualization/cluster-groups"] = [cluster_group]
+    clusters = data["virtualization/clusters"] = [
+        {
+            "id": ids(),
+            "name": f"cluster{n}",
+            "display": f"cluster{n}",
+            "type": _brief(cluster_type, "name", "slug"),
+            "group": _brief(cluster_group, "name", "slug"),
+            "site": site_refs[n % len(site_refs)],
+            "tenant": tenant_ref,
+            "description": "",
+        }
+        for n in range(max(1, sites))
+    ]
+
+    if virtual_machines is None:
+        virtual_machines = devices // 2
+    vm_list = data["virtualization/virtual-machines"] = []
+    vm_interface_list = data["virtualization/interfaces"] = []
+    for n in range(virtual_machines):
+        cluster = clusters[n % len(clusters)]
+        vm = {
+            "id": ids(),
+            "name": f"vm{n:06d}",
+            "cluster": _brief(cluster, "name"),
+            "status": choice("active"),
+            "role": roles["server"],
+            "tenant": tenant_ref,
+            "platform": platforms[0],
+            "vcpus": rng.choice([1, 2, 4, 8]),
+            "memory": rng.choice([2048, 4096, 8192]),
+            "disk": rng.choice([20, 40, 80]),
+            "description": "",
+        }
+        vm["display"] = vm["name"]
+        vm_list.append(vm)
+        for index in range(interfaces_per_vm):
+            vm_interface_list.append(
+                {
+                    "id": ids(),
+                    "name": f"ens{index}",
+                    "display": f"ens{index}",
+                    "virtual_machine": _brief(vm, "name"),
+                    "enabled": True,
+                    "mac_address": None,
+                    "mtu": None,
+                    "mode": None,
+                    "untagged_vlan": None,
+                    "description": "",
+                }
+            )
+    return data
+
+
+def build_slave_baseline(sites=10, vlans=50):
+    """Return the reference objects a slave needs to accept the synced types."""
+    ids = _Ids()
+    data = _reference_data(ids, sites, vlans)
+    # The tenant referenced by id when IP addresses are created on the slave.
+    data["tenancy/tenants"].append(
+        {"id": SLAVE_IP_TENANT_ID, "name": "IP Tenant", "display": "IP Tenant", "slug": "ip-tenant"}
+    )
+    return data
+
+
+def object_counts(data):
+    return {endpoint: len(objects) for endpoint, objects in data.items()}
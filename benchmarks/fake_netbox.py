@@ -0,0 +1,463 @@
+"""Minimal in-memory stand-in for the NetBox REST API endpoints used by netbox-sync.
+
+It implements paginated list/filter GETs (including ``fields``,
+``last_updated__gte`` and list-valued filters), single and bulk POST,
+PATCH and DELETE, nested lookups by slug/name/vid in write payloads and
+choice fields rendered as ``{"value", "label"}``. Every request can be
+delayed by a fixed latency and is counted per method.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+# Related endpoint per payload field, used to resolve nested lookups.
+RELATION_ENDPOINTS = {
+    "site": "dcim/sites",
+    "role": "dcim/device-roles",
+    "device_type": "dcim/device-types",
+    "platform": "dcim/platforms",
+    "rack": "dcim/racks",
+    "location": "dcim/locations",
+    "device": "dcim/devices",
+    "tenant": "tenancy/tenants",
+    "tags": "extras/tags",
+    "untagged_vlan": "ipam/vlans",
+    "tagged_vlans": "ipam/vlans",
+    "vrf": "ipam/vrfs",
+    "cluster": "virtualization/clusters",
+    "virtual_machine": "virtualization/virtual-machines",
+}
+ENDPOINT_RELATIONS = {
+    "virtualization/clusters": {
+        "type": "virtualization/cluster-types",
+        "group": "virtualization/cluster-groups",
+    },
+    "dcim/interfaces": {"parent": "dcim/interfaces"},
+}
+CHOICE_FIELDS = {
+    "dcim/devices": {"status", "face"},
+    "dcim/interfaces": {"type", "mode"},
+    "ipam/ip-addresses": {"status", "role"},
+    "virtualization/virtual-machines": {"status"},
+    "virtualization/interfaces": {"mode"},
+}
+BRIEF_FIELDS = ("id", "url", "display", "name", "slug", "vid", "address")
+# Fields every object of an endpoint carries, so pynetbox never has to
+# fetch full details for an attribute missing from a list response.
+ENDPOINT_DEFAULTS = {
+    "ipam/ip-addresses": {
+        "family": None,
+        "vrf": None,
+        "tenant": None,
+        "status": None,
+        "role": None,
+        "assigned_object_type": None,
+        "assigned_object_id": None,
+        "assigned_object": None,
+        "nat_inside": None,
+        "nat_outside": [],
+        "dns_name": "",
+        "description": "",
+        "comments": "",
+        "tags": [],
+        "custom_fields": {},
+    },
+}
+# Filters answered from a per-endpoint index instead of a full scan.
+INDEXED_FILTERS = ("id", "name", "device", "device_id", "virtual_machine", "address", "assigned_object_id")
+# Request counters and object counts; requests to it are not counted.
+STATS_PATH = "/_benchmark/stats"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def choice(value):
+    if value is None or isinstance(value, dict):
+        return value
+    return {"value": value, "label": str(value).replace("-", " ").title()}
+
+
+class FakeNetBox:
+    """Thread-safe object store shared by the request handlers."""
+
+    def __init__(self, data=None, latency=0.0, page_size=1000):
+        self.latency = latency
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.objects = {}
+        self.requests = {}
+        # Lazily built {(endpoint, filter): {value: [objects]}}, dropped on writes.
+        self.indexes = {}
+        for endpoint, objects in (data or {}).items():
+            for obj in objects:
+                self._insert(endpoint, dict(obj))
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = {}
+
+    def count_request(self, method):
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+
+    def total_requests(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "objects": {endpoint: len(objects) for endpoint, objects in self.objects.items()},
+            }
+
+    def _insert(self, endpoint, obj):
+        if obj.get("id") is None:
+            obj["id"] = self.next_id
+        self.next_id = max(self.next_id, obj["id"] + 1)
+        for key, value in ENDPOINT_DEFAULTS.get(endpoint, {}).items():
+            obj.setdefault(key, json.loads(json.dumps(value)))
+        obj.setdefault("display", obj.get("name") or obj.get("address") or str(obj["id"]))
+        obj.setdefault("last_updated", _now())
+        obj["url"] = f"/api/{endpoint}/{obj['id']}/"
+        self._invalidate(endpoint)
+        self.objects.setdefault(endpoint, {})[obj["id"]] = obj
+        return obj
+
+    def brief(self, endpoint, obj):
+        return {key: obj[key] for key in BRIEF_FIELDS if key in obj}
+
+    def _find(self, endpoint, lookup, scope=None):
+        if isinstance(lookup, int):
+            return self.objects.get(endpoint, {}).get(lookup)
+        if not isinstance(lookup, dict):
+            return None
+        if "id" in lookup:
+            return self.objects.get(endpoint, {}).get(lookup["id"])
+        for obj in self.objects.get(endpoint, {}).values():
+            if all(obj.get(key) == value for key, value in lookup.items()):
+                if scope and obj.get("device", {}).get("id") != scope:
+                    continue
+                return obj
+        return None
+
+    def _resolve(self, endpoint, payload, current=None):
+        relations = dict(RELATION_ENDPOINTS, **ENDPOINT_RELATIONS.get(endpoint, {}))
+        choices = CHOICE_FIELDS.get(endpoint, set())
+        resolved = {}
+        for key, value in payload.items():
+            if key in choices:
+                resolved[key] = choice(value)
+            elif key in relations and value is not None:
+                related_endpoint = relations[key]
+                values = value if isinstance(value, list) else [value]
+                scope = None
+                if key == "parent":
+                    device = resolved.get("device") or (current or {}).get("device")
+                    scope = device and device.get("id")
+                found = []
+                for item in values:
+                    related = self._find(related_endpoint, item, scope)
+                    if related is None:
+                        raise ValueError(f"Related object not found for {key}: {item}")
+                    found.append(self.brief(related_endpoint, related))
+                resolved[key] = found if isinstance(value, list) else found[0]
+            else:
+                resolved[key] = value
+        return resolved
+
+    def create(self, endpoint, payload):
+        with self.lock:
+            obj = self._resolve(endpoint, payload)
+            obj.pop("id", None)
+            return self._insert(endpoint, obj)
+
+    def update(self, endpoint, obj_id, payload):
+        with self.lock:
+            obj = self.objects.get(endpoint, {}).get(obj_id)
+            if obj is None:
+                raise KeyError(obj_id)
+            obj.update(self._resolve(endpoint, {k: v for k, v in payload.items() if k != "id"}, obj))
+            obj["last_updated"] = _now()
+            self._invalidate(endpoint)
+            return obj
+
+    def delete(self, endpoint, obj_id):
+        with self.lock:
+            if self.objects.get(endpoint, {}).pop(obj_id, None) is None:
+                raise KeyError(obj_id)
+            self._invalidate(endpoint)
+
+    def _invalidate(self, endpoint):
+        for index_key in [index_key for index_key in self.indexes if index_key[0] == endpoint]:
+            del self.indexes[index_key]
+
+    def _index(self, endpoint, key):
+        index = self.indexes.get((endpoint, key))
+        if index is None:
+            index = {}
+            for obj in self.objects.get(endpoint, {}).values():
+                index.setdefault(str(_field_value(obj, key)), []).append(obj)
+            self.indexes[(endpoint, key)] = index
+        return index
+
+    def list(self, endpoint, query):
+        filters = {key: values for key, values in query.items() if key not in ("limit", "offset", "fields", "brief")}
+        with self.lock:
+            indexed = next((key for key in filters if key in INDEXED_FILTERS), None)
+            if indexed is None:
+                objects = list(self.objects.get(endpoint, {}).values())
+            else:
+                index = self._index(endpoint, indexed)
+                objects = [obj for value in dict.fromkeys(filters.pop(indexed)) for obj in index.get(value, ())]
+        return [obj for obj in objects if all(_matches(obj, key, values) for key, values in filters.items())]
+
+
+def _absolute_urls(value, base_url):
+    """Return ``value`` with the stored relative ``url`` fields prefixed by ``base_url``."""
+    if isinstance(value, list):
+        return [_absolute_urls(item, base_url) for item in value]
+    if isinstance(value, dict):
+        absolute = {}
+        for key, item in value.items():
+            if key == "url" and isinstance(item, str) and item.startswith("/"):
+                absolute[key] = base_url + item
+            else:
+                absolute[key] = _absolute_urls(item, base_url)
+        return absolute
+    return value
+
+
+def _field_value(obj, key):
+    if key.endswith("_id") and key[:-3] in obj:
+        related = obj[key[:-3]]
+        return related.get("id") if isinstance(related, dict) else related
+    if key == "assigned_object_id":
+        return obj.get("assigned_object_id")
+    value = obj.get(key)
+    if isinstance(value, dict):
+        for lookup in ("value", "slug", "name", "vid", "id"):
+            if lookup in value:
+                return value[lookup]
+    return value
+
+
+def _matches(obj, key, values):
+    if key == "last_updated__gte":
+        return obj.get("last_updated", "") >= values[0]
+    actual = _field_value(obj, key)
+    if isinstance(actual, list):
+        return any(str(_field_value({"v": item}, "v")) in values for item in actual)
+    return str(actual) in values or (actual is None and "null" in values)
+
+
+class FakeNetBoxHandler(BaseHTTPRequestHandler):
+    server_version = "FakeNetBox/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def netbox(self):
+        return self.server.netbox
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split("/") if part]
+        if not parts or parts[0] != "api":
+            return None, None, parsed
+        parts = parts[1:]
+        obj_id = None
+        if parts and parts[-1].isdigit():
+            obj_id = int(parts.pop())
+        return "/".join(parts), obj_id, parsed
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _send(self, status, body=None):
+        if body is not None:
+            # Like NetBox, answer with absolute URLs so pynetbox can follow them.
+            body = _absolute_urls(body, f"http://{self.headers.get('Host')}")
+        data = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("API-Version", "4.1")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        if urlparse(self.path).path.rstrip("/") == STATS_PATH:
+            self._handle_stats(method)
+            return
+        self.netbox.count_request(method)
+        if self.netbox.latency:
+            time.sleep(self.netbox.latency)
+        endpoint, obj_id, parsed = self._route()
+        if endpoint is None:
+            self._send(404, {"detail": "Not found."})
+            return
+        try:
+            getattr(self, f"_do_{method.lower()}")(endpoint, obj_id, parsed)
+        except KeyError:
+            self._send(404, {"detail": "Not found."})
+        except ValueError as exc:
+            self._send(400, {"detail": str(exc)})
+
+    def _handle_stats(self, method):
+        if method == "DELETE":
+            self.netbox.reset_counters()
+            self._send(204)
+        else:
+            self._send(200, self.netbox.stats())
+
+    def _do_get(self, endpoint, obj_id, parsed):
+        if endpoint in ("", "status"):
+            self._send(200, {"netbox-version": "4.1.0"})
+            return
+        query = parse_qs(parsed.query)
+        fields = query.get("fields", [""])[0].split(",") if "fields" in query else None
+
+        def render(obj):
+            if fields:
+                return {key: obj[key] for key in fields if key in obj}
+            return obj
+
+        if obj_id is not None:
+            obj = self.netbox.objects.get(endpoint, {}).get(obj_id)
+            if obj is None:
+                raise KeyError(obj_id)
+            self._send(200, render(obj))
+            return
+
+        matches = self.netbox.list(endpoint, query)
+        limit = int(query.get("limit", [self.netbox.page_size])[0]) or self.netbox.page_size
+        limit = min(limit, self.netbox.page_size)
+        offset = int(query.get("offset", [0])[0])
+        page = matches[offset:offset + limit]
+        next_url = None
+        if offset + limit < len(matches):
+            next_query = {key: values for key, values in query.items()}
+            next_query["limit"] = [str(limit)]
+            next_query["offset"] = [str(offset + limit)]
+            host = self.headers.get("Host")
+            next_url = f"http://{host}{parsed.path}?{urlencode(next_query, doseq=True)}"
+        self._send(
+            200,
+            {"count": len(matches), "next": next_url, "previous": None, "results": [render(obj) for obj in page]},
+        )
+
+    def _do_post(self, endpoint, obj_id, parsed):
+        body = self._read_body()
+        if isinstance(body, list):
+            self._send(201, [self.netbox.create(endpoint, item) for item in body])
+        else:
+            self._send(201, self.netbox.create(endpoint, body))
+
+    def _do_patch(self, endpoint, obj_id, parsed):
+        body = self._read_body()
+        if obj_id is not None:
+            self._send(200, self.netbox.update(endpoint, obj_id, body))
+        else:
+            self._send(200, [self.netbox.update(endpoint, item["id"], item) for item in body])
+
+    _do_put = _do_patch
+
+    def _do_delete(self, endpoint, obj_id, parsed):
+        if obj_id is not None:
+            self.netbox.delete(endpoint, obj_id)
+        else:
+            for item in self._read_body():
+                self.netbox.delete(endpoint, item["id"] if isinstance(item, dict) else item)
+        self._send(204)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeNetBoxServer:
+    """Run a FakeNetBox on a local port in a background thread."""
+
+    def __init__(self, data=None, latency=0.0, host="127.0.0.1", port=0, page_size=1000):
+        self.netbox = FakeNetBox(data, latency=latency, page_size=page_size)
+        self.httpd = ThreadingHTTPServer((host, port), FakeNetBoxHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.netbox = self.netbox
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-netbox", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    import argparse
+
+    from benchmarks.datasets import build_inventory, build_slave_baseline
+
+    parser = argparse.ArgumentParser(description="Serve a synthetic NetBox inventory")
+    parser.add_argument("--role", choices=["master", "slave"], default="master")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--interfaces-per-device", type=int, default=48)
+    parser.add_argument("--virtual-machines", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.role == "master":
+        data = build_inventory(
+            devices=args.devices,
+            interfaces_per_device=args.interfaces_per_device,
+            virtual_machines=args.virtual_machines,
+            seed=args.seed,
+        )
+    else:
+        data = build_slave_baseline()
+    server = FakeNetBoxServer(
+        data, latency=args.latency_ms / 1000.0, host=args.host, port=args.port, page_size=args.page_size
+    )
+    # The runner reads the URL from the first line of output.
+    print(server.url, flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Throughput benchmark for the Sync types against two local fake NetBox servers.
+
+Usage::
+
+    python -m benchmarks.run --devices 1000 --latency-ms 5 --output results.json
+    python -m benchmarks.run --devices 1000 --baseline results.json --max-regression 0.2
+
+The master and slave servers run in child processes, so the reported peak
+RSS is that of the sync process only. It is the process-wide peak so far,
+so each row shows the cumulative peak up to and including that type. Each
+pass syncs every type in dependency order; the first pass against an empty
+slave mostly creates objects, later passes measure the no-op path. The run
+fails when any type reports errors, since its rate would not measure a
+complete sync.
+"""
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import sys
+import time
+from urllib.request import Request, urlopen
+
+from pynetbox import api
+
+from benchmarks.fake_netbox import STATS_PATH
+from main import SYNC_TYPES
+from sync.scheduler import SyncScheduler
+from sync.transport import build_http_session
+
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_path(api_object):
+    app, name = api_object.split(".", 1)
+    return f"{app}/{name.replace('_', '-')}"
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    if sys.platform == "darwin":
+        peak /= 1024
+    return peak / 1024
+
+
+class ServerProcess:
+    """A fake NetBox server started with ``python -m benchmarks.fake_netbox``."""
+
+    def __init__(self, role, args):
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_netbox",
+            "--role",
+            role,
+            "--devices",
+            str(args.devices),
+            "--interfaces-per-device",
+            str(args.interfaces_per_device),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--seed",
+            str(args.seed),
+        ]
+        if args.virtual_machines is not None:
+            command.extend(["--virtual-machines", str(args.virtual_machines)])
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        self.url = self.process.stdout.readline().strip()
+        if not self.url:
+            self.process.wait()
+            raise RuntimeError(f"Fake NetBox {role} server failed to start")
+
+    def stats(self):
+        with urlopen(f"{self.url}{STATS_PATH}/") as response:
+            return json.load(response)
+
+    def reset_counters(self):
+        urlopen(Request(f"{self.url}{STATS_PATH}/", method="DELETE")).close()
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def run_pass(scheduler, master, slave, object_counts):
+    results = []
+    for sync_class in scheduler.topological_order():
+        instance = scheduler.factory(sync_class)
+        master.reset_counters()
+        slave.reset_counters()
+        started = time.perf_counter()
+        instance.sync()
+        elapsed = time.perf_counter() - started
+        objects = object_counts.get(endpoint_path(instance.api_object), 0)
+        results.append(
+            {
+                "type": sync_class.__name__,
+                "objects": objects,
+                "seconds": round(elapsed, 3),
+                "objects_per_second": round(objects / elapsed, 1) if elapsed else None,
+                "master_requests": sum(master.stats()["requests"].values()),
+                "slave_requests": sum(slave.stats()["requests"].values()),
+                "process_peak_rss_mb": round(peak_rss_mb(), 1),
+                "counters": dict(instance.counters, errors=len(instance.errors)),
+            }
+        )
+        logger.info("%s: %d object(s) in %.2fs", sync_class.__name__, objects, elapsed)
+    return results
+
+
+def run_benchmark(args):
+    master = ServerProcess("master", args)
+    slave = ServerProcess("slave", args)
+    try:
+        con_master = api(master.url, token="benchmark")
+        con_slave = api(slave.url, token="benchmark")
+        http_session = build_http_session(pool_size=args.http_pool_size, retries=0)
+        con_master.http_session = http_session
+        con_slave.http_session = http_session
+        sync_kwargs = {
+            "bulk_size": args.bulk_size,
+            "apply_workers": args.apply_workers,
+            "project_fields": args.project_fields,
+            "stream_batch_size": args.stream_batch_size,
+            "raw_fetch": args.raw_fetch,
+        }
+
+        def build_sync(sync_class):
+            return sync_class(con_master, con_slave, **sync_kwargs)
+
+        scheduler = SyncScheduler(SYNC_TYPES, build_sync)
+        object_counts = master.stats()["objects"]
+        passes = [run_pass(scheduler, master, slave, object_counts) for _ in range(args.passes)]
+    finally:
+        master.stop()
+        slave.stop()
+
+    return {
+        "parameters": {
+            "devices": args.devices,
+            "interfaces_per_device": args.interfaces_per_device,
+            "virtual_machines": args.virtual_machines,
+            "latency_ms": args.latency_ms,
+            **sync_kwargs,
+        },
+        "passes": passes,
+    }
+
+
+def find_regressions(results, baseline, max_regression):
+    """Return (pass, type, baseline rate, rate) for types slower than the baseline allows."""
+    regressions = []
+    for pass_index, (current, previous) in enumerate(zip(results["passes"], baseline["passes"])):
+        previous_rates = {entry["type"]: entry["objects_per_second"] for entry in previous}
+        for entry in current:
+            previous_rate = previous_rates.get(entry["type"])
+            rate = entry["objects_per_second"]
+            if not previous_rate or rate is None:
+                continue
+            if rate < previous_rate * (1 - max_regression):
+                regressions.append((pass_index + 1, entry["type"], previous_rate, rate))
+    return regressions
+
+
+def find_errors(results):
+    """Return (pass, type, errors) for types whose sync reported errors."""
+    return [
+        (pass_index, entry["type"], entry["counters"]["errors"])
+        for pass_index, entries in enumerate(results["passes"], start=1)
+        for entry in entries
+        if entry["counters"]["errors"]
+    ]
+
+
+def print_results(results):
+    header = f"{'pass':>4} {'type':<20} {'objects':>9} {'seconds':>9} {'obj/s':>10} {'master req':>10} {'slave req':>10} {'peak rss MB (cumulative)':>24} errors"
+    print(header)
+    for pass_index, entries in enumerate(results["passes"], start=1):
+        for entry in entries:
+            print(
+                f"{pass_index:>4} {entry['type']:<20} {entry['objects']:>9} {entry['seconds']:>9.2f}"
+                f" {entry['objects_per_second'] or 0:>10.1f} {entry['master_requests']:>10}"
+                f" {entry['slave_requests']:>10} {entry['process_peak_rss_mb']:>24.1f} {entry['counters']['errors']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark netbox-sync against local fake NetBox servers")
+    parser.add_argument("--devices", type=int, default=1000, help="Synthetic devices on the master (default: 1000)")
+    parser.add_argument("--interfaces-per-device", type=int, default=48)
+    parser.add_argument("--virtual-machines", type=int, default=None, help="Default: half the number of devices")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every request")
+    parser.add_argument("--passes", type=int, default=2, help="Sync passes to run (default: 2)")
+    parser.add_argument("--bulk-size", type=int, default=None)
+    parser.add_argument("--apply-workers", type=int, default=None)
+    parser.add_argument("--stream-batch-size", type=int, default=None)
+    parser.add_argument("--project-fields", action="store_true")
+    parser.add_argument("--raw-fetch", action="store_true")
+    parser.add_argument("--http-pool-size", type=int, default=10)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare objects/sec with a previous --output file")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Fail when a type is this fraction slower than the baseline (default: 0.2)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    results = run_benchmark(args)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+
+    errors = find_errors(results)
+    for pass_index, type_name, count in errors:
+        print(f"ERRORS pass {pass_index} {type_name}: {count} object(s) failed to sync", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        for pass_index, type_name, previous_rate, rate in regressions:
+            print(
+                f"REGRESSION pass {pass_index} {type_name}: {rate:.1f} obj/s (baseline {previous_rate:.1f} obj/s)",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import argparse
 import logging
 import logging.handlers
+import os
+import sys
+import time
 from pynetbox import api
 
 from sync.racks import Racks
@@ -13,12 +16,37 @@ from sync.cluster_groups import ClusterGroups
 from sync.clusters import Clusters
 from sync.virtual_machines import VirtualMachines
 from sync.virtual_interfaces import VirtualInterfaces
+from sync.scheduler import SyncScheduler
+from sync.aio import AsyncSyncRunner
+from sync.cursor import CursorStore
+from sync.daemon import EventQueue, SyncDaemon, WebhookServer, is_loopback, parse_listen
+from sync.fingerprints import FingerprintStore
+from sync.snapshot_cache import SnapshotCache
+from sync.journal import RunJournal
+from sync.plan_file import read_plan_file, write_plan_file
+from sync.ratelimit import AdaptiveLimiter
+from sync.relations import RelationResolver
+from sync.sharding import Partition, parse_scope, parse_shard, shard_path
+from sync.transport import build_http_session
+from sync.metrics import build_run_summary, write_json_summary, write_prometheus_textfile
 
 
 # main.py
 
 logger = logging.getLogger(__name__)
 
+# Racks and ModuleBays are not synchronized yet.
+SYNC_TYPES = [
+    Devices,
+    DeviceBays,
+    Interfaces,
+    ClusterTypes,
+    ClusterGroups,
+    Clusters,
+    VirtualMachines,
+    VirtualInterfaces,
+]
+
 
 def _resolve_log_level(args):
     if args.debug:
@@ -36,7 +64,7 @@ def configure_logging(args):
     log_level = _resolve_log_level(args)
     logging.basicConfig(
         level=log_level,
-        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+        format="%(asctime)s %(levelname)s [%(name)s] [%(threadName)s] %(message)s",
     )
     logger.debug("Logging configured with level %s", logging.getLevelName(log_level))
 
@@ -71,6 +99,14 @@ def configure_logging(args):
     )
 
 
+def _default_pool_size(args):
+    # One connection per concurrent worker, plus headroom for pynetbox's page threads.
+    workers = max(1, args.apply_workers) * max(1, args.type_workers)
+    if args.enable_threading:
+        workers += 8
+    return max(10, workers + 2)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Sync NetBox instances")
     parser.add_argument("--master-url", required=True, help="Master NetBox URL")
@@ -83,6 +119,180 @@ def main():
         action="store_true",
         help="Enable pynetbox threading for both master and slave API clients",
     )
+    parser.add_argument(
+        "--bulk-size",
+        type=int,
+        default=0,
+        help="Apply creates and updates through NetBox bulk endpoints in batches of this size (default: disabled)",
+    )
+    parser.add_argument(
+        "--apply-workers",
+        type=int,
+        default=1,
+        help="Number of worker threads applying plan items per object type (default: 1)",
+    )
+    parser.add_argument(
+        "--type-workers",
+        type=int,
+        default=1,
+        help="Number of object types synchronized concurrently when their dependencies allow it (default: 1)",
+    )
+    parser.add_argument(
+        "--state-dir",
+        default=".netbox-sync",
+        help="Directory for local sync state such as incremental cursors (default: .netbox-sync)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only sync master objects updated since the last successful run of each type",
+    )
+    parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="Force a full reconcile even with --incremental; cursors are still updated",
+    )
+    parser.add_argument(
+        "--project-fields",
+        action="store_true",
+        help="Only request the fields each sync type reads (NetBox 4.0+ 'fields' query parameter)",
+    )
+    parser.add_argument(
+        "--adopt-template-components",
+        action="store_true",
+        help="Keep template interfaces of new slave devices whose names exist on the master",
+    )
+    parser.add_argument(
+        "--graphql",
+        action="store_true",
+        help="Read master interfaces with their VLANs and IP addresses from the GraphQL API in paginated batches",
+    )
+    parser.add_argument(
+        "--stream-batch-size",
+        type=int,
+        default=0,
+        help="Stream master objects in batches of this size and look up only their slave counterparts (default: disabled)",
+    )
+    plan_group = parser.add_mutually_exclusive_group()
+    plan_group.add_argument(
+        "--plan-out",
+        help="Compute the sync plan for all types and write it to this JSON lines file without writing to the slave",
+    )
+    plan_group.add_argument(
+        "--apply-plan",
+        help="Apply a plan file written by --plan-out instead of fetching and diffing",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        help="Write per-type phase timings and counters as a Prometheus textfile (node_exporter collector)",
+    )
+    parser.add_argument("--run-summary", help="Write a JSON summary of the run to this file")
+    parser.add_argument(
+        "--http-pool-size",
+        type=int,
+        help="HTTP connection pool size per NetBox host (default: derived from the worker options)",
+    )
+    parser.add_argument(
+        "--http-retries",
+        type=int,
+        default=3,
+        help="Retries for connection errors and 429/502/503/504 responses on idempotent requests (default: 3)",
+    )
+    parser.add_argument(
+        "--http-backoff",
+        type=float,
+        default=0.5,
+        help="Exponential backoff factor in seconds between HTTP retries (default: 0.5)",
+    )
+    parser.add_argument(
+        "--adaptive-limit",
+        action="store_true",
+        help="Adapt concurrent requests and requests per second to the slave's latency and 429/5xx responses",
+    )
+    parser.add_argument(
+        "--adaptive-max-rate",
+        type=float,
+        default=50.0,
+        help="Upper bound of slave requests per second with --adaptive-limit (default: 50)",
+    )
+    parser.add_argument(
+        "--adaptive-latency-target",
+        type=float,
+        default=2.0,
+        help="Slave response time in seconds above which --adaptive-limit backs off (default: 2)",
+    )
+    parser.add_argument(
+        "--http-timeout",
+        type=float,
+        default=60,
+        help="Timeout in seconds for NetBox API requests (default: 60)",
+    )
+    parser.add_argument(
+        "--raw-fetch",
+        action="store_true",
+        help="Page the REST API directly into lightweight objects instead of pynetbox Records",
+    )
+    parser.add_argument(
+        "--fingerprints",
+        action="store_true",
+        help="Skip diffing objects whose master payload and slave last_updated match the last run (<state-dir>/fingerprints.sqlite)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Cache fetched master and slave objects in this directory and revalidate them on later runs",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=86400,
+        help="Seconds after which a cached snapshot is fetched again in full (default: 86400)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached snapshots and fetch everything again (requires --cache-dir)",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete slave objects whose unique key no longer exists on the master (full runs only)",
+    )
+    parser.add_argument(
+        "--prune-max",
+        type=int,
+        help="Refuse to prune a type when more than this many objects would be deleted",
+    )
+    parser.add_argument(
+        "--prune-max-percent",
+        type=float,
+        default=10.0,
+        help="Refuse to prune a type when more than this percentage of its slave objects would be deleted (default: 10)",
+    )
+    parser.add_argument(
+        "--resolve-relations",
+        action="store_true",
+        help="Send slave IDs instead of nested lookups for related objects, resolved once per run",
+    )
+    parser.add_argument(
+        "--shard",
+        help="Only sync slice K of N (K/N, 0-based); devices and components are split by site, virtualization by cluster",
+    )
+    parser.add_argument(
+        "--scope",
+        action="append",
+        help="Only sync objects matching key=value filters (site, tenant, cluster), comma separated or repeated",
+    )
+    parser.add_argument(
+        "--async-engine",
+        action="store_true",
+        help="Fetch and write through the asyncio engine (requires aiohttp)",
+    )
+    parser.add_argument(
+        "--async-concurrency",
+        type=int,
+        default=16,
+        help="Maximum concurrent NetBox requests and hooks of the async engine across all types (default: 16)",
+    )
     parser.add_argument("--smtp-host", default="localhost", help="SMTP server host")
     parser.add_argument("--smtp-port", type=int, default=25, help="SMTP server port")
     parser.add_argument("--smtp-user", help="SMTP username")
@@ -104,6 +314,48 @@ def main():
         default=0,
         help="Increase log verbosity (-v=INFO, -vv=DEBUG)",
     )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Journal each type's plan and applied items under <state-dir>/journal so an interrupted run can be resumed",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the interrupted --checkpoint run: skip completed types and apply only unapplied plan items",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and sync objects named by master webhook events, with periodic full reconciles",
+    )
+    parser.add_argument(
+        "--listen",
+        default="127.0.0.1:8080",
+        help="host:port the webhook receiver listens on; other than loopback requires --webhook-secret (default: 127.0.0.1:8080)",
+    )
+    parser.add_argument(
+        "--webhook-secret",
+        help="Secret of the master webhook; events without a matching X-Hook-Signature are rejected",
+    )
+    parser.add_argument(
+        "--event-debounce",
+        type=float,
+        default=2.0,
+        help="Seconds to wait for further events on an object before syncing it (default: 2)",
+    )
+    parser.add_argument(
+        "--event-queue-size",
+        type=int,
+        default=10000,
+        help="Maximum number of pending objects; more trigger a full resync (default: 10000)",
+    )
+    parser.add_argument(
+        "--reconcile-interval",
+        type=float,
+        default=3600,
+        help="Seconds between full reconciles in daemon mode (default: 3600)",
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -111,6 +363,38 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.prune and (args.plan_out or args.apply_plan):
+        parser.error("--prune cannot be combined with --plan-out or --apply-plan")
+    try:
+        shard_index, shard_count = parse_shard(args.shard) if args.shard else (0, 1)
+        scope = parse_scope(args.scope)
+    except ValueError as exc:
+        parser.error(str(exc))
+    partition = Partition(shard_index, shard_count, scope) if shard_count > 1 or scope else None
+    if partition is not None and (args.prune or args.cache_dir or args.async_engine):
+        parser.error("--shard and --scope cannot be combined with --prune, --cache-dir or --async-engine")
+    if (args.checkpoint or args.resume) and (
+        args.daemon or args.plan_out or args.apply_plan or args.async_engine or args.stream_batch_size
+    ):
+        parser.error(
+            "--checkpoint and --resume cannot be combined with --daemon, --plan-out, --apply-plan, "
+            "--async-engine or --stream-batch-size"
+        )
+    if args.daemon and (args.plan_out or args.apply_plan):
+        parser.error("--daemon cannot be combined with --plan-out or --apply-plan")
+    if args.daemon:
+        try:
+            listen_address = parse_listen(args.listen)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if not args.webhook_secret and not is_loopback(listen_address[0]):
+            parser.error("--listen on an address other than loopback requires --webhook-secret")
+    if args.adaptive_limit and args.async_engine:
+        parser.error("--adaptive-limit cannot be combined with --async-engine")
+    if args.graphql and (args.async_engine or args.cache_dir):
+        parser.error("--graphql cannot be combined with --async-engine or --cache-dir")
+    if args.async_engine and (args.plan_out or args.apply_plan or args.stream_batch_size or args.cache_dir):
+        parser.error("--async-engine cannot be combined with --plan-out, --apply-plan, --stream-batch-size or --cache-dir")
     
     configure_logging(args)
     logger.info("Starting NetBox sync")
@@ -119,40 +403,169 @@ def main():
     api_kwargs = {"threading": args.enable_threading}
     con_master = api(args.master_url, token=args.master_token, **api_kwargs)
     con_slave = api(args.slave_url, token=args.slave_token, **api_kwargs)
+    http_kwargs = {
+        "pool_size": args.http_pool_size or _default_pool_size(args),
+        "retries": args.http_retries,
+        "backoff_factor": args.http_backoff,
+        "timeout": args.http_timeout,
+    }
+    http_session = build_http_session(**http_kwargs)
+    con_master.http_session = http_session
+    slave_limiter = None
+    if args.adaptive_limit:
+        # The slave gets its own session so only its requests are limited.
+        slave_limiter = AdaptiveLimiter(
+            max_concurrency=http_kwargs["pool_size"],
+            max_rate=args.adaptive_max_rate,
+            latency_target=args.adaptive_latency_target,
+        )
+        con_slave.http_session = build_http_session(limiter=slave_limiter, **http_kwargs)
+    else:
+        con_slave.http_session = http_session
     logger.debug("Initialized master and slave NetBox API clients (threading=%s)", args.enable_threading)
+    sync_kwargs = {
+        "bulk_size": args.bulk_size,
+        "apply_workers": args.apply_workers,
+        "project_fields": args.project_fields,
+        "stream_batch_size": args.stream_batch_size,
+        "raw_fetch": args.raw_fetch,
+        "prune": args.prune,
+        "prune_max": args.prune_max,
+        "prune_max_percent": args.prune_max_percent,
+    }
+    state_dir = args.state_dir
+    if partition is not None:
+        sync_kwargs["partition"] = partition
+        # Shards keep their cursors and fingerprints apart.
+        state_dir = os.path.join(args.state_dir, partition.label)
+        logger.info("Syncing partition %s", partition.label)
+    if args.cache_dir:
+        sync_kwargs["snapshot_cache"] = SnapshotCache(args.cache_dir, ttl=args.cache_ttl, refresh=args.refresh)
+    relation_resolver = RelationResolver(con_slave) if args.resolve_relations else None
+    if relation_resolver is not None:
+        sync_kwargs["relation_resolver"] = relation_resolver
+    if args.fingerprints:
+        sync_kwargs["fingerprint_store"] = FingerprintStore(os.path.join(state_dir, "fingerprints.sqlite"))
+    journal = None
+    if args.checkpoint or args.resume:
+        journal = RunJournal(os.path.join(state_dir, "journal"), resume=args.resume)
+        sync_kwargs["journal"] = journal
+    if args.incremental:
+        sync_kwargs["cursor_store"] = CursorStore(os.path.join(state_dir, "cursors.json"))
+        sync_kwargs["full_sync"] = args.full_sync
 
-    # racks = Racks(con_master, con_slave, args.mapping)
-    # racks.sync()
-    logger.debug("Starting device synchronization")
-    devices = Devices(con_master, con_slave, args.mapping)
-    devices.sync()
-    # modbay = ModuleBays(con_master, con_slave, args.mapping)
-    # modbay.sync()
-    logger.debug("Starting device bay synchronization")
-    devbay = DeviceBays(con_master, con_slave, args.mapping)
-    devbay.sync()
-    logger.debug("Starting interface synchronization")
-    interfaces = Interfaces(con_master, con_slave, args.mapping)
-    interfaces.sync()
-    logger.debug("Starting cluster type synchronization")
-    cluster_types = ClusterTypes(con_master, con_slave, args.mapping)
-    cluster_types.sync()
-    logger.debug("Starting cluster group synchronization")
-    cluster_groups = ClusterGroups(con_master, con_slave, args.mapping)
-    cluster_groups.sync()
-    logger.debug("Starting cluster synchronization")
-    clusters = Clusters(con_master, con_slave, args.mapping)
-    clusters.sync()
-    logger.debug("Starting virtual machine synchronization")
-    virtual_machines = VirtualMachines(con_master, con_slave, args.mapping)
-    virtual_machines.sync()
-    logger.debug("Starting virtual interface synchronization")
-    virtual_interfaces = VirtualInterfaces(con_master, con_slave, args.mapping)
-    virtual_interfaces.sync()
-              
-    
-    
-    logger.info("Sync completed")
+    type_kwargs = {
+        Devices: {"adopt_template_components": args.adopt_template_components},
+        Interfaces: {"graphql_fetch": args.graphql},
+    }
+
+    def build_sync(sync_class):
+        return sync_class(
+            con_master,
+            con_slave,
+            args.mapping,
+            **sync_kwargs,
+            **type_kwargs.get(sync_class, {}),
+        )
+
+    def run_full():
+        started = time.time()
+        scheduler = SyncScheduler(SYNC_TYPES, build_sync, max_workers=args.type_workers)
+        if args.plan_out:
+            unsuccessful = scheduler.run(action="build_plan")
+            instances = scheduler.instances
+            write_plan_file(
+                args.plan_out,
+                (
+                    instances[sync_class].serialize_plan_item(plan_item)
+                    for sync_class in scheduler.topological_order()
+                    if sync_class in instances and sync_class not in unsuccessful
+                    for plan_item in instances[sync_class].sync_plan
+                ),
+            )
+        elif args.apply_plan:
+            saved_plans = read_plan_file(args.apply_plan)
+            unsuccessful = scheduler.run(
+                action=lambda instance: instance.apply_saved_plan(saved_plans.get(instance.api_object, []))
+            )
+        elif args.async_engine:
+            with AsyncSyncRunner(concurrency=args.async_concurrency, timeout=args.http_timeout) as runner:
+                unsuccessful = scheduler.run(action=runner.run)
+        else:
+            unsuccessful = scheduler.run()
+
+        if args.prune:
+            # Dependents first, so e.g. interfaces are gone before their devices.
+            for sync_class in reversed(scheduler.topological_order()):
+                if sync_class in scheduler.instances and sync_class not in scheduler.failed:
+                    scheduler.instances[sync_class].prune()
+
+        if journal is not None:
+            if scheduler.failed or any(instance.errors for instance in scheduler.instances.values()):
+                journal.close()
+                logger.warning("Run did not complete cleanly, keeping the sync journal for --resume")
+            else:
+                journal.clear()
+
+        if args.metrics_textfile or args.run_summary:
+            instances = [
+                scheduler.instances[sync_class]
+                for sync_class in scheduler.topological_order()
+                if sync_class in scheduler.instances
+            ]
+            critical_path, _ = scheduler.critical_path()
+            extra = {}
+            if relation_resolver is not None:
+                extra["relation_resolver"] = relation_resolver.stats()
+            if slave_limiter is not None:
+                extra["slave_limiter"] = slave_limiter.snapshot()
+            labels = {}
+            label = None
+            if partition is not None:
+                label = partition.label
+                extra["shard"] = partition.summary()
+                labels["shard"] = label
+            summary = build_run_summary(
+                instances,
+                started,
+                time.time(),
+                critical_path=[sync_class.__name__ for sync_class in critical_path],
+                **extra,
+            )
+            if args.metrics_textfile:
+                write_prometheus_textfile(shard_path(args.metrics_textfile, label), summary, labels)
+            if args.run_summary:
+                write_json_summary(shard_path(args.run_summary, label), summary)
+
+        if unsuccessful:
+            logger.error(
+                "Sync failed for %s", ", ".join(sync_class.__name__ for sync_class in unsuccessful)
+            )
+        else:
+            logger.info("Sync completed")
+        return unsuccessful
+
+    if not args.daemon:
+        if run_full():
+            sys.exit(1)
+        return
+
+    event_queue = EventQueue(maxsize=args.event_queue_size, debounce=args.event_debounce)
+    sync_daemon = SyncDaemon(
+        SyncScheduler(SYNC_TYPES, build_sync).topological_order(),
+        build_sync,
+        run_full,
+        event_queue,
+        reconcile_interval=args.reconcile_interval,
+    )
+    server = WebhookServer(listen_address, sync_daemon, secret=args.webhook_secret)
+    server.start()
+    try:
+        sync_daemon.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping webhook daemon")
+    finally:
+        server.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import threading
+
+try:
+    import aiohttp
+except ImportError:  # only needed for the async engine
+    aiohttp = None
+
+from sync.cursor import newest_timestamp
+from sync.records import RecordView, to_plain
+from sync.sync import Sync
+
+
+logger = logging.getLogger(__name__)
+
+# Objects per bulk POST/PATCH when the Sync instance has no bulk_size.
+DEFAULT_BULK_SIZE = 100
+
+
+class AsyncRequestError(Exception):
+    def __init__(self, method, url, status, body):
+        super().__init__(f"{method} {url} returned HTTP {status}: {body[:500]}")
+        self.status = status
+
+
+def _query_params(filters):
+    params = []
+    for key, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        for item in values:
+            if isinstance(item, bool):
+                item = "true" if item else "false"
+            params.append((key, str(item)))
+    return params
+
+
+class AsyncNetBoxClient:
+    """aiohttp client for the list and bulk endpoints of one NetBox instance.
+
+    Every request, and every synchronous hook run by the engine, holds a
+    slot of ``semaphore`` while it runs, which bounds the calls in flight
+    across all types of a run.
+    """
+
+    def __init__(self, session, base_url, token, semaphore, page_size=1000, ssl=None):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.semaphore = semaphore
+        self.page_size = page_size
+        self.ssl = ssl
+        self.headers = {"Accept": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Token {token}"
+
+    def endpoint_url(self, api_object):
+        app, name = api_object.split(".", 1)
+        return f"{self.base_url}/{app}/{name.replace('_', '-')}/"
+
+    async def request(self, method, url, params=None, json=None):
+        async with self.semaphore:
+            async with self.session.request(
+                method, url, params=params, json=json, headers=self.headers, ssl=self.ssl
+            ) as response:
+                if response.status >= 400:
+                    raise AsyncRequestError(method, url, response.status, await response.text())
+                if response.status == 204:
+                    return None
+                return await response.json()
+
+    async def iter_pages(self, api_object, keep_fields=None, **filters):
+        """Yield lists of RecordView objects, one per page.
+
+        The first page gives the total count; the remaining pages are then
+        requested concurrently by offset and yielded as they arrive.
+        """
+        url = self.endpoint_url(api_object)
+
+        async def get_page(offset, limit):
+            data = await self.request("GET", url, params=_query_params(dict(filters, limit=limit, offset=offset)))
+            results = data["results"]
+            if keep_fields is not None:
+                results = [{field: item[field] for field in keep_fields if field in item} for item in results]
+            return data, [RecordView(item) for item in results]
+
+        data, first_page = await get_page(0, self.page_size)
+        yield first_page
+        if not data.get("next") or not first_page:
+            return
+
+        # NetBox caps the limit at MAX_PAGE_SIZE; page by what it returned.
+        page_size = len(first_page)
+        tasks = [
+            asyncio.ensure_future(get_page(offset, page_size))
+            for offset in range(page_size, data["count"], page_size)
+        ]
+        logger.debug("Fetching %d more page(s) of %s concurrently", len(tasks), api_object)
+        try:
+            for task in asyncio.as_completed(tasks):
+                _, page = await task
+                yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch(self, api_object, keep_fields=None, **filters):
+        objects = []
+        async for page in self.iter_pages(api_object, keep_fields=keep_fields, **filters):
+            objects.extend(page)
+        return objects
+
+    async def create(self, api_object, payloads):
+        results = await self.request("POST", self.endpoint_url(api_object), json=to_plain(payloads))
+        return [RecordView(item) for item in results]
+
+    async def update(self, api_object, payloads):
+        results = await self.request("PATCH", self.endpoint_url(api_object), json=to_plain(payloads))
+        return [RecordView(item) for item in results]
+
+
+class AsyncSyncEngine:
+    """Run one Sync instance with asyncio I/O.
+
+    Unique keys, diffs, ``pre_sync`` and fingerprints are the Sync's own;
+    only fetching and writing go through the async clients. Master pages
+    are planned and applied while later pages are still being fetched.
+    Types with a ``pre_apply`` hook or ``apply_order_fields`` wait for the
+    complete plan instead, since those need to see all of it first.
+
+    Synchronous ``pre_apply``, ``post_create`` and ``post_sync`` hooks run
+    in worker threads, with slave objects materialized as pynetbox Records.
+    A subclass can define ``async_pre_apply``, ``async_post_create`` or
+    ``async_post_sync`` coroutines to run on the event loop instead.
+    """
+
+    def __init__(self, sync, master, slave):
+        self.sync = sync
+        self.master = master
+        self.slave = slave
+        self.bulk_size = sync.bulk_size or DEFAULT_BULK_SIZE
+        self.slave_endpoint = None
+        self._pre_apply = self._resolve_hook("pre_apply")
+        self._post_create = self._resolve_hook("post_create")
+        self._post_sync = self._resolve_hook("post_sync")
+
+    def _resolve_hook(self, name):
+        async_hook = getattr(self.sync, f"async_{name}", None)
+        if async_hook is not None:
+            return async_hook, True
+        if getattr(type(self.sync), name) is getattr(Sync, name):
+            return None
+        return getattr(self.sync, name), False
+
+    async def _call_hook(self, hook, *args):
+        hook, is_async = hook
+        if is_async:
+            return await hook(*args)
+        async with self.slave.semaphore:
+            return await asyncio.to_thread(hook, *args)
+
+    def _needs_full_plan(self):
+        return bool(self.sync.apply_order_fields) or self._pre_apply is not None
+
+    def _fetch_kwargs(self, **filters):
+        fields = self.sync.fetch_fields()
+        if self.sync.project_fields:
+            filters["fields"] = ",".join(fields)
+        return dict(filters, keep_fields=fields)
+
+    async def run(self):
+        sync = self.sync
+        logger.info("Starting asynchronous synchronization process for %s", sync.api_object)
+        sync._reset_run_state()
+        self.slave_endpoint = sync._resolve_api_object(sync.slave_conn)
+        cursor = sync._current_cursor()
+        if cursor is None:
+            high_water_mark = await self._run_full()
+        else:
+            high_water_mark = await self._run_incremental(cursor)
+        # Re-reading last_updated of written objects uses blocking requests.
+        await asyncio.to_thread(sync._store_fingerprints, self.slave_endpoint)
+        sync._advance_cursor(high_water_mark)
+        sync._log_completion()
+        return sync
+
+    async def _run_full(self):
+        sync = self.sync
+        slave_task = asyncio.ensure_future(self._fetch_slave_index())
+        full_plan = [] if self._needs_full_plan() else None
+        applies = []
+        high_water_mark = None
+        pages = self.master.iter_pages(sync.api_object, **self._fetch_kwargs()).__aiter__()
+        try:
+            while True:
+                with sync._timed("fetch"):
+                    try:
+                        page = await pages.__anext__()
+                    except StopAsyncIteration:
+                        break
+                high_water_mark = newest_timestamp([high_water_mark, sync._max_last_updated(page)])
+                sync_plan = await self._plan(page, await slave_task)
+                if full_plan is not None:
+                    full_plan.extend(sync_plan)
+                else:
+                    applies.append(asyncio.ensure_future(self._apply(sync_plan)))
+            slave_index = await slave_task
+            await asyncio.gather(*applies)
+        finally:
+            for task in (slave_task, *applies):
+                task.cancel()
+            await asyncio.gather(slave_task, *applies, return_exceptions=True)
+
+        if full_plan is not None:
+            await self._apply_full_plan(full_plan)
+        if sync._collects_orphans():
+            sync._collect_orphans(slave_index)
+        return high_water_mark
+
+    async def _run_incremental(self, cursor):
+        sync = self.sync
+        logger.info("Incremental sync of %s for objects updated since %s", sync.api_object, cursor)
+        with sync._timed("fetch"):
+            master_objects = await self.master.fetch(sync.api_object, **self._fetch_kwargs(last_updated__gte=cursor))
+            batches = await asyncio.gather(
+                *(
+                    self.slave.fetch(sync.api_object, **self._fetch_kwargs(**filters))
+                    for filters in sync._slave_match_filters(master_objects)
+                )
+            )
+        with sync._timed("index"):
+            slave_index = sync._build_slave_index(obj for batch in batches for obj in batch)
+        sync_plan = await self._plan(master_objects, slave_index)
+        if self._needs_full_plan():
+            await self._apply_full_plan(sync_plan)
+        else:
+            await self._apply(sync_plan)
+        return sync._max_last_updated(master_objects)
+
+    async def _fetch_slave_index(self):
+        sync = self.sync
+        with sync._timed("fetch"):
+            slave_objects = await self.slave.fetch(sync.api_object, **self._fetch_kwargs())
+        with sync._timed("index"):
+            return sync._build_slave_index(slave_objects)
+
+    async def _plan(self, master_objects, slave_index):
+        sync = self.sync
+
+        def build():
+            with sync._timed("plan"):
+                sync_plan = sync._build_sync_plan(master_objects, slave_index)
+            sync._master_hashes = {}
+            sync._count_plan(sync_plan)
+            return sync_plan
+
+        # Planning is CPU-bound; a thread keeps the loop serving responses meanwhile.
+        return await asyncio.to_thread(build)
+
+    async def _apply_full_plan(self, sync_plan):
+        if self._pre_apply is not None:
+            with self.sync._timed("apply"):
+                await self._call_hook(self._pre_apply, sync_plan)
+        for wave in self.sync._split_plan_waves(sync_plan):
+            await self._apply(wave)
+
+    async def _apply(self, sync_plan):
+        sync = self.sync
+        grouped = {"create": [], "update": [], "noop": []}
+        for plan_item in sync_plan:
+            grouped[plan_item["action"]].append(plan_item)
+
+        tasks = []
+        for action in ("create", "update"):
+            items = grouped[action]
+            for start in range(0, len(items), self.bulk_size):
+                tasks.append(self._apply_batch(action, items[start:start + self.bulk_size]))
+        for plan_item in grouped["noop"]:
+            if self._post_sync is None:
+                sync._remember_fingerprint(plan_item, plan_item["slave_obj"])
+            else:
+                tasks.append(self._post_hooks(plan_item, plan_item["slave_obj"]))
+        with sync._timed("apply"):
+            await asyncio.gather(*tasks)
+
+    async def _apply_batch(self, action, batch):
+        sync = self.sync
+        try:
+            payloads = await self._write_payloads(action, batch)
+            if action == "create":
+                results = await self.slave.create(sync.api_object, payloads)
+            else:
+                results = await self.slave.update(sync.api_object, payloads)
+        except Exception as exc:
+            if len(batch) == 1:
+                sync._record_error(batch[0]["master_obj"], exc)
+                return
+            logger.warning(
+                "Bulk %s of %d %s object(s) failed, falling back to per-item apply: %s",
+                action,
+                len(batch),
+                sync.api_object,
+                exc,
+            )
+            await asyncio.gather(*(self._apply_batch(action, [plan_item]) for plan_item in batch))
+            return
+
+        logger.debug("Bulk %s of %d %s object(s) succeeded", action, len(batch), sync.api_object)
+        for result in results:
+            sync._register_relation(result)
+        await asyncio.gather(
+            *(
+                self._post_hooks(plan_item, result, created=action == "create")
+                for plan_item, result in zip(batch, results)
+            )
+        )
+
+    async def _write_payloads(self, action, batch):
+        def build():
+            payloads = [self.sync._write_payload(plan_item["payload"]) for plan_item in batch]
+            if action == "update":
+                payloads = [dict(payload, id=plan_item["slave_obj"].id) for payload, plan_item in zip(payloads, batch)]
+            return payloads
+
+        if self.sync.relation_resolver is None:
+            return build()
+        # The resolver loads its slave maps with blocking requests on first use.
+        return await asyncio.to_thread(build)
+
+    async def _post_hooks(self, plan_item, new_obj, created=False):
+        sync = self.sync
+        master_obj = plan_item["master_obj"]
+        try:
+            with sync._timed("post_hooks"):
+                hooked = new_obj
+                if created and self._post_create is not None:
+                    hooked = await self._call_hook(self._post_create, master_obj, self._record(new_obj))
+                if hooked and self._post_sync is not None:
+                    await self._call_hook(self._post_sync, master_obj, self._record(hooked))
+            sync._remember_fingerprint(plan_item, new_obj)
+        except Exception as exc:
+            sync._record_error(master_obj, exc)
+
+    def _record(self, obj):
+        return self.sync._materialize(self.slave_endpoint, obj)
+
+
+class AsyncSyncRunner:
+    """Event loop thread with the aiohttp session and semaphore shared by all types of a run.
+
+    ``run(sync)`` blocks until that type is done and may be called from
+    several threads, so it can be passed to SyncScheduler.run as the action.
+    """
+
+    def __init__(self, concurrency=16, timeout=60, page_size=1000):
+        if aiohttp is None:
+            raise RuntimeError("The async engine requires aiohttp (pip install aiohttp)")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.page_size = page_size
+        self.loop = None
+        self.thread = None
+        self.session = None
+        self.semaphore = None
+
+    def __enter__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-engine", daemon=True)
+        self.thread.start()
+        self._call(self._open())
+        logger.debug("Started async engine with %d concurrent request(s)", self.concurrency)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._call(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def _open(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def client(self, api):
+        http_session = getattr(api, "http_session", None)
+        ssl = False if getattr(http_session, "verify", True) is False else None
+        return AsyncNetBoxClient(
+            self.session, api.base_url, api.token, self.semaphore, page_size=self.page_size, ssl=ssl
+        )
+
+    def run(self, sync):
+        engine = AsyncSyncEngine(sync, self.client(sync.master_conn), self.client(sync.slave_conn))
+        return self._call(engine.run())
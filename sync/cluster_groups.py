@@ -4,6 +4,7 @@ from sync.sync import Sync
 class ClusterGroups(Sync):
 
     api_object = "virtualization.cluster_groups"
+    object_type = "virtualization.clustergroup"
     sync_parameters = ["name", "slug", "description"]
     unique_parameter = ["name"]
     global_sync_values = {}
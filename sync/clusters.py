@@ -1,8 +1,19 @@
+from sync.cluster_groups import ClusterGroups
+from sync.cluster_types import ClusterTypes
 from sync.sync import Sync
 
 
 class Clusters(Sync):
 
     api_object = "virtualization.clusters"
+    object_type = "virtualization.cluster"
     sync_parameters = ["name", "type", "group", "site", "tenant", "description"]
     unique_parameter = ["name"]
+    depends_on = [ClusterTypes, ClusterGroups]
+    shard_by = ("name", "virtualization.clusters", "name")
+    scope_filters = {"site": "site", "tenant": "tenant", "cluster": "name"}
+    relation_endpoints = dict(
+        Sync.relation_endpoints,
+        type="virtualization.cluster_types",
+        group="virtualization.cluster_groups",
+    )
@@ -0,0 +1,61 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 ``last_updated`` value into an aware datetime, UTC when it has no offset."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def newest_timestamp(values):
+    """Return the latest of the given ``last_updated`` strings, compared as points in time.
+
+    String comparison is wrong once precision or offset formats differ, e.g.
+    ``...:00Z`` sorts after ``...:00.123456+00:00``.
+    """
+    return max(filter(None, values), key=parse_timestamp, default=None)
+
+
+class CursorStore:
+    """Per-api_object high-water marks of master ``last_updated`` values, kept in a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cursors = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logger.debug("No sync cursor file at %s, starting without cursors", self.path)
+            return {}
+        with open(self.path, encoding="utf-8") as handle:
+            cursors = json.load(handle)
+        logger.debug("Loaded %d sync cursor(s) from %s", len(cursors), self.path)
+        return cursors
+
+    def get(self, api_object):
+        with self._lock:
+            return self._cursors.get(api_object)
+
+    def set(self, api_object, value):
+        with self._lock:
+            self._cursors[api_object] = value
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(self._cursors, handle, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        logger.debug("Stored sync cursor %s for %s", value, api_object)
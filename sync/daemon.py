@@ -0,0 +1,275 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from sync.records import RecordView
+
+
+logger = logging.getLogger(__name__)
+
+
+def verify_signature(secret, body, signature):
+    """Check NetBox's X-Hook-Signature header, an HMAC-SHA512 hex digest of the body."""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def is_loopback(host):
+    """Return True when ``host`` only accepts connections from the local machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_listen(text):
+    """Parse ``host:port`` or ``[ipv6]:port`` into (host, port)."""
+    try:
+        parts = urlsplit(f"//{text}")
+        host, port = parts.hostname, parts.port
+    except ValueError:
+        host = port = None
+    if not host or port is None:
+        raise ValueError(f"Invalid listen address {text!r}, expected host:port such as 127.0.0.1:8080")
+    return host, port
+
+
+class EventQueue:
+    """Bounded queue of pending syncs, coalesced per (sync class, unique key).
+
+    Each event (re)starts the debounce delay of its key, so a burst of
+    changes to one object results in a single sync of its latest state.
+    When more than ``maxsize`` keys are pending the queue is dropped and
+    a full resync is requested instead.
+    """
+
+    def __init__(self, maxsize=10000, debounce=2.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.debounce = debounce
+        self.clock = clock
+        self.overflowed = False
+        self.received = 0
+        self.coalesced = 0
+        self.overflows = 0
+        self._pending = {}
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+    def put(self, sync_class, key, master_id):
+        """Queue a sync of one master object; return False when the queue overflowed."""
+        with self._condition:
+            self.received += 1
+            entry = (sync_class, key)
+            if entry in self._pending:
+                self.coalesced += 1
+            elif len(self._pending) >= self.maxsize:
+                self.overflows += 1
+                self.overflowed = True
+                self._pending.clear()
+                self._condition.notify_all()
+                return False
+            self._pending[entry] = (master_id, self.clock() + self.debounce)
+            self._condition.notify_all()
+            return True
+
+    def clear(self):
+        with self._condition:
+            self._pending.clear()
+            self.overflowed = False
+
+    def take_due(self, timeout):
+        """Wait up to ``timeout`` seconds for due events.
+
+        Returns (resync, entries): ``resync`` is True after an overflow,
+        otherwise ``entries`` lists the due (sync_class, key, master_id).
+        """
+        with self._condition:
+            deadline = self.clock() + timeout
+            while True:
+                if self.overflowed:
+                    self.overflowed = False
+                    return True, []
+                now = self.clock()
+                due = [entry for entry, (_, due_at) in self._pending.items() if due_at <= now]
+                if due:
+                    return False, [(*entry, self._pending.pop(entry)[0]) for entry in due]
+                if now >= deadline:
+                    return False, []
+                next_due = min((due_at for _, due_at in self._pending.values()), default=deadline)
+                self._condition.wait(min(next_due, deadline) - now)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "overflows": self.overflows,
+            }
+
+
+class SyncDaemon:
+    """Apply master webhook events to the slave one object at a time.
+
+    ``sync_types`` must be in dependency order; due events are synced type
+    by type in that order with fresh instances from ``build_sync``.
+    ``run_full`` runs a complete sync; it is called on start, every
+    ``reconcile_interval`` seconds and after the event queue overflowed.
+    """
+
+    def __init__(self, sync_types, build_sync, run_full, event_queue=None, reconcile_interval=3600, clock=time.monotonic):
+        self.sync_types = list(sync_types)
+        self.build_sync = build_sync
+        self.run_full = run_full
+        self.queue = event_queue if event_queue is not None else EventQueue(clock=clock)
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+        self.next_reconcile = None
+        self.ignored = 0
+        self._by_object_type = {sync_class.object_type: sync_class for sync_class in self.sync_types}
+        self._key_instances = {}
+        self._stop = threading.Event()
+
+    def _sync_class(self, event):
+        object_type = event.get("object_type")
+        if object_type is None and event.get("model"):
+            # NetBox 3.x names the model without its app label.
+            object_type = next(
+                (name for name in self._by_object_type if name.split(".")[1] == event["model"]), None
+            )
+        return self._by_object_type.get(object_type)
+
+    def _key_instance(self, sync_class):
+        if sync_class not in self._key_instances:
+            self._key_instances[sync_class] = self.build_sync(sync_class)
+        return self._key_instances[sync_class]
+
+    def handle_event(self, event):
+        """Queue the object of one webhook event; return False when it is ignored."""
+        sync_class = self._sync_class(event)
+        data = event.get("data") or {}
+        if sync_class is None or "id" not in data:
+            self.ignored += 1
+            logger.debug("Ignoring webhook event for %s", event.get("object_type") or event.get("model"))
+            return False
+        if event.get("event") == "deleted":
+            # Deleted master objects are handled by full reconciles (see --prune).
+            self.ignored += 1
+            logger.info("Ignoring deletion of %s %s", sync_class.object_type, data["id"])
+            return False
+        try:
+            key = self._key_instance(sync_class)._build_unique_key(RecordView(data))
+        except Exception as exc:
+            self.ignored += 1
+            logger.warning("Cannot key webhook event for %s %s: %s", sync_class.object_type, data["id"], exc)
+            return False
+        if not self.queue.put(sync_class, key, data["id"]):
+            logger.warning("Event queue overflowed, scheduling a full resync")
+        return True
+
+    def process_due(self, timeout=0):
+        """Sync the due events, or run a full resync after an overflow."""
+        resync, entries = self.queue.take_due(timeout)
+        if resync:
+            self.reconcile()
+            return
+        master_ids = {}
+        for sync_class, _, master_id in entries:
+            master_ids.setdefault(sync_class, []).append(master_id)
+        for sync_class in self.sync_types:
+            if sync_class not in master_ids:
+                continue
+            try:
+                self.build_sync(sync_class).sync_objects(master_ids[sync_class])
+            except Exception:
+                logger.exception("Event sync of %s failed", sync_class.__name__)
+
+    def reconcile(self):
+        # The full run covers everything still queued.
+        self.queue.clear()
+        logger.info("Starting full reconcile")
+        try:
+            self.run_full()
+        except Exception:
+            logger.exception("Full reconcile failed")
+        self.next_reconcile = self.clock() + self.reconcile_interval
+
+    def stop(self):
+        """Stop serve_forever within about a second."""
+        self._stop.set()
+
+    def serve_forever(self):
+        self.reconcile()
+        while not self._stop.is_set():
+            self.process_due(timeout=max(0.0, min(self.next_reconcile - self.clock(), 1.0)))
+            if self.clock() >= self.next_reconcile:
+                self.reconcile()
+
+    def stats(self):
+        return dict(self.queue.stats(), ignored=self.ignored)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Receive NetBox webhook POSTs and hand them to the server's SyncDaemon."""
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        secret = self.server.secret
+        if secret is not None and not verify_signature(secret, body, self.headers.get("X-Hook-Signature")):
+            logger.warning("Rejecting webhook with invalid signature from %s", self.address_string())
+            self._send(403)
+            return
+        try:
+            event = json.loads(body)
+        except ValueError:
+            self._send(400)
+            return
+        if not isinstance(event, dict):
+            self._send(400)
+            return
+        self.server.sync_daemon.handle_event(event)
+        self._send(202)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Webhook receiver; binding beyond loopback requires a secret."""
+
+    daemon_threads = True
+
+    def __init__(self, address, sync_daemon, secret=None):
+        if not secret and not is_loopback(address[0]):
+            raise ValueError(f"Refusing to listen on {address[0]} without a webhook secret")
+        if ":" in address[0]:
+            self.address_family = socket.AF_INET6
+        super().__init__(address, WebhookHandler)
+        self.sync_daemon = sync_daemon
+        self.secret = secret
+
+    def start(self):
+        """Serve requests in a background thread."""
+        thread = threading.Thread(target=self.serve_forever, name="webhook-server", daemon=True)
+        thread.start()
+        logger.info("Listening for webhooks on %s:%d", *self.server_address[:2])
+        return thread
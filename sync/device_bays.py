@@ -1,8 +1,13 @@
+from sync.devices import Devices
 from sync.sync import Sync
 
 class DeviceBays(Sync): 
    
     api_object = "dcim.device-bays"
+    object_type = "dcim.devicebay"
     sync_parameters = ["name", "device", "description"]
     unique_parameter = ["name","device"]
+    depends_on = [Devices]
+    shard_by = ("site", "dcim.sites", "slug")
+    scope_filters = {"site": "site"}
    
\ No newline at end of file
@@ -1,16 +1,35 @@
+from sync.racks import Racks
 from sync.sync import Sync
 
 class Devices(Sync): 
    
     api_object = "dcim.devices"
+    object_type = "dcim.device"
     sync_parameters = ["name", "site", "role", "device_type", "status", "serial", "rack", "location", "position", "face", "platform"]
     unique_parameter = ["name"]
+    depends_on = [Racks]
+    shard_by = ("site", "dcim.sites", "slug")
+    scope_filters = {"site": "site", "tenant": "tenant"}
+
+    def __init__(self, *args, adopt_template_components=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.adopt_template_components = adopt_template_components
    
     def post_create(self, oldobj, newobj):
         newobj = super().post_create(oldobj,newobj)
-        # Remove all interfaces and power ports created by default
-        for interface in self.slave_conn.dcim.interfaces.filter(device_id=newobj.id):
-            interface.delete()
-        for power_port in self.slave_conn.dcim.power_ports.filter(device_id=newobj.id):
-            power_port.delete()
+        # Remove interfaces and power ports created from the device type templates.
+        # When adopting, interfaces also present on the master are kept and
+        # patched by the interface sync instead of being recreated.
+        interfaces = list(self.slave_conn.dcim.interfaces.filter(device_id=newobj.id))
+        if self.adopt_template_components and interfaces:
+            master_names = {
+                interface.name
+                for interface in self.master_conn.dcim.interfaces.filter(device_id=oldobj.id)
+            }
+            interfaces = [interface for interface in interfaces if interface.name not in master_names]
+        self._bulk_delete(self.slave_conn.dcim.interfaces, interfaces)
+        self._bulk_delete(
+            self.slave_conn.dcim.power_ports,
+            self.slave_conn.dcim.power_ports.filter(device_id=newobj.id),
+        )
         return newobj
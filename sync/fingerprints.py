@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from sync.records import to_plain
+
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(payload):
+    """Return a stable hash of a normalised payload."""
+    encoded = json.dumps(to_plain(payload), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def key_to_text(key):
+    return json.dumps(to_plain(list(key)), separators=(",", ":"), default=str)
+
+
+class FingerprintStore:
+    """SQLite store of per-object master payload hashes and slave ``last_updated`` values."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " api_object TEXT NOT NULL,"
+            " object_key TEXT NOT NULL,"
+            " master_hash TEXT NOT NULL,"
+            " slave_last_updated TEXT,"
+            " PRIMARY KEY (api_object, object_key))"
+        )
+        self._conn.commit()
+
+    def load(self, api_object):
+        """Return {object_key: (master_hash, slave_last_updated)} for one type."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT object_key, master_hash, slave_last_updated FROM fingerprints WHERE api_object = ?",
+                (api_object,),
+            ).fetchall()
+        logger.debug("Loaded %d fingerprint(s) for %s", len(rows), api_object)
+        return {object_key: (master_hash, last_updated) for object_key, master_hash, last_updated in rows}
+
+    def record_many(self, api_object, entries):
+        """Store (object_key, master_hash, slave_last_updated) tuples for one type."""
+        entries = list(entries)
+        if not entries:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (api_object, object_key, master_hash, slave_last_updated)"
+                " VALUES (?, ?, ?, ?)",
+                [(api_object, object_key, master_hash, last_updated) for object_key, master_hash, last_updated in entries],
+            )
+            self._conn.commit()
+        logger.debug("Stored %d fingerprint(s) for %s", len(entries), api_object)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
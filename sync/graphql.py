@@ -0,0 +1,69 @@
+import logging
+
+from sync.raw import auth_headers
+from sync.records import RecordView
+
+
+logger = logging.getLogger(__name__)
+
+
+class GraphQLError(RuntimeError):
+    """Raised when the NetBox GraphQL API answers with errors."""
+
+
+def graphql_url(api):
+    """Return the GraphQL URL of a pynetbox API, e.g. https://netbox/graphql/."""
+    base_url = api.base_url.rstrip("/")
+    if base_url.endswith("/api"):
+        base_url = base_url[: -len("/api")]
+    return f"{base_url}/graphql/"
+
+
+def run_query(api, query, variables=None):
+    """POST one GraphQL query over the API's HTTP session and return its data."""
+    headers = dict(auth_headers(api), **{"Content-Type": "application/json"})
+    response = api.http_session.post(
+        graphql_url(api), json={"query": query, "variables": variables or {}}, headers=headers
+    )
+    response.raise_for_status()
+    body = response.json()
+    if body.get("errors"):
+        raise GraphQLError("; ".join(error.get("message", str(error)) for error in body["errors"]))
+    return body["data"]
+
+
+def _coerce_ids(value):
+    """GraphQL returns IDs as strings; turn them back into the integers REST uses."""
+    if isinstance(value, list):
+        return [_coerce_ids(item) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: int(item) if key == "id" and isinstance(item, str) and item.isdigit() else _coerce_ids(item)
+            for key, item in value.items()
+        }
+    return value
+
+
+def iter_graphql_records(api, list_field, selection, page_size=1000):
+    """Page a GraphQL list query with offset pagination and yield RecordView objects.
+
+    ``selection`` is the field selection of one item, nested objects
+    included, so a whole object graph arrives in one request per page.
+    """
+    query = (
+        "query ($offset: Int!, $limit: Int!) {"
+        f" {list_field}(pagination: {{offset: $offset, limit: $limit}}) {{ {selection} }}"
+        " }"
+    )
+    offset = 0
+    pages = 0
+    while True:
+        items = run_query(api, query, {"offset": offset, "limit": page_size})[list_field]
+        pages += 1
+        for item in items:
+            yield RecordView(_coerce_ids(item))
+        if len(items) < page_size:
+            break
+        offset += page_size
+
+    logger.debug("Fetched %d GraphQL page(s) of %s", pages, list_field)
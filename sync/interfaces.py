@@ -1,10 +1,131 @@
+import logging
+import threading
+
+from sync.devices import Devices
+from sync.graphql import iter_graphql_records
+from sync.raw import iter_raw_records
+from sync.records import RecordView
 from sync.sync import Sync
 
+
+logger = logging.getLogger(__name__)
+
 class Interfaces(Sync): 
    
     api_object = "dcim.interfaces"
+    object_type = "dcim.interface"
     sync_parameters = ["name", "device", "type","description","parent","mgmt_only","enabled","mtu","mode","untagged_vlan"]
     unique_parameter = ["name","device"]
+    depends_on = [Devices]
+    shard_by = ("site", "dcim.sites", "slug")
+    scope_filters = {"site": "site"}
+    apply_order_fields = ["parent"]
+    extra_fetch_fields = ["tagged_vlans"]
+    # "type" is the interface type choice here, not a related cluster type.
+    relation_lookup_fields = {
+        field: lookup for field, lookup in Sync.relation_lookup_fields.items() if field != "type"
+    }
+    scalar_lookup_fields = dict(Sync.scalar_lookup_fields, type="value")
+    # Above this many interfaces all interface IPs are fetched at once instead of by id.
+    ip_prefetch_all_threshold = 2000
+    # Interface graph read from the master's GraphQL API with --graphql. Choice
+    # fields come back as enum names there, so they are read over REST.
+    graphql_list_field = "interface_list"
+    graphql_selection = (
+        "id display name description enabled mgmt_only mtu last_updated "
+        "device { id name } parent { id name } untagged_vlan { id vid name } "
+        "tagged_vlans { id vid name group { slug } site { slug } } "
+        "ip_addresses { id address vrf { name } }"
+    )
+    graphql_rest_fields = ["id", "type", "mode"]
+
+    def __init__(self, *args, graphql_fetch=False, **kwargs):
+        # Created first: the base class resets the run state, including the VLAN index.
+        self._vlan_index_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+        self.graphql_fetch = graphql_fetch
+        self._master_ip_index = None
+
+    def _reset_run_state(self):
+        super()._reset_run_state()
+        self._graphql_ip_index = None
+        # VLANs may have been added on the slave since the last run.
+        self.invalidate_vlan_index()
+
+    def _iter_master_objects(self, master_endpoint):
+        if not self.graphql_fetch or self._current_cursor() is not None or self.partition is not None:
+            return super()._iter_master_objects(master_endpoint)
+        return self._iter_graphql_interfaces(master_endpoint)
+
+    def _iter_graphql_interfaces(self, master_endpoint):
+        """Yield master interfaces with their VLANs and IPs from GraphQL pages.
+
+        The IPs are indexed on the way so pre_apply needs no REST lookups.
+        """
+        choices = {
+            obj["id"]: obj
+            for obj in iter_raw_records(
+                master_endpoint,
+                keep_fields=self.graphql_rest_fields,
+                page_size=self.raw_page_size,
+                fields=",".join(self.graphql_rest_fields),
+            )
+        }
+        self._graphql_ip_index = {}
+        count = 0
+        for interface in iter_graphql_records(
+            master_endpoint.api, self.graphql_list_field, self.graphql_selection, page_size=self.raw_page_size
+        ):
+            ips = interface.pop("ip_addresses", None) or []
+            if ips:
+                self._graphql_ip_index[interface["id"]] = [
+                    RecordView(ip, assigned_object_id=interface["id"]) for ip in ips
+                ]
+            rest_fields = choices.get(interface["id"], {})
+            for field in self.graphql_rest_fields[1:]:
+                interface[field] = rest_fields.get(field)
+            count += 1
+            yield interface
+        logger.info("Fetched %d master interface(s) over GraphQL", count)
+
+    def pre_apply(self, sync_plan):
+        if self._graphql_ip_index is not None:
+            self._master_ip_index = self._graphql_ip_index
+            return
+        interface_ids = [item["master_obj"]["id"] for item in sync_plan]
+        self._master_ip_index = self._build_master_ip_index(interface_ids)
+
+    def _build_master_ip_index(self, interface_ids):
+        """Index master IPs assigned to the given interfaces by interface id."""
+        ip_endpoint = self.master_conn.ipam.ip_addresses
+        if len(interface_ids) > self.ip_prefetch_all_threshold:
+            batches = [ip_endpoint.filter(assigned_object_type="dcim.interface")]
+        else:
+            batches = [
+                ip_endpoint.filter(
+                    assigned_object_type="dcim.interface",
+                    assigned_object_id=interface_ids[start:start + self.lookup_chunk_size],
+                )
+                for start in range(0, len(interface_ids), self.lookup_chunk_size)
+            ]
+
+        index = {}
+        for batch in batches:
+            for ip in batch:
+                index.setdefault(ip.assigned_object_id, []).append(ip)
+        logger.debug(
+            "Indexed master IP addresses for %d of %d interface(s)",
+            len(index),
+            len(interface_ids),
+        )
+        return index
+
+    def _get_master_ips(self, interface_id):
+        if self._master_ip_index is None:
+            return self.master_conn.ipam.ip_addresses.filter(
+                assigned_object_type="dcim.interface", assigned_object_id=interface_id
+            )
+        return self._master_ip_index.get(interface_id, [])
    
     def pre_sync(self, oldobj, newobj):
         # if newobj and "tagged_vlans" in newobj and newobj["tagged_vlans"] is not None:
@@ -18,10 +139,80 @@ class Interfaces(Sync):
         """Sync Tagged VLANs for an interface."""
         new_vlans = []
         for vlan in vlans:
-            vlan_obj = self.slave_conn.ipam.vlans.get(vid=vlan["vid"])
-            if vlan_obj is not None:
-                new_vlans.append(vlan_obj.id)
-        interface.update({"tagged_vlans": new_vlans})          
+            vlan_id = self._resolve_slave_vlan_id(vlan)
+            if vlan_id is not None:
+                new_vlans.append(vlan_id)
+
+        has_value, current_vlans = self._try_get_param_value(interface, "tagged_vlans")
+        if has_value and current_vlans is not None:
+            current_ids = {self._extract_lookup_value(vlan, "id") for vlan in current_vlans}
+            if current_ids == set(new_vlans):
+                logger.debug("Tagged VLANs of %s already up to date", getattr(interface, "display", repr(interface)))
+                return
+        interface.update({"tagged_vlans": new_vlans})
+
+    def invalidate_vlan_index(self):
+        """Drop the slave VLAN index, e.g. after VLANs were created on the slave."""
+        with self._vlan_index_lock:
+            self._vlan_index = None
+
+    def _get_vlan_index(self):
+        with self._vlan_index_lock:
+            if self._vlan_index is None:
+                index = {}
+                for vlan_obj in self.slave_conn.ipam.vlans.all():
+                    index.setdefault(vlan_obj.vid, []).append(self._vlan_index_entry(vlan_obj))
+                logger.debug("Indexed %d slave VLAN ID(s)", len(index))
+                self._vlan_index = index
+            return self._vlan_index
+
+    def _vlan_index_entry(self, vlan_obj):
+        return {
+            "id": vlan_obj.id,
+            "name": vlan_obj.name,
+            "group": self._extract_lookup_value(getattr(vlan_obj, "group", None), "slug"),
+            "site": self._extract_lookup_value(getattr(vlan_obj, "site", None), "slug"),
+        }
+
+    def _resolve_slave_vlan_id(self, vlan):
+        vid = self._extract_lookup_value(vlan, "vid")
+        index = self._get_vlan_index()
+        candidates = index.get(vid)
+        if candidates is None:
+            # Not known at index time; look it up once and remember the result.
+            vlan_obj = self.slave_conn.ipam.vlans.get(vid=vid)
+            candidates = [self._vlan_index_entry(vlan_obj)] if vlan_obj is not None else []
+            with self._vlan_index_lock:
+                index[vid] = candidates
+
+        scoped = False
+        for scope in ("name", "group", "site"):
+            if len(candidates) < 2:
+                break
+            has_value, wanted = self._try_get_param_value(vlan, scope)
+            if not has_value or wanted is None:
+                continue
+            if scope != "name":
+                scoped = True
+                wanted = self._extract_lookup_value(wanted, "slug")
+            narrowed = [entry for entry in candidates if entry[scope] == wanted]
+            if narrowed:
+                candidates = narrowed
+
+        if len(candidates) > 1 and not scoped:
+            # Without a group or site on the master side, the match is the slave's global VLAN.
+            unscoped = self._lookup_unscoped_vlans(vid)
+            if unscoped:
+                candidates = unscoped
+
+        if len(candidates) > 1:
+            raise ValueError(f"VLAN {vid} is ambiguous on the slave ({len(candidates)} matches)")
+        return candidates[0]["id"] if candidates else None
+
+    def _lookup_unscoped_vlans(self, vid):
+        """Return the slave VLANs with this VID assigned to neither a group nor a site."""
+        vlans = self.slave_conn.ipam.vlans.filter(vid=vid, group_id="null", site_id="null")
+        return [self._vlan_index_entry(vlan_obj) for vlan_obj in vlans]
 
     def post_sync(self, oldobj, newobj):      
         # Sync Tagged VLANs separately to avoid issues during creation/update
@@ -31,7 +222,7 @@ class Interfaces(Sync):
         # if oldobj["mac_address"] is not None:
         #     self.sync_mac_address(newobj, oldobj["mac_addresses"])
         # Sync IP addresses separately to avoid issues during creation/update
-        ips = self.master_conn.ipam.ip_addresses.filter(assigned_object_type="dcim.interface", assigned_object_id=oldobj["id"])
+        ips = self._get_master_ips(oldobj["id"])
         if ips is not None and len(ips) > 0:
             self.sync_ip_addresses(newobj, ips)
         
@@ -52,7 +243,7 @@ class Interfaces(Sync):
         
     def sync_ip_addresses(self, interface, ip_addresses):
         for ip in ip_addresses:
-            netbox_ips = self.slave_conn.ipam.ip_addresses.filter(address=ip)
+            netbox_ips = self.slave_conn.ipam.ip_addresses.filter(address=ip.address)
             if not netbox_ips:
                 query_params = {
                     "address": ip.address,
@@ -81,7 +272,7 @@ class Interfaces(Sync):
                 # or if everything is assigned to other servers
                 elif not len(assigned_anycast_ip):
                     query_params = {
-                        "address": ip,
+                        "address": ip.address,
                         "status": "active",
                         "role": "Anycast",
                         "assigned_object_type": "dcim.interface",
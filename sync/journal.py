@@ -0,0 +1,122 @@
+import logging
+import os
+import shutil
+import threading
+
+from sync.fingerprints import key_to_text
+from sync.plan_file import read_plan_file, write_plan_file
+from sync.records import RecordView
+
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """Checkpoints of a sync run in a local directory, used by --resume.
+
+    Per type the journal holds the saved plan (``<api_object>.plan.jsonl``,
+    written after planning in the plan file format), an append-only list of
+    the unique keys of applied plan items (``<api_object>.applied``) and a
+    ``<api_object>.complete`` marker once the type finished without errors.
+    Applied keys are flushed per item and fsynced every ``fsync_every``
+    items and when a type finishes.
+    """
+
+    def __init__(self, directory, resume=False, fsync_every=100):
+        self.directory = directory
+        self.resume = resume
+        self.fsync_every = fsync_every
+        self._handles = {}
+        self._unsynced = {}
+        self._lock = threading.Lock()
+        if not resume:
+            self.clear()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, api_object, suffix):
+        return os.path.join(self.directory, f"{api_object}.{suffix}")
+
+    def clear(self):
+        """Drop all checkpoints, e.g. after a run completed."""
+        self.close()
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+            logger.debug("Cleared sync journal in %s", self.directory)
+
+    def is_complete(self, api_object):
+        return os.path.exists(self._path(api_object, "complete"))
+
+    def save_plan(self, sync, sync_plan):
+        """Checkpoint the plan of a type before it is applied."""
+        path = self._path(sync.api_object, "plan.jsonl")
+        tmp_path = f"{path}.tmp"
+        write_plan_file(tmp_path, (sync.serialize_plan_item(plan_item) for plan_item in sync_plan))
+        with self._lock:
+            self._close_handle(sync.api_object)
+            for suffix in ("applied", "complete"):
+                if os.path.exists(self._path(sync.api_object, suffix)):
+                    os.remove(self._path(sync.api_object, suffix))
+            os.replace(tmp_path, path)
+
+    def remaining_plan(self, sync):
+        """Return the saved plan entries of a type not applied yet, or None without a saved plan."""
+        path = self._path(sync.api_object, "plan.jsonl")
+        if not os.path.exists(path):
+            return None
+        entries = read_plan_file(path).get(sync.api_object, [])
+        applied = self._applied_keys(sync.api_object)
+        remaining = [
+            entry
+            for entry in entries
+            if key_to_text(sync._build_unique_key(RecordView(entry["master"]))) not in applied
+        ]
+        logger.info(
+            "Resuming %s: %d of %d plan item(s) already applied",
+            sync.api_object,
+            len(entries) - len(remaining),
+            len(entries),
+        )
+        return remaining
+
+    def _applied_keys(self, api_object):
+        path = self._path(api_object, "applied")
+        if not os.path.exists(path):
+            return set()
+        with open(path, encoding="utf-8") as handle:
+            # A torn last line from a crash never matches a key.
+            return {line.rstrip("\n") for line in handle}
+
+    def mark_applied(self, api_object, key):
+        with self._lock:
+            handle = self._handles.get(api_object)
+            if handle is None:
+                handle = self._handles[api_object] = open(self._path(api_object, "applied"), "a", encoding="utf-8")
+            handle.write(key_to_text(key) + "\n")
+            handle.flush()
+            self._unsynced[api_object] = self._unsynced.get(api_object, 0) + 1
+            if self._unsynced[api_object] >= self.fsync_every:
+                os.fsync(handle.fileno())
+                self._unsynced[api_object] = 0
+
+    def finish(self, sync):
+        """Sync the applied keys of a type to disk and mark it complete unless it had errors."""
+        with self._lock:
+            self._close_handle(sync.api_object)
+        if sync.errors:
+            logger.info("Not marking %s complete in the journal because it had errors", sync.api_object)
+            return
+        with open(self._path(sync.api_object, "complete"), "w", encoding="utf-8"):
+            pass
+
+    def _close_handle(self, api_object):
+        handle = self._handles.pop(api_object, None)
+        self._unsynced.pop(api_object, None)
+        if handle is not None:
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
+
+    def close(self):
+        with self._lock:
+            for api_object in list(self._handles):
+                self._close_handle(api_object)
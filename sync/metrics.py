@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_run_summary(instances, started, finished, **extra):
+    """Collect the run summaries of all Sync instances into one document."""
+    summary = {
+        "started": started,
+        "finished": finished,
+        "duration_seconds": finished - started,
+        "types": [instance.run_summary() for instance in instances],
+    }
+    summary.update(extra)
+    return summary
+
+
+def merge_run_summaries(summaries):
+    """Merge the run summaries of several shards into one, summing timings and counters per type."""
+    summaries = list(summaries)
+    types = {}
+    for summary in summaries:
+        for type_summary in summary["types"]:
+            merged = types.setdefault(
+                type_summary["api_object"],
+                {"api_object": type_summary["api_object"], "timings": {}, "counters": {}},
+            )
+            for section in ("timings", "counters"):
+                for name, value in type_summary[section].items():
+                    merged[section][name] = merged[section].get(name, 0) + value
+    started = min(summary["started"] for summary in summaries)
+    finished = max(summary["finished"] for summary in summaries)
+    return {
+        "started": started,
+        "finished": finished,
+        "duration_seconds": finished - started,
+        "types": list(types.values()),
+        "shards": [summary.get("shard") for summary in summaries],
+    }
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+def render_prometheus(summary, labels=None):
+    """Render a run summary in the Prometheus text exposition format."""
+    base_labels = dict(labels or {})
+    lines = [
+        "# HELP netbox_sync_last_run_timestamp_seconds Unix time the last sync run finished.",
+        "# TYPE netbox_sync_last_run_timestamp_seconds gauge",
+        f"netbox_sync_last_run_timestamp_seconds{_format_labels(base_labels)} {summary['finished']:.3f}",
+        "# HELP netbox_sync_run_duration_seconds Wall-clock duration of the last sync run.",
+        "# TYPE netbox_sync_run_duration_seconds gauge",
+        f"netbox_sync_run_duration_seconds{_format_labels(base_labels)} {summary['duration_seconds']:.3f}",
+        "# HELP netbox_sync_phase_duration_seconds Time spent per phase and object type in the last run.",
+        "# TYPE netbox_sync_phase_duration_seconds gauge",
+    ]
+    for type_summary in summary["types"]:
+        for phase, elapsed in sorted(type_summary["timings"].items()):
+            type_labels = dict(base_labels, api_object=type_summary["api_object"], phase=phase)
+            lines.append(f"netbox_sync_phase_duration_seconds{_format_labels(type_labels)} {elapsed:.6f}")
+
+    lines.extend(
+        [
+            "# HELP netbox_sync_objects Planned actions per object type in the last run.",
+            "# TYPE netbox_sync_objects gauge",
+        ]
+    )
+    for type_summary in summary["types"]:
+        for action, count in sorted(type_summary["counters"].items()):
+            if action == "errors":
+                continue
+            type_labels = dict(base_labels, api_object=type_summary["api_object"], action=action)
+            lines.append(f"netbox_sync_objects{_format_labels(type_labels)} {count}")
+
+    lines.extend(
+        [
+            "# HELP netbox_sync_errors Objects that failed to sync per object type in the last run.",
+            "# TYPE netbox_sync_errors gauge",
+        ]
+    )
+    for type_summary in summary["types"]:
+        type_labels = dict(base_labels, api_object=type_summary["api_object"])
+        lines.append(f"netbox_sync_errors{_format_labels(type_labels)} {type_summary['counters']['errors']}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_prometheus_textfile(path, summary, labels=None):
+    """Write metrics for the node_exporter textfile collector, replacing the file atomically."""
+    _write_atomic(path, render_prometheus(summary, labels))
+    logger.info("Wrote Prometheus metrics to %s", path)
+
+
+def write_json_summary(path, summary):
+    _write_atomic(path, json.dumps(summary, indent=2, sort_keys=True, default=str) + "\n")
+    logger.info("Wrote run summary to %s", path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge the JSON run summaries of sharded sync runs")
+    parser.add_argument("output", help="File to write the merged summary to")
+    parser.add_argument("summaries", nargs="+", help="Run summaries written with --run-summary")
+    parser.add_argument("--metrics-textfile", help="Also write the merged summary as a Prometheus textfile")
+    args = parser.parse_args()
+
+    summaries = []
+    for path in args.summaries:
+        with open(path, encoding="utf-8") as handle:
+            summaries.append(json.load(handle))
+    merged = merge_run_summaries(summaries)
+    write_json_summary(args.output, merged)
+    if args.metrics_textfile:
+        write_prometheus_textfile(args.metrics_textfile, merged)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
+from sync.devices import Devices
 from sync.sync import Sync
 
 class ModuleBays(Sync): 
    
     api_object = "dcim.module-bays"
+    object_type = "dcim.modulebay"
     sync_parameters = ["name", "device", "position","description"]
     unique_parameter = ["name","device"]
+    depends_on = [Devices]
+    shard_by = ("site", "dcim.sites", "slug")
+    scope_filters = {"site": "site"}
+    extra_fetch_fields = ["installed_module"]
    
     def pre_sync(self, oldobj, newobj):
         return newobj
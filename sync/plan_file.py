@@ -0,0 +1,39 @@
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_plan_file(path, entries):
+    """Write serialized plan entries as JSON lines."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for entry in entries:
+            handle.write(json.dumps(entry, sort_keys=True, default=str))
+            handle.write("\n")
+            count += 1
+    logger.info("Wrote %d plan item(s) to %s", count, path)
+    return count
+
+
+def read_plan_file(path):
+    """Read a plan file and group its entries by api_object, keeping file order."""
+    plans = {}
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"Invalid plan entry on line {line_number} of {path}: {exc}") from exc
+            plans.setdefault(entry["api_object"], []).append(entry)
+    logger.info(
+        "Loaded %d plan item(s) for %d object type(s) from %s",
+        sum(len(entries) for entries in plans.values()),
+        len(plans),
+        path,
+    )
+    return plans
@@ -3,6 +3,10 @@ from sync.sync import Sync
 class Racks(Sync): 
    
     api_object = "dcim.racks"
+    object_type = "dcim.rack"
     sync_parameters = ["name", "site", "location","role","rack_type","status"]
     unique_parameter = ["name"]
+    shard_by = ("site", "dcim.sites", "slug")
+    scope_filters = {"site": "site", "tenant": "tenant"}
+    relation_endpoints = dict(Sync.relation_endpoints, role="dcim.rack_roles", rack_type="dcim.rack_types")
    
\ No newline at end of file
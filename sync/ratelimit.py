@@ -0,0 +1,140 @@
+import email.utils
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Responses telling us the server is overloaded; other 5xx count as errors.
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(value, now=time.time):
+    """Return the delay in seconds of a Retry-After header (seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - now())
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent requests and requests per second.
+
+    Every healthy response grows the concurrency limit by one per window
+    and the rate by ``rate_step`` requests/s per second of traffic.
+    Throttling (429/503), other 5xx responses, connection errors and
+    responses slower than ``latency_target`` seconds multiply both limits
+    by ``backoff``, at most once per ``cooldown`` seconds. A Retry-After
+    header additionally holds all new requests until it expires.
+    """
+
+    def __init__(
+        self,
+        max_concurrency=10,
+        max_rate=50.0,
+        min_concurrency=1,
+        min_rate=1.0,
+        latency_target=2.0,
+        backoff=0.5,
+        rate_step=1.0,
+        cooldown=1.0,
+        clock=time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.min_rate = min_rate
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.rate_step = rate_step
+        self.cooldown = cooldown
+        self.clock = clock
+        # Start low and let additive increase find the server's capacity.
+        self.concurrency = float(min(max_concurrency, max(min_concurrency, 2)))
+        self.rate = min(max_rate, max(min_rate, max_rate / 4))
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.slow = 0
+        self.decreases = 0
+        self._latency_total = 0.0
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._last_decrease = None
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a request may be sent within the current limits."""
+        with self._condition:
+            while True:
+                now = self.clock()
+                wait = max(self._blocked_until, self._next_slot) - now
+                if wait <= 0 and self.in_flight < int(self.concurrency):
+                    break
+                self._condition.wait(wait if wait > 0 else None)
+            self.in_flight += 1
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate
+
+    def release(self, status=None, latency=0.0, retry_after=None, retried_statuses=()):
+        """Record the outcome of a request sent after acquire().
+
+        ``status`` is None for connection errors. ``retried_statuses`` are
+        statuses of attempts the transport already retried.
+        """
+        with self._condition:
+            now = self.clock()
+            self.in_flight -= 1
+            self.requests += 1
+            self._latency_total += latency
+            throttled = status in THROTTLE_STATUSES or any(
+                retried in THROTTLE_STATUSES for retried in retried_statuses
+            )
+            failed = status is None or (status >= 500 and status not in THROTTLE_STATUSES)
+            slow = latency > self.latency_target
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if throttled or failed or slow:
+                self.throttled += throttled
+                self.errors += failed
+                self.slow += slow
+                self._decrease(now)
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+                self.rate = min(self.max_rate, self.rate + self.rate_step / self.rate)
+            self._condition.notify_all()
+
+    def _decrease(self, now):
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.concurrency = max(self.min_concurrency, self.concurrency * self.backoff)
+        self.rate = max(self.min_rate, self.rate * self.backoff)
+        logger.info(
+            "Slave overloaded, limiting to %d concurrent request(s) and %.1f request(s)/s",
+            int(self.concurrency),
+            self.rate,
+        )
+
+    def snapshot(self):
+        """Return the current limits and counters, e.g. for the run summary."""
+        with self._condition:
+            return {
+                "concurrency_limit": int(self.concurrency),
+                "rate_limit": round(self.rate, 2),
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "slow": self.slow,
+                "decreases": self.decreases,
+                "avg_latency": round(self._latency_total / self.requests, 4) if self.requests else 0.0,
+            }
@@ -0,0 +1,43 @@
+import logging
+
+from sync.records import RecordView
+
+
+logger = logging.getLogger(__name__)
+
+
+def auth_headers(api):
+    headers = {"Accept": "application/json"}
+    if api.token:
+        headers["Authorization"] = f"Token {api.token}"
+    return headers
+
+
+def iter_raw_records(endpoint, keep_fields=None, page_size=1000, **filters):
+    """Page a pynetbox endpoint's REST URL directly and yield RecordView objects.
+
+    Skips pynetbox Record hydration. When ``keep_fields`` is given, only
+    those top-level fields are kept on each object; nested values stay plain
+    dicts and lists.
+    """
+    api = endpoint.api
+    session = api.http_session
+    headers = auth_headers(api)
+    url = f"{endpoint.url}/"
+    params = dict(filters, limit=page_size, offset=0)
+    pages = 0
+
+    while url:
+        response = session.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        pages += 1
+        for item in data["results"]:
+            if keep_fields is not None:
+                item = {field: item[field] for field in keep_fields if field in item}
+            yield RecordView(item)
+        # The "next" link already carries all query parameters.
+        url = data.get("next")
+        params = None
+
+    logger.debug("Fetched %d raw page(s) from %s", pages, endpoint.url)
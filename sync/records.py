@@ -0,0 +1,36 @@
+class RecordView(dict):
+    """Read-only stand-in for a pynetbox Record built from plain JSON data.
+
+    Supports both item access (``obj["id"]``) and attribute access
+    (``obj.name``) so hooks written against Records keep working. Missing
+    attributes raise AttributeError like on a regular object.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"RecordView({self.get('display', self.get('id'))!r})"
+
+
+def to_plain(value):
+    """Convert Records and other objects into JSON-compatible data."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_plain(item) for item in value]
+    try:
+        # pynetbox Records iterate as (field, value) pairs with nested Records expanded
+        return to_plain(dict(value))
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, "__dict__"):
+        return {key: to_plain(item) for key, item in vars(value).items() if not key.startswith("_")}
+    return str(value)
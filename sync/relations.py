@@ -0,0 +1,120 @@
+import logging
+import threading
+
+from sync.raw import iter_raw_records
+
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_api_object(api_object):
+    return api_object.replace("-", "_")
+
+
+def _brief_fetch(endpoint, fields):
+    return iter_raw_records(endpoint, keep_fields=fields, brief=1)
+
+
+class RelationResolver:
+    """Run-scoped maps from slave lookup values (slug, name) to object IDs.
+
+    Each (model, lookup field) map is loaded with one brief fetch the first
+    time a payload needs it and is shared by all types of the run. Values
+    that occur more than once on the slave are ambiguous and, like misses,
+    stay nested lookups for NetBox to resolve.
+    """
+
+    def __init__(self, slave_conn, fetch=None):
+        self.slave_conn = slave_conn
+        self.fetch = fetch or _brief_fetch
+        self._maps = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _endpoint(self, api_object):
+        obj = self.slave_conn
+        for part in api_object.split("."):
+            obj = getattr(obj, part)
+        return obj
+
+    def _get_map(self, api_object, lookup_field):
+        key = (api_object, lookup_field)
+        with self._lock:
+            if key in self._maps:
+                return self._maps[key][0]
+            key_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Loaded under a lock per map, so a slow endpoint only blocks lookups on that map.
+        with key_lock:
+            with self._lock:
+                if key in self._maps:
+                    return self._maps[key][0]
+            ids = {}
+            ambiguous = set()
+            for obj in self.fetch(self._endpoint(api_object), ["id", lookup_field]):
+                value = getattr(obj, lookup_field, None)
+                if value is None:
+                    continue
+                if value in ids and ids[value] != obj.id:
+                    ambiguous.add(value)
+                ids[value] = obj.id
+            for value in ambiguous:
+                del ids[value]
+            with self._lock:
+                self._maps[key] = (ids, ambiguous)
+        logger.debug(
+            "Loaded %d %s id(s) by %s (%d ambiguous)", len(ids), api_object, lookup_field, len(ambiguous)
+        )
+        return ids
+
+    def resolve(self, api_object, lookup):
+        """Return the slave id for a single-field lookup like {"slug": "dc1"}, or None."""
+        if not isinstance(lookup, dict) or len(lookup) != 1:
+            return None
+        (lookup_field, value), = lookup.items()
+        if isinstance(value, (dict, list)):
+            return None
+        object_id = self._get_map(_normalize_api_object(api_object), lookup_field).get(value)
+        with self._lock:
+            if object_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return object_id
+
+    def resolve_payload(self, relation_endpoints, payload):
+        """Return a copy of ``payload`` with resolvable nested lookups replaced by IDs."""
+        resolved = dict(payload)
+        for field, api_object in relation_endpoints.items():
+            value = resolved.get(field)
+            if isinstance(value, dict):
+                object_id = self.resolve(api_object, value)
+                if object_id is not None:
+                    resolved[field] = object_id
+            elif isinstance(value, list):
+                resolved[field] = [
+                    item if object_id is None else object_id
+                    for item, object_id in ((item, self.resolve(api_object, item)) for item in value)
+                ]
+        return resolved
+
+    def register(self, api_object, obj):
+        """Add a created or updated slave object to the maps already loaded for its model."""
+        api_object = _normalize_api_object(api_object)
+        with self._lock:
+            for (loaded_object, lookup_field), (ids, ambiguous) in self._maps.items():
+                if loaded_object != api_object:
+                    continue
+                value = getattr(obj, lookup_field, None)
+                if value is None or value in ambiguous:
+                    continue
+                if ids.get(value, obj.id) != obj.id:
+                    del ids[value]
+                    ambiguous.add(value)
+                else:
+                    ids[value] = obj.id
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "maps": len(self._maps)}
@@ -0,0 +1,142 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncScheduler:
+    """Run Sync subclasses in dependency order, independent branches concurrently.
+
+    Dependencies are declared on the classes through ``depends_on``.
+    Dependencies on classes that are not scheduled are ignored.
+    """
+
+    def __init__(self, sync_classes, factory, max_workers=1):
+        self.sync_classes = list(sync_classes)
+        self.factory = factory
+        self.max_workers = max(1, max_workers or 1)
+        self.instances = {}
+        self.timings = {}
+        self.failed = []
+        self.skipped = []
+
+    def dependencies(self, sync_class):
+        return [dep for dep in sync_class.depends_on if dep in self.sync_classes]
+
+    def topological_order(self):
+        order = []
+        visiting = set()
+        visited = set()
+
+        def visit(sync_class):
+            if sync_class in visited:
+                return
+            if sync_class in visiting:
+                raise ValueError(f"Dependency cycle detected at {sync_class.__name__}")
+            visiting.add(sync_class)
+            for dep in self.dependencies(sync_class):
+                visit(dep)
+            visiting.discard(sync_class)
+            visited.add(sync_class)
+            order.append(sync_class)
+
+        for sync_class in self.sync_classes:
+            visit(sync_class)
+        return order
+
+    def run(self, action="sync"):
+        """Run ``action`` on every type: a method name or a callable taking the instance.
+
+        Returns the types that failed or were skipped because a dependency
+        failed; the instances of the run are kept in ``instances``.
+        """
+        order = self.topological_order()
+        pending = list(order)
+        done = set()
+        running = {}
+        logger.debug(
+            "Scheduling %d sync type(s) with %d worker(s): %s",
+            len(order),
+            self.max_workers,
+            ", ".join(sync_class.__name__ for sync_class in order),
+        )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="type") as executor:
+            while pending or running:
+                for sync_class in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    deps = self.dependencies(sync_class)
+                    if any(dep in self.failed or dep in self.skipped for dep in deps):
+                        logger.error(
+                            "Skipping %s because a dependency failed", sync_class.__name__
+                        )
+                        self.skipped.append(sync_class)
+                        pending.remove(sync_class)
+                        continue
+                    if all(dep in done for dep in deps):
+                        pending.remove(sync_class)
+                        running[executor.submit(self._run_one, sync_class, action)] = sync_class
+
+                if not running:
+                    continue
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sync_class = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        logger.exception("Synchronization of %s failed", sync_class.__name__)
+                        self.failed.append(sync_class)
+                    else:
+                        done.add(sync_class)
+
+        self.log_critical_path()
+        return self.failed + self.skipped
+
+    def _run_one(self, sync_class, action):
+        logger.debug("Starting %s synchronization", sync_class.__name__)
+        instance = self.factory(sync_class)
+        self.instances[sync_class] = instance
+        started = time.monotonic()
+        try:
+            if callable(action):
+                action(instance)
+            else:
+                getattr(instance, action)()
+        finally:
+            self.timings[sync_class] = (started, time.monotonic())
+
+    def critical_path(self):
+        """Return the chain of types that bounded the run, and its duration."""
+        best = {}
+        for sync_class in self.topological_order():
+            if sync_class not in self.timings:
+                continue
+            started, finished = self.timings[sync_class]
+            duration = finished - started
+            chain, chain_duration = [], 0.0
+            for dep in self.dependencies(sync_class):
+                if dep in best and best[dep][1] > chain_duration:
+                    chain, chain_duration = best[dep]
+            best[sync_class] = (chain + [sync_class], chain_duration + duration)
+
+        if not best:
+            return [], 0.0
+        return max(best.values(), key=lambda item: item[1])
+
+    def log_critical_path(self):
+        path, duration = self.critical_path()
+        if not path:
+            return
+        logger.info(
+            "Critical path (%.2fs): %s",
+            duration,
+            " -> ".join(
+                "%s (%.2fs)" % (sync_class.__name__, self.timings[sync_class][1] - self.timings[sync_class][0])
+                for sync_class in path
+            ),
+        )
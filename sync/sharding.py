@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+import zlib
+
+from sync.fingerprints import key_to_text
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard(text):
+    """Parse ``K/N`` into (K, N) with 0 <= K < N."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected K/N such as 0/4") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {text!r}, K must be between 0 and N-1")
+    return index, count
+
+
+def parse_scope(items):
+    """Parse ``key=value[,key=value]`` items into {key: [values]}; repeated keys add values."""
+    scope = {}
+    for item in items or []:
+        for pair in filter(None, item.split(",")):
+            key, separator, value = pair.partition("=")
+            if not separator or not key or not value:
+                raise ValueError(f"Invalid scope {pair!r}, expected key=value")
+            scope.setdefault(key.strip(), []).append(value.strip())
+    return scope
+
+
+def shard_of(value, count):
+    return zlib.crc32(str(value).encode("utf-8")) % count
+
+
+def shard_path(path, label):
+    """Insert the shard label before the extension: summary.json -> summary.shard-0-of-4.json."""
+    if not path or not label:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{label}{ext}"
+
+
+class Partition:
+    """The slice of the master data one sync process is responsible for.
+
+    Types with ``shard_by`` are partitioned by a related value (the site
+    slug of devices and their components, the cluster name of clusters, VMs
+    and VM interfaces). The values owned by this shard are pushed into the
+    master fetch as list filters. Other types are partitioned by a hash of
+    their unique key after fetching. ``--scope`` filters are applied to
+    types that declare them in ``scope_filters``. Objects without a value
+    for ``shard_by`` are fetched by shard 0. Types declaring
+    ``scope_filters`` without one of the requested keys are skipped; types
+    without any ``scope_filters`` are global and synced in full.
+    """
+
+    def __init__(self, index=0, count=1, scope=None):
+        self.index = index
+        self.count = count
+        self.scope = dict(scope or {})
+        self._shard_values = {}
+        self._lock = threading.Lock()
+
+    @property
+    def label(self):
+        parts = []
+        if self.count > 1:
+            parts.append(f"shard-{self.index}-of-{self.count}")
+        if self.scope:
+            parts.append("scope-" + "-".join(f"{key}-{'+'.join(values)}" for key, values in sorted(self.scope.items())))
+        return ".".join(parts)
+
+    def summary(self):
+        return {"index": self.index, "count": self.count, "scope": self.scope}
+
+    def _type_filters(self, sync):
+        """Return the scope filters of a type, or None when it must be skipped."""
+        if not self.scope or sync.scope_filters is None:
+            return {}
+        missing = [key for key in self.scope if key not in sync.scope_filters]
+        if missing:
+            logger.warning(
+                "Skipping %s: it cannot be scoped by %s", sync.api_object, ", ".join(sorted(missing))
+            )
+            return None
+        return {sync.scope_filters[key]: list(values) for key, values in self.scope.items()}
+
+    def _owned_values(self, sync):
+        filter_name, source, field = sync.shard_by
+        with self._lock:
+            if source not in self._shard_values:
+                endpoint = sync._resolve_path(sync.master_conn, source)
+                values = sorted({getattr(obj, field) for obj in sync._fetch(endpoint, fields=["id", field])})
+                self._shard_values[source] = [value for value in values if shard_of(value, self.count) == self.index]
+                logger.info(
+                    "Shard %d/%d owns %d of %d %s value(s)",
+                    self.index,
+                    self.count,
+                    len(self._shard_values[source]),
+                    len(values),
+                    source,
+                )
+            return filter_name, self._shard_values[source]
+
+    def _owns(self, sync, obj):
+        try:
+            key = sync._build_unique_key(obj)
+        except Exception:
+            # Kept by one shard so the plan builder reports the error once.
+            return self.index == 0
+        return shard_of(key_to_text(key), self.count) == self.index
+
+    def iter_fetch(self, sync, endpoint, fields=None, **filters):
+        """Yield the master objects of ``endpoint`` in this partition."""
+        type_filters = self._type_filters(sync)
+        if type_filters is None:
+            return
+        filters.update(type_filters)
+
+        hashed = self.count > 1 and sync.shard_by is None
+        chunks = [filters]
+        if self.count > 1 and sync.shard_by is not None:
+            filter_name, values = self._owned_values(sync)
+            scoped = filter_name in filters
+            if scoped:
+                values = [value for value in values if value in filters[filter_name]]
+            chunks = [
+                dict(filters, **{filter_name: values[start:start + sync.lookup_chunk_size]})
+                for start in range(0, len(values), sync.lookup_chunk_size)
+            ]
+            if self.index == 0 and not scoped and sync.shard_by[1] != sync.api_object:
+                # Objects without a related value (e.g. VMs without a cluster) belong to the first shard.
+                chunks.append(dict(filters, **{f"{filter_name}_id": "null"}))
+
+        for chunk in chunks:
+            for obj in sync._iter_fetch(endpoint, fields=fields, **chunk):
+                if hashed and not self._owns(sync, obj):
+                    continue
+                yield obj
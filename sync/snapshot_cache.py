@@ -0,0 +1,190 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from sync.cursor import newest_timestamp, parse_timestamp
+from sync.records import RecordView, to_plain
+
+
+logger = logging.getLogger(__name__)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode(obj, field):
+    # Strings and numbers are stored natively; other values (None, booleans,
+    # nested objects) as JSON in a BLOB so they can be told apart from text.
+    # SQL NULL marks a field missing from the object.
+    if field not in obj:
+        return None
+    value = obj[field]
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return value
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _decode_row(fields, row):
+    obj = {}
+    for field, value in zip(fields, row):
+        if value is None:
+            continue
+        obj[field] = json.loads(value) if isinstance(value, bytes) else value
+    return obj
+
+
+class SnapshotCache:
+    """On-disk cache of fetched objects per NetBox instance and api_object.
+
+    Within the TTL a cached snapshot is revalidated instead of re-downloaded:
+    objects with ``last_updated`` at or after the newest cached value are
+    fetched and merged. The object count and the newest ``last_updated`` are
+    then compared with NetBox to detect deletions and missed changes, which
+    trigger a full fetch. Each instance has a SQLite file with one table per
+    api_object and one column per fetched field, so revalidation only writes
+    the changed rows. Snapshots are returned as RecordView objects.
+    """
+
+    def __init__(self, cache_dir, ttl=86400, refresh=False):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.refresh = refresh
+
+    def _path(self, endpoint):
+        instance = hashlib.sha1(str(endpoint.api.base_url).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{instance}.sqlite")
+
+    def _connect(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Types synced in parallel share the file; wait for each other's writes.
+        conn = sqlite3.connect(path, timeout=60)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " api_object TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " fields TEXT NOT NULL)"
+        )
+        return conn
+
+    def _load(self, conn, api_object):
+        row = conn.execute("SELECT fetched_at, fields FROM snapshots WHERE api_object = ?", (api_object,)).fetchone()
+        if row is None:
+            return None
+        fetched_at, fields = row[0], row[1].split(",")
+        try:
+            rows = conn.execute(f"SELECT {', '.join(map(_quote, fields))} FROM {_quote(api_object)}").fetchall()
+        except sqlite3.Error as exc:
+            logger.warning("Ignoring unreadable snapshot of %s: %s", api_object, exc)
+            return None
+        objects = (_decode_row(fields, row) for row in rows)
+        return {"fetched_at": fetched_at, "fields": fields, "objects": {obj["id"]: obj for obj in objects}}
+
+    def _replace(self, conn, api_object, snapshot):
+        fields = snapshot["fields"]
+        table = _quote(api_object)
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"CREATE TABLE {table} ({', '.join(map(_quote, fields))}, PRIMARY KEY (\"id\"))")
+        conn.execute(
+            "INSERT OR REPLACE INTO snapshots (api_object, fetched_at, fields) VALUES (?, ?, ?)",
+            (api_object, snapshot["fetched_at"], ",".join(fields)),
+        )
+        self._store_objects(conn, api_object, fields, snapshot["objects"].values())
+
+    def _store_objects(self, conn, api_object, fields, objects):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {_quote(api_object)} ({', '.join(map(_quote, fields))})"
+            f" VALUES ({', '.join('?' for _ in fields)})",
+            [[_encode(obj, field) for field in fields] for obj in objects],
+        )
+
+    def fetch(self, sync, endpoint, fields=None):
+        """Return all objects of ``endpoint`` using ``sync._fetch`` for any network access."""
+        path = self._path(endpoint)
+        fields = list(fields or sync.fetch_fields())
+        with contextlib.closing(self._connect(path)) as conn, conn:
+            snapshot = None if self.refresh else self._load(conn, sync.api_object)
+
+            if snapshot is not None and snapshot["fields"] != fields:
+                logger.debug("Snapshot of %s was taken with other fields, refetching", sync.api_object)
+                snapshot = None
+            if snapshot is not None and time.time() - snapshot["fetched_at"] > self.ttl:
+                logger.debug("Snapshot of %s is older than %ss, refetching", sync.api_object, self.ttl)
+                snapshot = None
+
+            if snapshot is not None:
+                changed = self._revalidate(sync, endpoint, fields, snapshot)
+                if changed is None:
+                    snapshot = None
+                else:
+                    self._store_objects(conn, sync.api_object, fields, changed)
+
+            if snapshot is None:
+                objects = sync._fetch(endpoint, fields=fields)
+                snapshot = {
+                    "fetched_at": time.time(),
+                    "fields": fields,
+                    "objects": {obj["id"]: self._project(obj, fields) for obj in map(to_plain, objects)},
+                }
+                logger.info("Fetched full snapshot of %d %s object(s)", len(snapshot["objects"]), sync.api_object)
+                self._replace(conn, sync.api_object, snapshot)
+
+        return [RecordView(obj) for obj in snapshot["objects"].values()]
+
+    def _project(self, obj, fields):
+        # Only the fetched fields are cached, so fresh and cached objects look alike.
+        return {field: obj[field] for field in fields if field in obj}
+
+    def _revalidate(self, sync, endpoint, fields, snapshot):
+        """Merge changes into ``snapshot`` and return them, or None when a full fetch is needed."""
+        objects = snapshot["objects"]
+        newest = newest_timestamp(obj.get("last_updated") for obj in objects.values())
+        if newest is None:
+            return None
+
+        changed = [
+            self._project(to_plain(obj), fields)
+            for obj in sync._fetch(endpoint, fields=fields, last_updated__gte=newest)
+        ]
+        for obj in changed:
+            objects[obj["id"]] = obj
+
+        remote_count = endpoint.count()
+        if remote_count != len(objects):
+            logger.info(
+                "Snapshot of %s has %d object(s) but NetBox reports %d, refetching",
+                sync.api_object,
+                len(objects),
+                remote_count,
+            )
+            return None
+
+        remote_newest = self._remote_newest(endpoint)
+        cached_newest = newest_timestamp(obj.get("last_updated") for obj in objects.values())
+        if remote_newest is not None and parse_timestamp(remote_newest) != parse_timestamp(cached_newest):
+            logger.info(
+                "Snapshot of %s is at %s but NetBox has changes up to %s, refetching",
+                sync.api_object,
+                cached_newest,
+                remote_newest,
+            )
+            return None
+
+        logger.info(
+            "Revalidated snapshot of %d %s object(s) with %d change(s)",
+            len(objects),
+            sync.api_object,
+            len(changed),
+        )
+        return changed
+
+    def _remote_newest(self, endpoint):
+        # Only the first page of one object is read.
+        newest = next(iter(endpoint.filter(ordering="-last_updated", limit=1)), None)
+        if newest is None:
+            return None
+        return to_plain(newest).get("last_updated")
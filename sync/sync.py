@@ -1,4 +1,16 @@
+import contextlib
+import functools
+import itertools
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sync.cursor import newest_timestamp
+from sync.fingerprints import fingerprint, key_to_text
+from sync.raw import iter_raw_records
+from sync.records import RecordView, to_plain
 
 
 logger = logging.getLogger(__name__)
@@ -7,6 +19,8 @@ logger = logging.getLogger(__name__)
 class Sync:
 
     api_object = None
+    # NetBox object type ("app_label.model") named in webhook events.
+    object_type = None
     sync_parameters = []
     unique_parameter = []
     global_sync_values = {"tenant": {"slug": "ipamstuttgartip"}}
@@ -27,77 +41,880 @@ class Sync:
         "untagged_vlan": "vid",
         "tags": "slug",
     }
+    # Slave model of each relation field, used by a RelationResolver to
+    # replace nested lookups in write payloads by IDs.
+    relation_endpoints = {
+        "site": "dcim.sites",
+        "role": "dcim.device_roles",
+        "device_type": "dcim.device_types",
+        "rack": "dcim.racks",
+        "location": "dcim.locations",
+        "platform": "dcim.platforms",
+        "cluster": "virtualization.clusters",
+        "tenant": "tenancy.tenants",
+        "device": "dcim.devices",
+        "virtual_machine": "virtualization.virtual_machines",
+        "tags": "extras.tags",
+    }
     scalar_lookup_fields = {
         "status": "value",
         "mode": "value",
         "face": "value",
     }
+    # Fields read by hooks in addition to the synced fields, see fetch_fields().
+    extra_fetch_fields = []
+    # Page size used by raw fetches (NetBox's default MAX_PAGE_SIZE).
+    raw_page_size = 1000
+    # Number of master objects whose unique keys are looked up on the slave per request.
+    lookup_chunk_size = 100
+    # Maximum number of objects sent in one bulk DELETE request.
+    delete_batch_size = 500
+    # Sync subclasses that must complete before this one, see sync.scheduler.
+    depends_on = []
+    # (filter, master model, field) partitioning this type across shards,
+    # e.g. ("site", "dcim.sites", "slug"); None hashes the unique key instead.
+    shard_by = None
+    # --scope keys this type can be filtered by, mapped to its filter names.
+    # None marks a global type that is synced in full under any scope.
+    scope_filters = None
+    # Payload fields that reference objects of the same type. When applying
+    # in parallel or in bulk, plan items setting them are applied in a wave
+    # after the item they reference, so the referenced object exists first.
+    apply_order_fields = []
 
-    def __init__(self, master_conn, slave_conn, mapping_file=None):
+    def __init__(
+        self,
+        master_conn,
+        slave_conn,
+        mapping_file=None,
+        bulk_size=None,
+        apply_workers=None,
+        cursor_store=None,
+        full_sync=False,
+        project_fields=False,
+        stream_batch_size=None,
+        raw_fetch=False,
+        fingerprint_store=None,
+        snapshot_cache=None,
+        relation_resolver=None,
+        prune=False,
+        prune_max=None,
+        prune_max_percent=None,
+        partition=None,
+        journal=None,
+    ):
         self.master_conn = master_conn
         self.slave_conn = slave_conn
         self.mapping_file = mapping_file
+        self.bulk_size = bulk_size
+        self.apply_workers = apply_workers
+        self.cursor_store = cursor_store
+        self.full_sync = full_sync
+        self.project_fields = project_fields
+        self.stream_batch_size = stream_batch_size
+        self.raw_fetch = raw_fetch
+        self.fingerprint_store = fingerprint_store
+        self.snapshot_cache = snapshot_cache
+        self.relation_resolver = relation_resolver
+        self.prune_enabled = prune
+        self.prune_max = prune_max
+        self.prune_max_percent = prune_max_percent
+        self.partition = partition
+        self.journal = journal
+        self._journaling = False
+        self.sync_plan = []
+        self._errors_lock = threading.Lock()
+        self._timings_lock = threading.Lock()
+        self._fingerprints_lock = threading.Lock()
+        self._reset_run_state()
 
     def sync(self):
         logger.info("Starting synchronization process for %s", self.api_object)
+        if self._resume_from_journal():
+            return
+
+        master_endpoint = self._resolve_api_object(self.master_conn)
+        slave_endpoint = self._resolve_api_object(self.slave_conn)
+        self._reset_run_state()
+        if self.stream_batch_size:
+            high_water_mark = self._sync_streaming(master_endpoint, slave_endpoint)
+        else:
+            master_objects, slave_objects = self._fetch_objects(master_endpoint, slave_endpoint)
+            # Streamed plans arrive in batches and are not checkpointed.
+            self._journaling = self.journal is not None
+            try:
+                self._sync_batch(slave_endpoint, master_objects, slave_objects)
+            finally:
+                self._journaling = False
+            high_water_mark = self._max_last_updated(master_objects)
+        self._advance_cursor(high_water_mark)
+        if self.journal is not None:
+            self.journal.finish(self)
+        self._log_completion()
+
+    def _resume_from_journal(self):
+        """Finish this type from the journal of an interrupted run; return True when handled."""
+        if self.journal is None or not self.journal.resume:
+            return False
+        if self.journal.is_complete(self.api_object):
+            logger.info("Skipping %s, it was completed by the interrupted run", self.api_object)
+            self._reset_run_state()
+            return True
+        entries = self.journal.remaining_plan(self)
+        if entries is None:
+            return False
+        entries = self._adopt_interrupted_creates(entries)
+        self._journaling = True
+        try:
+            self.apply_saved_plan(entries)
+        finally:
+            self._journaling = False
+        self.journal.finish(self)
+        return True
 
+    def _adopt_interrupted_creates(self, entries):
+        """Turn saved creates whose object already exists on the slave into updates.
+
+        A create can reach the slave before the crash without being
+        journaled; applying it again would fail or duplicate the object.
+        """
+        creates = [RecordView(entry["master"]) for entry in entries if entry["action"] == "create"]
+        if not creates:
+            return entries
+        slave_endpoint = self._resolve_api_object(self.slave_conn)
+        slave_index = self._build_slave_index(self._fetch_slave_matches(slave_endpoint, creates))
+        adopted = []
+        for entry in entries:
+            slave_obj = None
+            if entry["action"] == "create":
+                slave_obj = slave_index.get(self._build_unique_key(RecordView(entry["master"])))
+            if slave_obj is not None:
+                entry = dict(entry, action="update", slave_id=slave_obj.id)
+            adopted.append(entry)
+        return adopted
+
+    def sync_objects(self, master_ids):
+        """Sync only the given master objects, e.g. those named by webhook events."""
+        logger.info("Synchronizing %d %s object(s) by id", len(master_ids), self.api_object)
         master_endpoint = self._resolve_api_object(self.master_conn)
         slave_endpoint = self._resolve_api_object(self.slave_conn)
-        master_objects = list(master_endpoint.all())
-        slave_objects = list(slave_endpoint.all())
+        self._reset_run_state()
+        with self._timed("fetch"):
+            master_objects = []
+            for start in range(0, len(master_ids), self.lookup_chunk_size):
+                chunk = master_ids[start:start + self.lookup_chunk_size]
+                if self.partition is not None:
+                    # Objects of other shards or outside the scope are left to their owner.
+                    master_objects.extend(self.partition.iter_fetch(self, master_endpoint, id=chunk))
+                else:
+                    master_objects.extend(self._fetch(master_endpoint, id=chunk))
+            slave_objects = self._fetch_slave_matches(slave_endpoint, master_objects)
+        self._sync_batch(slave_endpoint, master_objects, slave_objects)
+        self._log_completion()
+
+    def build_plan(self):
+        """Fetch both sides and build the sync plan without writing to the slave."""
+        logger.info("Building synchronization plan for %s", self.api_object)
+        master_endpoint = self._resolve_api_object(self.master_conn)
+        slave_endpoint = self._resolve_api_object(self.slave_conn)
+        self._reset_run_state()
+        master_objects, slave_objects = self._fetch_objects(master_endpoint, slave_endpoint)
+        self.sync_plan = self._plan_batch(slave_endpoint, master_objects, slave_objects)
+        logger.info("Built sync plan with %d item(s) for %s", len(self.sync_plan), self.api_object)
+        self._log_completion()
+        return self.sync_plan
+
+    def serialize_plan_item(self, plan_item):
+        """Return a JSON-compatible representation of a plan item for plan files."""
+        master_obj = plan_item["master_obj"]
+        slave_obj = plan_item.get("slave_obj")
+        master_snapshot = {}
+        for field in self.fetch_fields():
+            has_value, value = self._try_get_param_value(master_obj, field)
+            if has_value:
+                master_snapshot[field] = to_plain(value)
+        return {
+            "api_object": self.api_object,
+            "action": plan_item["action"],
+            "key": to_plain(list(self._build_unique_key(master_obj))),
+            "master": master_snapshot,
+            "slave_id": getattr(slave_obj, "id", None),
+            "payload": to_plain(plan_item.get("payload")),
+        }
+
+    def apply_saved_plan(self, entries):
+        """Apply plan entries produced by serialize_plan_item, without re-fetching the master."""
+        logger.info("Applying saved plan with %d item(s) for %s", len(entries), self.api_object)
+        slave_endpoint = self._resolve_api_object(self.slave_conn)
+        self._reset_run_state()
+        with self._timed("fetch"):
+            slave_objects = self._fetch_saved_plan_slaves(slave_endpoint, entries)
+
+        sync_plan = []
+        has_post_sync = self._has_post_sync_hook()
+        for entry in entries:
+            if entry["action"] == "noop" and not has_post_sync:
+                # Nothing to write and no hook to run.
+                self.counters["noop"] += 1
+                continue
+            plan_item = {"action": entry["action"], "master_obj": RecordView(entry["master"])}
+            if entry["action"] == "create":
+                plan_item["payload"] = entry["payload"]
+            else:
+                slave_obj = slave_objects.get(entry["slave_id"])
+                if slave_obj is None:
+                    self._record_error(
+                        plan_item["master_obj"],
+                        LookupError(f"Slave object {entry['slave_id']} no longer exists"),
+                        traceback=False,
+                    )
+                    continue
+                plan_item["slave_obj"] = slave_obj
+                if entry["action"] == "update":
+                    plan_item["payload"] = entry["payload"]
+            sync_plan.append(plan_item)
+
+        self._count_plan(sync_plan)
+        self._apply_plan(slave_endpoint, sync_plan)
+        self._log_completion()
+
+    def _fetch_saved_plan_slaves(self, slave_endpoint, entries):
+        """Fetch the slave objects referenced by a saved plan, by id in chunks."""
+        has_post_sync = self._has_post_sync_hook()
+        slave_ids = [
+            entry["slave_id"]
+            for entry in entries
+            if entry["action"] == "update" or (entry["action"] == "noop" and has_post_sync)
+        ]
+        slave_objects = {}
+        for start in range(0, len(slave_ids), self.lookup_chunk_size):
+            for slave_obj in self._fetch(slave_endpoint, id=slave_ids[start:start + self.lookup_chunk_size]):
+                slave_objects[slave_obj.id] = slave_obj
+        return slave_objects
+
+    def _has_post_sync_hook(self):
+        return type(self).post_sync is not Sync.post_sync
+
+    def _materialize(self, endpoint, obj):
+        """Turn a RecordView from a raw fetch into a pynetbox Record that can be saved."""
+        if not isinstance(obj, RecordView):
+            return obj
+        return endpoint.return_obj(dict(obj), endpoint.api, endpoint)
+
+    @contextlib.contextmanager
+    def _timed(self, phase):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._timings_lock:
+                self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+            logger.debug("Phase %s of %s took %.3fs", phase, self.api_object, elapsed)
+
+    def _reset_run_state(self):
+        self._fingerprints = None
+        self._fingerprint_updates = []
+        self._master_hashes = {}
+        self._master_keys = set()
+        self._orphans = None
+        self.errors = []
+        self.timings = {}
+        self.counters = {"create": 0, "update": 0, "noop": 0}
+
+    def _count_plan(self, sync_plan):
+        for plan_item in sync_plan:
+            self.counters[plan_item["action"]] += 1
+
+    def run_summary(self):
+        """Return timings and counters of the last run of this type."""
+        return {
+            "api_object": self.api_object,
+            "timings": dict(self.timings),
+            "counters": dict(self.counters, errors=len(self.errors)),
+        }
+
+    def _log_completion(self):
+        logger.info(
+            "Phase timings for %s: %s",
+            self.api_object,
+            ", ".join(f"{phase}={elapsed:.2f}s" for phase, elapsed in self.timings.items()) or "none",
+        )
+        if self.errors:
+            logger.warning(
+                "Synchronization completed with %d error(s) for %s",
+                len(self.errors),
+                self.api_object,
+            )
+        else:
+            logger.info("Synchronization process completed")
+
+    def _sync_batch(self, slave_endpoint, master_objects, slave_objects):
+        sync_plan = self._plan_batch(slave_endpoint, master_objects, slave_objects)
+        logger.debug("Built sync plan with %d item(s) for %s", len(sync_plan), self.api_object)
+        if self._journaling:
+            self.journal.save_plan(self, sync_plan)
+        self._apply_plan(slave_endpoint, sync_plan)
+
+    def _plan_batch(self, slave_endpoint, master_objects, slave_objects):
+        with self._timed("index"):
+            slave_index = self._build_slave_index(slave_objects)
+        if self._uses_light_slave_fetch():
+            with self._timed("fetch"):
+                self._fetch_slave_details(slave_endpoint, master_objects, slave_index)
+        with self._timed("plan"):
+            sync_plan = self._build_sync_plan(master_objects, slave_index)
+        self._master_hashes = {}
+        self._count_plan(sync_plan)
+        if self._collects_orphans():
+            self._collect_orphans(slave_index)
+        return sync_plan
+
+    def _apply_plan(self, slave_endpoint, sync_plan):
+        with self._timed("apply"):
+            self.pre_apply(sync_plan)
+            self._apply_sync_plan(slave_endpoint, sync_plan)
+        self._store_fingerprints(slave_endpoint)
+
+    def _collects_orphans(self):
+        # Orphans are only known when the complete master and slave sets were compared.
+        return (
+            self.prune_enabled
+            and self.partition is None
+            and not self.stream_batch_size
+            and self._current_cursor() is None
+        )
+
+    def _collect_orphans(self, slave_index):
+        self._orphans = (
+            [slave_obj for key, slave_obj in slave_index.items() if key not in self._master_keys],
+            len(slave_index),
+        )
+        self._master_keys = set()
+        logger.debug(
+            "Found %d orphaned slave object(s) of %d for %s",
+            len(self._orphans[0]),
+            len(slave_index),
+            self.api_object,
+        )
+
+    def prune(self):
+        """Delete slave objects whose unique key no longer exists on the master.
+
+        Only runs after an error-free full sync of this type, and refuses to
+        delete more than ``prune_max`` objects or ``prune_max_percent`` percent
+        of the slave objects. Returns the number of deleted objects.
+        """
+        if self._orphans is None:
+            logger.info("Not pruning %s: orphans are only known after a full sync", self.api_object)
+            return 0
+        if self.errors:
+            logger.warning("Not pruning %s because the run had errors", self.api_object)
+            return 0
+
+        orphans, slave_count = self._orphans
+        self._orphans = None
+        self.counters["delete"] = 0
+        if not orphans:
+            return 0
+        percent = 100.0 * len(orphans) / slave_count
+        if (self.prune_max is not None and len(orphans) > self.prune_max) or (
+            self.prune_max_percent is not None and percent > self.prune_max_percent
+        ):
+            message = (
+                f"Refusing to prune {len(orphans)} of {slave_count} object(s) ({percent:.1f}%), "
+                f"limits are {self.prune_max} object(s) and {self.prune_max_percent}%"
+            )
+            logger.error("%s: %s", self.api_object, message)
+            with self._errors_lock:
+                self.errors.append({"object": self.api_object, "error": message})
+            return 0
+
+        logger.info("Pruning %d orphaned %s object(s) from the slave", len(orphans), self.api_object)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Orphaned %s objects: %s", self.api_object, ", ".join(map(self._display, orphans)))
+        slave_endpoint = self._resolve_api_object(self.slave_conn)
+        with self._timed("prune"):
+            for start in range(0, len(orphans), self.delete_batch_size):
+                batch = orphans[start:start + self.delete_batch_size]
+                try:
+                    self.counters["delete"] += self._bulk_delete(slave_endpoint, [obj.id for obj in batch])
+                except Exception as exc:
+                    logger.exception("Failed to prune %d %s object(s)", len(batch), self.api_object)
+                    with self._errors_lock:
+                        self.errors.append({"object": self.api_object, "error": str(exc)})
+        return self.counters["delete"]
+
+    def _uses_light_slave_fetch(self):
+        return self.fingerprint_store is not None and (self.project_fields or self.raw_fetch)
+
+    def _slave_fetch_fields(self):
+        if not self._uses_light_slave_fetch():
+            return None
+        # Noops keep the light object, so it carries what hooks read as well.
+        return list(dict.fromkeys(["id", "last_updated", *self.unique_parameter, *self.extra_fetch_fields]))
+
+    def _get_fingerprints(self):
+        if self._fingerprints is None:
+            self._fingerprints = self.fingerprint_store.load(self.api_object)
+        return self._fingerprints
+
+    def _master_fingerprint(self, master_obj):
+        # Cached per plan batch: both the detail fetch and the plan builder need it.
+        master_hash = self._master_hashes.get(id(master_obj))
+        if master_hash is None:
+            master_hash = fingerprint(self.create_payload(master_obj))
+            self._master_hashes[id(master_obj)] = master_hash
+        return master_hash
+
+    def _fingerprint_matches(self, key, master_hash, slave_obj):
+        stored = self._get_fingerprints().get(key_to_text(key))
+        return stored == (master_hash, getattr(slave_obj, "last_updated", None))
+
+    def _fetch_slave_details(self, slave_endpoint, master_objects, slave_index):
+        """Replace light slave objects by full ones, except where fingerprints match."""
+        changed_ids = []
+        for master_obj in master_objects:
+            try:
+                key = self._build_unique_key(master_obj)
+                slave_obj = slave_index.get(key)
+                if slave_obj is None:
+                    continue
+                if not self._fingerprint_matches(key, self._master_fingerprint(master_obj), slave_obj):
+                    changed_ids.append(slave_obj.id)
+            except Exception as exc:
+                # Left light here; _build_sync_plan records the error for this object.
+                logger.debug("Cannot fingerprint %s: %s", self._display(master_obj), exc)
+
+        detailed = {}
+        for start in range(0, len(changed_ids), self.lookup_chunk_size):
+            for slave_obj in self._fetch(slave_endpoint, id=changed_ids[start:start + self.lookup_chunk_size]):
+                detailed[slave_obj.id] = slave_obj
+        for key, slave_obj in slave_index.items():
+            if slave_obj.id in detailed:
+                slave_index[key] = detailed[slave_obj.id]
+        logger.debug(
+            "Fetched full detail for %d of %d slave object(s) of %s",
+            len(detailed),
+            len(slave_index),
+            self.api_object,
+        )
+
+    def _remember_fingerprint(self, plan_item, new_obj):
+        if "fingerprint" not in plan_item:
+            return
+        key, master_hash = plan_item["fingerprint"]
+        # save() does not refresh last_updated and post hooks may write the
+        # object again, so written objects are re-read when storing.
+        refresh_id = getattr(new_obj, "id", None) if plan_item["action"] != "noop" else None
+        with self._fingerprints_lock:
+            self._fingerprint_updates.append(
+                (key_to_text(key), master_hash, getattr(new_obj, "last_updated", None), refresh_id)
+            )
+
+    def _store_fingerprints(self, slave_endpoint):
+        if self.fingerprint_store is None:
+            return
+        with self._fingerprints_lock:
+            updates, self._fingerprint_updates = self._fingerprint_updates, []
+        refresh_ids = [refresh_id for *_, refresh_id in updates if refresh_id is not None]
+        current = {}
+        for start in range(0, len(refresh_ids), self.lookup_chunk_size):
+            chunk = refresh_ids[start:start + self.lookup_chunk_size]
+            for slave_obj in self._iter_fetch(slave_endpoint, fields=["id", "last_updated"], id=chunk):
+                current[slave_obj.id] = getattr(slave_obj, "last_updated", None)
+        self.fingerprint_store.record_many(
+            self.api_object,
+            [
+                (key, master_hash, current.get(refresh_id, last_updated))
+                for key, master_hash, last_updated, refresh_id in updates
+            ],
+        )
+
+    def _sync_streaming(self, master_endpoint, slave_endpoint):
+        """Sync master pages as they arrive, looking up only their slave counterparts.
+
+        A background thread keeps fetching the next master batch while the
+        current one is planned and applied, so at most two batches are held.
+        """
+        high_water_mark = None
+        batches = self._prefetch_batches(self._iter_master_objects(master_endpoint))
+        for batch_number, master_objects in enumerate(batches, start=1):
+            with self._timed("fetch"):
+                slave_objects = self._fetch_slave_matches(slave_endpoint, master_objects)
+            logger.debug(
+                "Streaming batch %d of %s: %d master object(s), %d slave object(s)",
+                batch_number,
+                self.api_object,
+                len(master_objects),
+                len(slave_objects),
+            )
+            self._sync_batch(slave_endpoint, master_objects, slave_objects)
+            high_water_mark = newest_timestamp((high_water_mark, self._max_last_updated(master_objects)))
+        return high_water_mark
+
+    def _prefetch_batches(self, iterator):
+        batches = queue.Queue(maxsize=1)
+        done = object()
+
+        def produce():
+            try:
+                for batch in iter(lambda: list(itertools.islice(iterator, self.stream_batch_size)), []):
+                    batches.put(batch)
+            except Exception as exc:
+                batches.put(exc)
+            finally:
+                batches.put(done)
+
+        producer = threading.Thread(target=produce, name=f"fetch-{self.api_object}", daemon=True)
+        producer.start()
+        while True:
+            batch = batches.get()
+            if batch is done:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+        producer.join()
+
+    def _current_cursor(self):
+        if self.cursor_store is None or self.full_sync:
+            return None
+        return self.cursor_store.get(self.api_object)
+
+    def _iter_master_objects(self, master_endpoint):
+        filters = {}
+        cursor = self._current_cursor()
+        if cursor is not None:
+            logger.info("Incremental sync of %s for objects updated since %s", self.api_object, cursor)
+            filters["last_updated__gte"] = cursor
+        if self.partition is not None:
+            return self.partition.iter_fetch(self, master_endpoint, **filters)
+        return self._iter_fetch(master_endpoint, **filters)
+
+    def _fetch_objects(self, master_endpoint, slave_endpoint):
+        with self._timed("fetch"):
+            if self._current_cursor() is not None or self.partition is not None:
+                master_objects = list(self._iter_master_objects(master_endpoint))
+                slave_objects = self._fetch_slave_matches(slave_endpoint, master_objects)
+            elif self.snapshot_cache is not None:
+                master_objects = self.snapshot_cache.fetch(self, master_endpoint)
+                slave_objects = self.snapshot_cache.fetch(self, slave_endpoint, fields=self._slave_fetch_fields())
+            else:
+                master_objects = list(self._iter_master_objects(master_endpoint))
+                slave_objects = self._fetch(slave_endpoint, fields=self._slave_fetch_fields())
         logger.debug(
             "Fetched %d master object(s) and %d slave object(s) for %s",
             len(master_objects),
             len(slave_objects),
             self.api_object,
         )
+        return master_objects, slave_objects
 
-        self.errors = []
-        slave_index = self._build_slave_index(slave_objects)
-        sync_plan = self._build_sync_plan(master_objects, slave_index)
-        logger.debug("Built sync plan with %d item(s) for %s", len(sync_plan), self.api_object)
+    def _fetch(self, endpoint, **filters):
+        return list(self._iter_fetch(endpoint, **filters))
+
+    def _iter_fetch(self, endpoint, fields=None, **filters):
+        fields = fields or self.fetch_fields()
+        if self.project_fields:
+            filters["fields"] = ",".join(fields)
+        if self.raw_fetch:
+            return iter_raw_records(endpoint, keep_fields=fields, page_size=self.raw_page_size, **filters)
+        if not filters:
+            return iter(endpoint.all())
+        return iter(endpoint.filter(**filters))
+
+    @classmethod
+    def fetch_fields(cls):
+        """Return the fields this type reads from fetched objects."""
+        fields = ["id", "display", "last_updated"]
+        fields.extend(cls.unique_parameter)
+        fields.extend(cls.sync_parameters)
+        fields.extend(cls.global_sync_values)
+        fields.extend(cls.extra_fetch_fields)
+        return list(dict.fromkeys(fields))
+
+    def _fetch_slave_matches(self, slave_endpoint, master_objects):
+        """Fetch the slave objects sharing a unique key with the given master objects.
+
+        Unique values are batched into list filters, so the result can be a
+        superset; the slave index keeps only exact key matches.
+        """
+        slave_objects = []
+        for filters in self._slave_match_filters(master_objects):
+            slave_objects.extend(self._fetch(slave_endpoint, fields=self._slave_fetch_fields(), **filters))
+        logger.debug(
+            "Fetched %d slave object(s) matching %d master object(s) for %s",
+            len(slave_objects),
+            len(master_objects),
+            self.api_object,
+        )
+        return slave_objects
+
+    def _slave_match_filters(self, master_objects):
+        """Yield list filters matching the unique keys of master objects, one per lookup chunk."""
+        for start in range(0, len(master_objects), self.lookup_chunk_size):
+            filters = {}
+            for master_obj in master_objects[start:start + self.lookup_chunk_size]:
+                try:
+                    filter_params = self._build_filter_params(master_obj)
+                except Exception as exc:
+                    logger.debug("Cannot build slave lookup for %s: %s", self._display(master_obj), exc)
+                    continue
+                for param, value in filter_params.items():
+                    if value is not None:
+                        filters.setdefault(param, set()).add(value)
+            if filters:
+                yield {param: sorted(values, key=str) for param, values in filters.items()}
+
+    def _max_last_updated(self, master_objects):
+        return newest_timestamp(getattr(obj, "last_updated", None) for obj in master_objects)
 
+    def _advance_cursor(self, high_water_mark):
+        if self.cursor_store is None:
+            return
+        if self.errors:
+            logger.warning(
+                "Not advancing sync cursor for %s because the run had errors", self.api_object
+            )
+            return
+
+        if high_water_mark:
+            self.cursor_store.set(self.api_object, high_water_mark)
+
+    def _apply_sync_plan(self, slave_endpoint, sync_plan):
+        waves = [sync_plan]
+        if self._uses_bulk_apply() or self._uses_concurrent_apply():
+            waves = self._split_plan_waves(sync_plan)
+
+        for wave in waves:
+            if self._uses_bulk_apply():
+                tasks = self._build_bulk_apply_tasks(slave_endpoint, wave)
+            else:
+                tasks = self._build_apply_tasks(slave_endpoint, wave)
+            self._run_apply_tasks(tasks)
+
+    def _uses_bulk_apply(self):
+        return bool(self.bulk_size and self.bulk_size > 1)
+
+    def _uses_concurrent_apply(self):
+        return bool(self.apply_workers and self.apply_workers > 1)
+
+    def _split_plan_waves(self, sync_plan):
+        """Split the plan into waves by depth of same-type references.
+
+        Items referencing another item of the plan run one wave after it, so
+        chains like eth0 <- eth0.1 <- eth0.1.100 are applied level by level.
+        Items referencing objects outside the plan run in the second wave.
+        """
+        if not self.apply_order_fields:
+            return [sync_plan]
+
+        items_by_id = {}
+        for plan_item in sync_plan:
+            master_id = self._referenced_id(plan_item.get("master_obj"))
+            if master_id is not None:
+                items_by_id[master_id] = plan_item
+
+        depths = {}
+
+        def depth(plan_item, visiting):
+            if id(plan_item) in depths:
+                return depths[id(plan_item)]
+            payload = plan_item.get("payload") or {}
+            result = 0
+            for field in self.apply_order_fields:
+                if payload.get(field) is None:
+                    continue
+                _, reference = self._try_get_param_value(plan_item.get("master_obj"), field)
+                parent = items_by_id.get(self._referenced_id(reference))
+                if parent is None or parent is plan_item or id(parent) in visiting:
+                    result = max(result, 1)
+                else:
+                    result = max(result, depth(parent, visiting | {id(plan_item)}) + 1)
+            depths[id(plan_item)] = result
+            return result
+
+        waves = []
+        for plan_item in sync_plan:
+            level = depth(plan_item, frozenset())
+            while len(waves) <= level:
+                waves.append([])
+            waves[level].append(plan_item)
+        logger.debug(
+            "Split %s plan into waves of %s item(s) on fields %s",
+            self.api_object,
+            [len(wave) for wave in waves],
+            self.apply_order_fields,
+        )
+        return [wave for wave in waves if wave]
+
+    def _referenced_id(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        _, referenced_id = self._try_get_param_value(value, "id")
+        return referenced_id
+
+    def _build_apply_tasks(self, slave_endpoint, sync_plan):
+        tasks = []
         for idx, plan_item in enumerate(sync_plan, start=1):
+            tasks.append(
+                functools.partial(
+                    self._apply_and_post_sync, slave_endpoint, plan_item, idx, len(sync_plan)
+                )
+            )
+        return tasks
+
+    def _build_bulk_apply_tasks(self, slave_endpoint, sync_plan):
+        grouped = {"create": [], "update": [], "noop": []}
+        for plan_item in sync_plan:
+            grouped[plan_item["action"]].append(plan_item)
+        logger.debug(
+            "Applying %s plan in bulk (batch size %d): %d create(s), %d update(s), %d noop(s)",
+            self.api_object,
+            self.bulk_size,
+            len(grouped["create"]),
+            len(grouped["update"]),
+            len(grouped["noop"]),
+        )
+
+        tasks = []
+        for action in ("create", "update"):
+            items = grouped[action]
+            for start in range(0, len(items), self.bulk_size):
+                batch = items[start:start + self.bulk_size]
+                tasks.append(functools.partial(self._apply_plan_batch, slave_endpoint, action, batch))
+        for plan_item in grouped["noop"]:
+            tasks.append(functools.partial(self._apply_and_post_sync, slave_endpoint, plan_item))
+        return tasks
+
+    def _run_apply_tasks(self, tasks):
+        if not self._uses_concurrent_apply() or len(tasks) < 2:
+            for task in tasks:
+                task()
+            return
+
+        logger.debug(
+            "Running %d apply task(s) for %s on %d worker(s)",
+            len(tasks),
+            self.api_object,
+            self.apply_workers,
+        )
+        with ThreadPoolExecutor(
+            max_workers=self.apply_workers,
+            thread_name_prefix=f"apply-{self.api_object}",
+        ) as executor:
+            for future in [executor.submit(task) for task in tasks]:
+                future.result()
+
+    def _apply_plan_batch(self, slave_endpoint, action, batch):
+        try:
+            if action == "create":
+                results = slave_endpoint.create([self._write_payload(item["payload"]) for item in batch])
+            else:
+                results = slave_endpoint.update(
+                    [dict(self._write_payload(item["payload"]), id=item["slave_obj"].id) for item in batch]
+                )
+        except Exception as exc:
+            logger.warning(
+                "Bulk %s of %d %s object(s) failed, falling back to per-item apply: %s",
+                action,
+                len(batch),
+                self.api_object,
+                exc,
+            )
+            for plan_item in batch:
+                self._apply_and_post_sync(slave_endpoint, plan_item)
+            return
+
+        logger.debug("Bulk %s of %d %s object(s) succeeded", action, len(batch), self.api_object)
+        for plan_item, result in zip(batch, results):
             master_obj = plan_item["master_obj"]
+            self._register_relation(result)
             try:
-                logger.debug(
-                    "Applying plan item %d/%d for %s: action=%s, object=%s",
-                    idx,
-                    len(sync_plan),
-                    self.api_object,
-                    plan_item["action"],
-                    getattr(master_obj, "display", repr(master_obj)),
-                )
-                new_obj = self._apply_plan_item(slave_endpoint, plan_item)
-                if new_obj:
-                    self.post_sync(master_obj, new_obj)
+                with self._timed("post_hooks"):
+                    new_obj = result
+                    if action == "create":
+                        new_obj = self.post_create(master_obj, result)
+                    if new_obj:
+                        self.post_sync(master_obj, new_obj)
+                self._remember_fingerprint(plan_item, result)
+                self._journal_applied(plan_item)
             except Exception as exc:
-                identifier = getattr(master_obj, "display", repr(master_obj))
-                logger.exception(
-                    "Failed to sync %s object %s", self.api_object, identifier
-                )
-                self.errors.append({"object": identifier, "error": str(exc)})
+                self._record_error(master_obj, exc)
 
-        if self.errors:
-            logger.warning(
-                "Synchronization completed with %d error(s) for %s",
-                len(self.errors),
+    def _apply_and_post_sync(self, slave_endpoint, plan_item, idx=None, total=None):
+        master_obj = plan_item["master_obj"]
+        if idx is not None:
+            logger.debug(
+                "Applying plan item %d/%d for %s: action=%s, object=%s",
+                idx,
+                total,
                 self.api_object,
+                plan_item["action"],
+                self._display(master_obj),
             )
+        try:
+            new_obj = self._apply_plan_item(slave_endpoint, plan_item)
+            if new_obj:
+                with self._timed("post_hooks"):
+                    self.post_sync(master_obj, new_obj)
+            self._remember_fingerprint(plan_item, new_obj)
+            self._journal_applied(plan_item)
+        except Exception as exc:
+            self._record_error(master_obj, exc)
+
+    def _journal_applied(self, plan_item):
+        if self._journaling:
+            self.journal.mark_applied(self.api_object, self._build_unique_key(plan_item["master_obj"]))
+
+    def _record_error(self, master_obj, exc, traceback=True):
+        identifier = self._display(master_obj)
+        if traceback:
+            logger.exception("Failed to sync %s object %s", self.api_object, identifier)
         else:
-            logger.info("Synchronization process completed")
+            logger.error("Failed to sync %s object %s: %s", self.api_object, identifier, exc)
+        with self._errors_lock:
+            self.errors.append({"object": identifier, "error": str(exc)})
+
+    def _write_payload(self, payload):
+        """Return the payload to send, with nested lookups resolved to slave IDs where known."""
+        if self.relation_resolver is None:
+            return payload
+        return self.relation_resolver.resolve_payload(self.relation_endpoints, payload)
+
+    def _register_relation(self, obj):
+        if self.relation_resolver is not None and obj is not None:
+            self.relation_resolver.register(self.api_object, obj)
+
+    def _bulk_delete(self, endpoint, objects):
+        """Delete objects through the bulk DELETE endpoint in batches."""
+        objects = list(objects)
+        for start in range(0, len(objects), self.delete_batch_size):
+            batch = objects[start:start + self.delete_batch_size]
+            endpoint.delete(batch)
+            logger.debug("Bulk deleted %d object(s) via %s", len(batch), getattr(endpoint, "url", endpoint))
+        return len(objects)
+
+    def _display(self, obj):
+        return getattr(obj, "display", repr(obj))
 
     def _resolve_api_object(self, connection):
+        obj = self._resolve_path(connection, self.api_object)
+        logger.debug("Resolved API object %s", self.api_object)
+        return obj
+
+    @staticmethod
+    def _resolve_path(connection, api_object):
         obj = connection
-        for part in self.api_object.split("."):
+        for part in api_object.split("."):
             obj = getattr(obj, part.replace("-", "_"))
-        logger.debug("Resolved API object %s", self.api_object)
         return obj
 
     def _build_filter_params(self, master_obj):
         filter_params = {}
-        for param in self.unique_parameter:
-            unique_value = self._normalize_value(param, getattr(master_obj, param))
+        for param, normalize in self._unique_normalizers:
+            unique_value = normalize(getattr(master_obj, param))
             if isinstance(unique_value, dict):
                 filter_params[param] = next(iter(unique_value.values()))
             else:
@@ -105,18 +922,13 @@ class Sync:
         return filter_params
 
     def _make_hashable(self, value):
-        if isinstance(value, dict):
-            return tuple(sorted((k, self._make_hashable(v)) for k, v in value.items()))
-        if isinstance(value, list):
-            return tuple(self._make_hashable(item) for item in value)
-        return value
+        return _make_hashable(value)
 
     def _build_unique_key(self, obj):
-        key_values = []
-        for param in self.unique_parameter:
-            value = self._normalize_value(param, getattr(obj, param))
-            key_values.append(self._make_hashable(value))
-        return tuple(key_values)
+        return tuple(
+            _make_hashable(normalize(getattr(obj, param)))
+            for param, normalize in self._unique_normalizers
+        )
 
     def _build_slave_index(self, slave_objects):
         index = {}
@@ -129,21 +941,34 @@ class Sync:
 
     def _build_sync_plan(self, master_objects, slave_index):
         sync_plan = []
+        debug = logger.isEnabledFor(logging.DEBUG)
         for master_obj in master_objects:
             try:
                 key = self._build_unique_key(master_obj)
+                if self.prune_enabled:
+                    self._master_keys.add(key)
                 slave_obj = slave_index.get(key)
+                fingerprint_item = {}
+                if self.fingerprint_store is not None:
+                    master_hash = self._master_fingerprint(master_obj)
+                    fingerprint_item["fingerprint"] = (key, master_hash)
+                    if slave_obj is not None and self._fingerprint_matches(key, master_hash, slave_obj):
+                        sync_plan.append(
+                            {"action": "noop", "master_obj": master_obj, "slave_obj": slave_obj}
+                        )
+                        continue
                 if slave_obj is None:
                     logger.info("Object does not exist in slave, creating: %s", getattr(master_obj, "display", repr(master_obj)))
                     payload = self.pre_sync(master_obj, self.create_payload(master_obj))
                     sync_plan.append(
-                        {"action": "create", "master_obj": master_obj, "payload": payload}
-                    )
-                    logger.debug(
-                        "Prepared create action for %s with payload keys: %s",
-                        getattr(master_obj, "display", repr(master_obj)),
-                        sorted(payload.keys()),
+                        {"action": "create", "master_obj": master_obj, "payload": payload, **fingerprint_item}
                     )
+                    if debug:
+                        logger.debug(
+                            "Prepared create action for %s with payload keys: %s",
+                            getattr(master_obj, "display", repr(master_obj)),
+                            sorted(payload.keys()),
+                        )
                     continue
 
                 diff = self.get_differences(master_obj, slave_obj)
@@ -155,73 +980,76 @@ class Sync:
                             "master_obj": master_obj,
                             "slave_obj": slave_obj,
                             "payload": diff,
+                            **fingerprint_item,
                         }
                     )
-                    logger.debug(
-                        "Prepared update action for %s with changed fields: %s",
-                        getattr(master_obj, "display", repr(master_obj)),
-                        sorted(diff.keys()),
-                    )
+                    if debug:
+                        logger.debug(
+                            "Prepared update action for %s with changed fields: %s",
+                            getattr(master_obj, "display", repr(master_obj)),
+                            sorted(diff.keys()),
+                        )
                 else:
                     sync_plan.append(
-                        {"action": "noop", "master_obj": master_obj, "slave_obj": slave_obj}
-                    )
-                    logger.debug(
-                        "Prepared noop action for %s",
-                        getattr(master_obj, "display", repr(master_obj)),
+                        {"action": "noop", "master_obj": master_obj, "slave_obj": slave_obj, **fingerprint_item}
                     )
+                    if debug:
+                        logger.debug(
+                            "Prepared noop action for %s",
+                            getattr(master_obj, "display", repr(master_obj)),
+                        )
             except Exception as exc:
                 identifier = getattr(master_obj, "display", repr(master_obj))
                 logger.exception(
                     "Failed to prepare %s sync plan for object %s", self.api_object, identifier
                 )
-                self.errors.append({"object": identifier, "error": str(exc)})
+                with self._errors_lock:
+                    self.errors.append({"object": identifier, "error": str(exc)})
         return sync_plan
 
     def _apply_plan_item(self, slave_endpoint, plan_item):
         action = plan_item["action"]
         if action == "create":
             logger.debug("Creating object on slave for %s", getattr(plan_item["master_obj"], "display", repr(plan_item["master_obj"])))
-            new_obj = slave_endpoint.create(plan_item["payload"])
-            return self.post_create(plan_item["master_obj"], new_obj)
+            new_obj = slave_endpoint.create(self._write_payload(plan_item["payload"]))
+            self._register_relation(new_obj)
+            with self._timed("post_hooks"):
+                return self.post_create(plan_item["master_obj"], new_obj)
 
         slave_obj = plan_item["slave_obj"]
+        if action == "update" or self._has_post_sync_hook():
+            slave_obj = self._materialize(slave_endpoint, slave_obj)
         if action == "update":
             logger.debug(
                 "Updating slave object %s with fields: %s",
                 getattr(slave_obj, "display", repr(slave_obj)),
                 sorted(plan_item["payload"].keys()),
             )
-            for key, value in plan_item["payload"].items():
+            for key, value in self._write_payload(plan_item["payload"]).items():
                 setattr(slave_obj, key, value)
             slave_obj.save()
+            self._register_relation(slave_obj)
         if action == "noop":
             logger.debug("No changes required for %s", getattr(slave_obj, "display", repr(slave_obj)))
         return slave_obj
 
     def create_payload(self, obj):
         """Create payload from master object for synchronization."""
-        payload = {}
-        for param in self.sync_parameters:
-            value = getattr(obj, param)
-            payload[param] = self._normalize_value(param, value)
-
-        for key, val in self.global_sync_values.items():
-            payload[key] = val
-        logger.debug(
-            "Created payload for %s with fields: %s",
-            getattr(obj, "display", repr(obj)),
-            sorted(payload.keys()),
-        )
+        payload = {param: normalize(getattr(obj, param)) for param, normalize in self._sync_normalizers}
+        payload.update(self.global_sync_values)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Created payload for %s with fields: %s",
+                getattr(obj, "display", repr(obj)),
+                sorted(payload.keys()),
+            )
         return payload
 
     def get_differences(self, master_obj, slave_obj):
         diff = {}
-        for param in self.sync_parameters:
-            master_value = getattr(master_obj, param)
-            slave_value = getattr(slave_obj, param)
-            master_val = self._normalize_value(param, master_value)
-            slave_val = self._normalize_value(param, slave_value)
+        for param, normalize in self._sync_normalizers:
+            master_val = normalize(getattr(master_obj, param))
+            slave_val = normalize(getattr(slave_obj, param))
             if master_val != slave_val:
                 logger.info(
                     "Difference found in %s: Master(%s) != Slave(%s)",
@@ -231,11 +1059,11 @@ class Sync:
                 )
                 diff[param] = master_val
 
-        for key, val in self.global_sync_values.items():
+        for key, val, normalize in self._global_normalizers:
             has_value, slave_val = self._try_get_param_value(slave_obj, key)
             if not has_value:
                 continue
-            slave_val_dict = self._normalize_value(key, slave_val)
+            slave_val_dict = normalize(slave_val)
             if val != slave_val_dict:
                 logger.info(
                     "Global difference found in %s: Master(%s) != Slave(%s)",
@@ -247,11 +1075,12 @@ class Sync:
 
         if len(diff) == 0:
             return False
-        logger.debug(
-            "Calculated diff for %s with changed fields: %s",
-            getattr(master_obj, "display", repr(master_obj)),
-            sorted(diff.keys()),
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Calculated diff for %s with changed fields: %s",
+                getattr(master_obj, "display", repr(master_obj)),
+                sorted(diff.keys()),
+            )
         return diff
 
     def _try_get_param_value(self, obj, param):
@@ -283,54 +1112,51 @@ class Sync:
             return False, None
 
     def _extract_lookup_value(self, value, lookup_field):
-        if value is None:
-            return None
-
-        if isinstance(value, dict):
-            return value.get(lookup_field)
-
-        try:
-            return value[lookup_field]
-        except (TypeError, KeyError, IndexError):
-            pass
-
-        try:
-            return getattr(value, lookup_field)
-        except AttributeError:
-            return value
+        return _extract_lookup_value(value, lookup_field)
 
     def _normalize_value(self, param, value):
-        if isinstance(value, list):
-            normalized_items = [self._normalize_value(param, item) for item in value]
-            if param in self.relation_lookup_fields:
-                normalized_items = [item for item in normalized_items if item is not None]
-            return normalized_items
-
-        if param in self.relation_lookup_fields:
-            lookup_field = self.relation_lookup_fields[param]
-            lookup_value = self._extract_lookup_value(value, lookup_field)
-            if self._is_invalid_lookup_value(lookup_value):
-                return None
-            return {lookup_field: lookup_value}
+        return self._field_normalizer(param)(value)
 
-        if param in self.scalar_lookup_fields:
-            lookup_field = self.scalar_lookup_fields[param]
-            return self._extract_lookup_value(value, lookup_field)
+    def _is_invalid_lookup_value(self, value):
+        return _is_invalid_lookup_value(value)
 
-        return value
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compile_normalizers()
 
-    def _is_invalid_lookup_value(self, value):
-        if value is None:
-            return True
-        if isinstance(value, str):
-            lowered = value.strip().lower()
-            return lowered in {"", "none", "null", "undefined", "nan"}
-        return False
+    @classmethod
+    def _compile_normalizers(cls):
+        """Precompile per-field normalizers for the sync, unique and global fields."""
+        cls._normalizers = {}
+        cls._sync_normalizers = tuple(
+            (param, cls._field_normalizer(param)) for param in cls.sync_parameters
+        )
+        cls._unique_normalizers = tuple(
+            (param, cls._field_normalizer(param)) for param in cls.unique_parameter
+        )
+        cls._global_normalizers = tuple(
+            (key, val, cls._field_normalizer(key)) for key, val in cls.global_sync_values.items()
+        )
+
+    @classmethod
+    def _field_normalizer(cls, param):
+        normalizer = cls._normalizers.get(param)
+        if normalizer is None:
+            normalizer = _build_normalizer(
+                cls.relation_lookup_fields.get(param),
+                cls.scalar_lookup_fields.get(param),
+            )
+            cls._normalizers[param] = normalizer
+        return normalizer
 
     def pre_sync(self, oldobj, newobj):
         # Placeholder for pre-sync processing
         return newobj
 
+    def pre_apply(self, sync_plan):
+        # Placeholder for run-scoped preparation before the plan is applied
+        pass
+
     def post_sync(self, oldobj, newobj):
         # Placeholder for post-sync processing
         return newobj
@@ -338,3 +1164,72 @@ class Sync:
     def post_create(self, oldobj, newobj):
         # Placeholder for post-create processing
         return newobj
+
+
+_INVALID_LOOKUP_VALUES = frozenset({"", "none", "null", "undefined", "nan"})
+
+
+def _extract_lookup_value(value, lookup_field):
+    if value is None:
+        return None
+
+    if isinstance(value, dict):
+        return value.get(lookup_field)
+
+    try:
+        return value[lookup_field]
+    except (TypeError, KeyError, IndexError):
+        pass
+
+    try:
+        return getattr(value, lookup_field)
+    except AttributeError:
+        return value
+
+
+def _is_invalid_lookup_value(value):
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in _INVALID_LOOKUP_VALUES
+    return False
+
+
+def _make_hashable(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _make_hashable(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(_make_hashable(item) for item in value)
+    return value
+
+
+def _build_normalizer(relation_field, scalar_field):
+    """Return a callable normalizing one field value.
+
+    Relation fields become ``{lookup_field: value}`` (or None for invalid
+    lookups), scalar lookup fields are reduced to their lookup value and
+    other fields are passed through. Lists are normalized item by item and
+    invalid relation items are dropped.
+    """
+    if relation_field is not None:
+        def normalize(value):
+            if isinstance(value, list):
+                return [item for item in map(normalize, value) if item is not None]
+            lookup_value = _extract_lookup_value(value, relation_field)
+            if _is_invalid_lookup_value(lookup_value):
+                return None
+            return {relation_field: lookup_value}
+    elif scalar_field is not None:
+        def normalize(value):
+            if isinstance(value, list):
+                return [normalize(item) for item in value]
+            return _extract_lookup_value(value, scalar_field)
+    else:
+        def normalize(value):
+            if isinstance(value, list):
+                return [normalize(item) for item in value]
+            return value
+    return normalize
+
+
+Sync._compile_normalizers()
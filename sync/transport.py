@@ -0,0 +1,105 @@
+import logging
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from sync.ratelimit import parse_retry_after
+
+
+logger = logging.getLogger(__name__)
+
+# Methods retried on 429/5xx responses and read errors. POST and PATCH are
+# only retried when the connection could not be established.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter applying a default timeout to requests that do not set one."""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class AdaptiveHTTPAdapter(TimeoutHTTPAdapter):
+    """TimeoutHTTPAdapter sending every request through an AdaptiveLimiter."""
+
+    def __init__(self, *args, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        started = time.monotonic()
+        response = None
+        try:
+            response = super().send(request, **kwargs)
+            return response
+        finally:
+            if response is None:
+                self.limiter.release(latency=time.monotonic() - started)
+            else:
+                self.limiter.release(**_response_signals(response))
+
+
+def _response_signals(response):
+    retries = getattr(response.raw, "retries", None)
+    history = getattr(retries, "history", None) or ()
+    return {
+        "status": response.status_code,
+        "latency": response.elapsed.total_seconds(),
+        "retry_after": parse_retry_after(response.headers.get("Retry-After")),
+        "retried_statuses": [attempt.status for attempt in history if attempt.status is not None],
+    }
+
+
+def build_retry(retries, backoff_factor):
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def build_http_session(pool_size=10, retries=3, backoff_factor=0.5, timeout=60, limiter=None):
+    """Build a requests session with a sized connection pool, retries and timeouts.
+
+    The session is meant to be shared by the master and slave pynetbox
+    clients (``api.http_session``); connections are pooled per host. With
+    a ``limiter`` (see sync.ratelimit) every request waits for its limits.
+    """
+    session = requests.Session()
+    adapter_kwargs = {
+        "pool_connections": pool_size,
+        "pool_maxsize": pool_size,
+        "max_retries": build_retry(retries, backoff_factor),
+        "timeout": timeout,
+    }
+    if limiter is not None:
+        adapter = AdaptiveHTTPAdapter(limiter=limiter, **adapter_kwargs)
+    else:
+        adapter = TimeoutHTTPAdapter(**adapter_kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    logger.debug(
+        "Built HTTP session (pool size %d, %d retries, backoff %.2fs, timeout %ss)",
+        pool_size,
+        retries,
+        backoff_factor,
+        timeout,
+    )
+    return session
@@ -1,9 +1,11 @@
 from sync.sync import Sync
+from sync.virtual_machines import VirtualMachines
 
 
 class VirtualInterfaces(Sync):
 
     api_object = "virtualization.interfaces"
+    object_type = "virtualization.vminterface"
     sync_parameters = [
         "name",
         "virtual_machine",
@@ -15,4 +17,7 @@ class VirtualInterfaces(Sync):
         "description",
     ]
     unique_parameter = ["name", "virtual_machine"]
+    depends_on = [VirtualMachines]
+    shard_by = ("cluster", "virtualization.clusters", "name")
+    scope_filters = {"cluster": "cluster"}
     global_sync_values = {}
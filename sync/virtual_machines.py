@@ -1,9 +1,11 @@
+from sync.clusters import Clusters
 from sync.sync import Sync
 
 
 class VirtualMachines(Sync):
 
     api_object = "virtualization.virtual_machines"
+    object_type = "virtualization.virtualmachine"
     sync_parameters = [
         "name",
         "cluster",
@@ -17,3 +19,6 @@ class VirtualMachines(Sync):
         "description",
     ]
     unique_parameter = ["name", "cluster"]
+    depends_on = [Clusters]
+    shard_by = ("cluster", "virtualization.clusters", "name")
+    scope_filters = {"site": "site", "tenant": "tenant", "cluster": "cluster"}
@@ -0,0 +1,188 @@
+import asyncio
+from types import SimpleNamespace
+
+from sync.aio import AsyncSyncEngine
+from sync.records import RecordView
+from sync.sync import Sync
+
+
+class AioSync(Sync):
+    api_object = "dcim.devices"
+    sync_parameters = ["name", "status"]
+    unique_parameter = ["name"]
+    global_sync_values = {}
+
+
+class FakeAsyncClient:
+    def __init__(self, objects, page_size=2, fail_bulk=False):
+        self.objects = [RecordView(obj) for obj in objects]
+        self.page_size = page_size
+        self.fail_bulk = fail_bulk
+        self.semaphore = asyncio.Semaphore(4)
+        self.writes = []
+        self.next_id = 100
+
+    async def iter_pages(self, api_object, keep_fields=None, **filters):
+        for start in range(0, len(self.objects), self.page_size):
+            await asyncio.sleep(0)
+            yield self.objects[start:start + self.page_size]
+
+    async def fetch(self, api_object, keep_fields=None, **filters):
+        return list(self.objects)
+
+    async def create(self, api_object, payloads):
+        self.writes.append(("create", [payload["name"] for payload in payloads]))
+        if self.fail_bulk and len(payloads) > 1:
+            raise RuntimeError("bulk rejected")
+        if any(payload["name"] == "broken" for payload in payloads):
+            raise RuntimeError("invalid object")
+        results = []
+        for payload in payloads:
+            self.next_id += 1
+            results.append(RecordView(dict(payload, id=self.next_id)))
+        return results
+
+    async def update(self, api_object, payloads):
+        self.writes.append(("update", [payload["id"] for payload in payloads]))
+        return [RecordView(payload) for payload in payloads]
+
+
+class RecordEndpoint:
+    api = None
+
+    def return_obj(self, values, api, endpoint):
+        return SimpleNamespace(**values)
+
+
+class Connection:
+    def __init__(self):
+        self.dcim = SimpleNamespace(devices=RecordEndpoint())
+
+
+def _run(sync, master, slave):
+    return asyncio.run(AsyncSyncEngine(sync, master, slave).run())
+
+
+def test_async_engine_creates_updates_and_skips_per_page():
+    master = FakeAsyncClient(
+        [
+            {"id": 1, "name": "a", "status": "active"},
+            {"id": 2, "name": "b", "status": "active"},
+            {"id": 3, "name": "c", "status": "active"},
+        ]
+    )
+    slave = FakeAsyncClient([{"id": 7, "name": "a", "status": "active"}, {"id": 8, "name": "b", "status": "offline"}])
+    sync = AioSync(Connection(), Connection(), bulk_size=10)
+
+    _run(sync, master, slave)
+
+    assert sorted(slave.writes) == [("create", ["c"]), ("update", [8])]
+    assert sync.counters == {"create": 1, "update": 1, "noop": 1}
+    assert {"fetch", "index", "plan", "apply"} <= set(sync.timings)
+
+
+def test_async_engine_falls_back_to_single_writes_and_records_errors():
+    master = FakeAsyncClient([{"id": 1, "name": "ok", "status": "active"}, {"id": 2, "name": "broken", "status": "active"}], page_size=10)
+    slave = FakeAsyncClient([], fail_bulk=True)
+    sync = AioSync(Connection(), Connection(), bulk_size=10)
+
+    _run(sync, master, slave)
+
+    assert slave.writes[0] == ("create", ["ok", "broken"])
+    assert sorted(slave.writes[1:]) == [("create", ["broken"]), ("create", ["ok"])]
+    assert [error["object"] for error in sync.errors] == ["RecordView(2)"]
+
+
+def test_async_engine_runs_sync_hooks_in_threads_and_prefers_async_hooks():
+    calls = []
+
+    class HookSync(AioSync):
+        def post_create(self, oldobj, newobj):
+            calls.append(("post_create", oldobj.name, newobj.id))
+            return newobj
+
+        def post_sync(self, oldobj, newobj):
+            calls.append(("post_sync", oldobj.name))
+
+    class AsyncHookSync(HookSync):
+        async def async_post_sync(self, oldobj, newobj):
+            calls.append(("async_post_sync", oldobj.name))
+
+    master = FakeAsyncClient([{"id": 1, "name": "a", "status": None}, {"id": 2, "name": "b", "status": None}])
+    slave = FakeAsyncClient([{"id": 9, "name": "b", "status": None}])
+
+    _run(HookSync(Connection(), Connection()), master, slave)
+    assert sorted(calls) == [("post_create", "a", 101), ("post_sync", "a"), ("post_sync", "b")]
+
+    calls.clear()
+    _run(AsyncHookSync(Connection(), Connection()), master, FakeAsyncClient([{"id": 9, "name": "b", "status": None}]))
+    assert sorted(calls) == [("async_post_sync", "a"), ("async_post_sync", "b"), ("post_create", "a", 101)]
+
+
+def test_async_engine_waits_for_full_plan_when_pre_apply_is_defined():
+    seen = []
+
+    class PreApplySync(AioSync):
+        apply_order_fields = ["parent"]
+        sync_parameters = ["name", "parent"]
+
+        def pre_apply(self, sync_plan):
+            seen.append(len(sync_plan))
+
+    master = FakeAsyncClient(
+        [{"id": 1, "name": "child", "parent": "root"}, {"id": 2, "name": "root", "parent": None}, {"id": 3, "name": "x", "parent": None}]
+    )
+    slave = FakeAsyncClient([])
+
+    _run(PreApplySync(Connection(), Connection(), bulk_size=10), master, slave)
+
+    assert seen == [3]
+    assert slave.writes == [("create", ["root", "x"]), ("create", ["child"])]
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status = 200
+        self._data = data
+
+    async def json(self):
+        return self._data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    def __init__(self, total, max_page_size):
+        self.total = total
+        self.max_page_size = max_page_size
+        self.calls = []
+
+    def request(self, method, url, params=None, json=None, headers=None, ssl=None):
+        params = dict(params)
+        self.calls.append(params)
+        offset, limit = int(params["offset"]), min(int(params["limit"]), self.max_page_size)
+        results = [{"id": n, "name": f"d{n}", "comments": "x"} for n in range(offset, min(offset + limit, self.total))]
+        next_url = "next" if offset + limit < self.total else None
+        return FakeResponse({"count": self.total, "next": next_url, "results": results})
+
+
+def test_async_client_fetches_remaining_pages_concurrently_by_offset():
+    from sync.aio import AsyncNetBoxClient
+
+    async def fetch():
+        session = FakeSession(total=25, max_page_size=10)
+        client = AsyncNetBoxClient(session, "https://netbox.example/api/", "secret", asyncio.Semaphore(2), page_size=50)
+        objects = await client.fetch("dcim.device_bays", keep_fields=["id", "name"], status="active")
+        return session, client, objects
+
+    session, client, objects = asyncio.run(fetch())
+
+    assert client.endpoint_url("dcim.device_bays") == "https://netbox.example/api/dcim/device-bays/"
+    assert sorted(obj.id for obj in objects) == list(range(25))
+    assert objects[0] == {"id": 0, "name": "d0"}
+    assert [(call["offset"], call["limit"]) for call in session.calls] == [("0", "50"), ("10", "10"), ("20", "10")]
+    assert all(call["status"] == "active" for call in session.calls)
@@ -0,0 +1,76 @@
+import json
+from urllib.request import Request, urlopen
+
+from benchmarks.datasets import build_inventory, build_slave_baseline
+from benchmarks.fake_netbox import STATS_PATH, FakeNetBoxServer
+
+
+def _call(url, method="GET", body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    request = Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urlopen(request) as response:
+        payload = response.read()
+    return json.loads(payload) if payload else None
+
+
+def test_build_inventory_sizes():
+    data = build_inventory(devices=3, interfaces_per_device=48, virtual_machines=2, interfaces_per_vm=2)
+
+    assert len(data["dcim/devices"]) == 3
+    assert len(data["dcim/interfaces"]) == 144
+    assert len(data["virtualization/interfaces"]) == 4
+    parents = [interface for interface in data["dcim/interfaces"] if interface["parent"]]
+    assert parents and all(interface["mode"]["value"] == "tagged" for interface in parents)
+
+
+def test_fake_netbox_paginates_filters_and_counts_requests():
+    with FakeNetBoxServer(build_inventory(devices=5, interfaces_per_device=4), page_size=3) as server:
+        base = f"{server.url}/api/dcim/interfaces/"
+
+        pages = [_call(f"{base}?device=dev000001&device=dev000002&limit=3")]
+        while pages[-1]["next"]:
+            pages.append(_call(pages[-1]["next"]))
+        first = pages[0]
+        projected = _call(f"{base}?device_id={first['results'][0]['device']['id']}&fields=id,name")
+
+        assert first["count"] == 8
+        assert [len(page["results"]) for page in pages] == [3, 3, 2]
+        assert projected["results"][0] == {"id": first["results"][0]["id"], "name": "eth0"}
+        assert _call(f"{server.url}{STATS_PATH}/")["requests"] == {"GET": 4}
+
+
+def test_fake_netbox_resolves_nested_lookups_on_bulk_writes():
+    with FakeNetBoxServer(build_slave_baseline()) as server:
+        devices = f"{server.url}/api/dcim/devices/"
+        interfaces = f"{server.url}/api/dcim/interfaces/"
+
+        created = _call(
+            devices,
+            "POST",
+            [{"name": "dev1", "site": {"slug": "site-1"}, "role": {"slug": "server"}, "status": "active"}],
+        )
+        device_id = created[0]["id"]
+        _call(interfaces, "POST", [{"name": "eth0", "device": {"name": "dev1"}, "type": "1000base-t"}])
+        child = _call(
+            interfaces,
+            "POST",
+            {"name": "eth0.10", "device": {"name": "dev1"}, "parent": {"name": "eth0"}, "untagged_vlan": {"vid": 110}},
+        )
+        updated = _call(devices, "PATCH", [{"id": device_id, "status": "offline"}])
+        _call(interfaces, "DELETE", [{"id": child["id"]}])
+
+        assert created[0]["site"]["slug"] == "site-1"
+        assert created[0]["status"] == {"value": "active", "label": "Active"}
+        assert child["parent"]["name"] == "eth0"
+        assert child["untagged_vlan"]["vid"] == 110
+        assert updated[0]["status"]["value"] == "offline"
+        assert _call(f"{interfaces}?device_id={device_id}")["count"] == 1
+
+
+def test_fake_netbox_returns_absolute_urls_and_full_ip_records():
+    data = {"ipam/ip-addresses": [{"id": 5, "address": "10.0.0.1/24"}]}
+    with FakeNetBoxServer(data) as server:
+        ip = _call(f"{server.url}/api/ipam/ip-addresses/?address=10.0.0.1/24")["results"][0]
+
+    assert ip["url"] == f"{server.url}/api/ipam/ip-addresses/5/"
+    assert ip["role"] is None and ip["vrf"] is None and ip["assigned_object_id"] is None
@@ -0,0 +1,173 @@
+import hashlib
+import hmac
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from sync.daemon import EventQueue, SyncDaemon, WebhookServer, is_loopback, parse_listen, verify_signature
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDevices:
+    object_type = "dcim.device"
+    synced = []
+
+    def _build_unique_key(self, obj):
+        return (obj.name,)
+
+    def sync_objects(self, master_ids):
+        self.synced.append((type(self).__name__, list(master_ids)))
+
+
+class FakeInterfaces(FakeDevices):
+    object_type = "dcim.interface"
+
+    def _build_unique_key(self, obj):
+        return (obj.name, obj.device["name"])
+
+
+@pytest.fixture(autouse=True)
+def _reset_synced():
+    FakeDevices.synced = []
+
+
+def _daemon(clock, maxsize=100, debounce=2.0):
+    full_runs = []
+    daemon = SyncDaemon(
+        [FakeDevices, FakeInterfaces],
+        lambda sync_class: sync_class(),
+        lambda: full_runs.append(clock()),
+        EventQueue(maxsize=maxsize, debounce=debounce, clock=clock),
+        reconcile_interval=60,
+        clock=clock,
+    )
+    return daemon, full_runs
+
+
+def _event(object_type, obj_id, event="updated", **data):
+    return {"event": event, "object_type": object_type, "data": dict(data, id=obj_id)}
+
+
+def test_events_are_debounced_and_coalesced_per_key():
+    clock = Clock()
+    daemon, _ = _daemon(clock)
+
+    daemon.handle_event(_event("dcim.interface", 5, name="eth0", device={"name": "sw1"}))
+    daemon.handle_event(_event("dcim.device", 1, name="sw1"))
+    clock.now = 1.0
+    daemon.handle_event(_event("dcim.interface", 5, name="eth0", device={"name": "sw1"}))
+    clock.now = 2.5
+    daemon.process_due()
+
+    # The interface was touched again at t=1, so it is not due yet.
+    assert FakeDevices.synced == [("FakeDevices", [1])]
+    clock.now = 3.0
+    daemon.process_due()
+    assert FakeDevices.synced[-1] == ("FakeInterfaces", [5])
+    assert daemon.stats()["coalesced"] == 1
+
+
+def test_due_events_are_synced_in_dependency_order():
+    clock = Clock()
+    daemon, _ = _daemon(clock, debounce=0)
+
+    daemon.handle_event(_event("dcim.interface", 5, name="eth0", device={"name": "sw1"}))
+    daemon.handle_event(_event("dcim.device", 1, name="sw1"))
+    daemon.process_due()
+
+    assert FakeDevices.synced == [("FakeDevices", [1]), ("FakeInterfaces", [5])]
+
+
+def test_unknown_deleted_and_legacy_events():
+    clock = Clock()
+    daemon, _ = _daemon(clock, debounce=0)
+
+    assert not daemon.handle_event(_event("ipam.prefix", 1, name="x"))
+    assert not daemon.handle_event(_event("dcim.device", 1, event="deleted", name="sw1"))
+    assert daemon.handle_event({"event": "created", "model": "device", "data": {"id": 2, "name": "sw2"}})
+    daemon.process_due()
+
+    assert FakeDevices.synced == [("FakeDevices", [2])]
+    assert daemon.stats()["ignored"] == 2
+
+
+def test_overflow_drops_queue_and_triggers_full_resync():
+    clock = Clock()
+    daemon, full_runs = _daemon(clock, maxsize=2, debounce=0)
+
+    for obj_id in range(3):
+        daemon.handle_event(_event("dcim.device", obj_id, name=f"sw{obj_id}"))
+    daemon.process_due()
+
+    assert full_runs == [0.0]
+    assert FakeDevices.synced == []
+    assert len(daemon.queue) == 0
+    assert daemon.next_reconcile == 60
+
+
+def test_webhook_server_verifies_signatures():
+    clock = Clock()
+    daemon, _ = _daemon(clock)
+    server = WebhookServer(("127.0.0.1", 0), daemon, secret="s3cret")
+    server.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    body = json.dumps(_event("dcim.device", 1, name="sw1")).encode()
+
+    def post(signature=None):
+        headers = {"X-Hook-Signature": signature} if signature is not None else {}
+        request = urllib.request.Request(url, data=body, headers=headers)
+        try:
+            return urllib.request.urlopen(request).status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    try:
+        assert post() == 403
+        assert post("bad") == 403
+        signature = hmac.new(b"s3cret", body, hashlib.sha512).hexdigest()
+        assert verify_signature("s3cret", body, signature)
+        assert post(signature) == 202
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(daemon.queue) == 1
+
+
+def test_webhook_server_requires_secret_beyond_loopback():
+    daemon, _ = _daemon(Clock())
+    with pytest.raises(ValueError):
+        WebhookServer(("0.0.0.0", 0), daemon)
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("") and not is_loopback("10.0.0.1") and not is_loopback("netbox.example")
+
+
+def test_parse_listen_accepts_ipv6_literals():
+    assert parse_listen("127.0.0.1:8080") == ("127.0.0.1", 8080)
+    assert parse_listen("[::1]:8080") == ("::1", 8080)
+    assert parse_listen("localhost:9000") == ("localhost", 9000)
+    assert is_loopback(parse_listen("[::1]:8080")[0])
+    for text in ("8080", "[::1]", "host:port", "[::1:8080"):
+        with pytest.raises(ValueError):
+            parse_listen(text)
+
+
+def test_webhook_server_binds_ipv6_loopback():
+    daemon, _ = _daemon(Clock())
+    try:
+        server = WebhookServer(parse_listen("[::1]:0"), daemon)
+    except OSError:
+        pytest.skip("IPv6 loopback is not available")
+    try:
+        assert server.server_address[0] == "::1"
+    finally:
+        server.server_close()
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from sync.devices import Devices
+
+
+class ComponentEndpoint:
+    def __init__(self, components):
+        self.components = components
+        self.delete_calls = []
+
+    def filter(self, device_id):
+        return [component for component in self.components if component.device_id == device_id]
+
+    def delete(self, objects):
+        self.delete_calls.append([component.name for component in objects])
+        return True
+
+
+def _conn(interfaces, power_ports=()):
+    return SimpleNamespace(
+        dcim=SimpleNamespace(
+            interfaces=ComponentEndpoint(list(interfaces)),
+            power_ports=ComponentEndpoint(list(power_ports)),
+        )
+    )
+
+
+def _component(name, device_id):
+    return SimpleNamespace(name=name, device_id=device_id)
+
+
+def test_post_create_bulk_deletes_template_components():
+    slave = _conn(
+        [_component("eth0", 7), _component("eth1", 7)],
+        [_component("psu0", 7)],
+    )
+    devices = Devices(_conn([]), slave)
+
+    devices.post_create(SimpleNamespace(id=1), SimpleNamespace(id=7))
+
+    assert slave.dcim.interfaces.delete_calls == [["eth0", "eth1"]]
+    assert slave.dcim.power_ports.delete_calls == [["psu0"]]
+
+
+def test_post_create_adopts_template_interfaces_present_on_master():
+    master = _conn([_component("eth0", 1), _component("mgmt", 1)])
+    slave = _conn([_component("eth0", 7), _component("eth1", 7)])
+    devices = Devices(master, slave, adopt_template_components=True)
+
+    devices.post_create(SimpleNamespace(id=1), SimpleNamespace(id=7))
+
+    assert slave.dcim.interfaces.delete_calls == [["eth1"]]
+    assert slave.dcim.power_ports.delete_calls == []
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sync.graphql import GraphQLError, graphql_url, iter_graphql_records
+from sync.interfaces import Interfaces
+
+
+class Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class Session:
+    """Answers GraphQL POSTs from a list of items and REST GETs from a list of results."""
+
+    def __init__(self, graphql_items=(), rest_results=(), errors=None):
+        self.graphql_items = list(graphql_items)
+        self.rest_results = list(rest_results)
+        self.errors = errors
+        self.posts = []
+        self.gets = []
+
+    def post(self, url, json=None, headers=None):
+        self.posts.append((url, json, headers))
+        if self.errors:
+            return Response({"data": None, "errors": self.errors})
+        variables = json["variables"]
+        page = self.graphql_items[variables["offset"]:variables["offset"] + variables["limit"]]
+        return Response({"data": {"interface_list": page}})
+
+    def get(self, url, params=None, headers=None):
+        self.gets.append((url, params))
+        return Response({"results": self.rest_results, "next": None})
+
+
+def _api(session):
+    return SimpleNamespace(base_url="https://netbox.example/api", token="secret", http_session=session)
+
+
+def test_graphql_url_strips_api_suffix():
+    assert graphql_url(_api(None)) == "https://netbox.example/graphql/"
+
+
+def test_iter_graphql_records_pages_and_coerces_ids():
+    session = Session([{"id": str(idx), "device": {"id": "7", "name": "sw1"}} for idx in range(1, 6)])
+
+    records = list(iter_graphql_records(_api(session), "interface_list", "id device { id name }", page_size=2))
+
+    assert [record.id for record in records] == [1, 2, 3, 4, 5]
+    assert records[0].device == {"id": 7, "name": "sw1"}
+    assert [post[1]["variables"] for post in session.posts] == [
+        {"offset": 0, "limit": 2},
+        {"offset": 2, "limit": 2},
+        {"offset": 4, "limit": 2},
+    ]
+    assert session.posts[0][2]["Authorization"] == "Token secret"
+
+
+def test_iter_graphql_records_raises_on_errors():
+    session = Session(errors=[{"message": "Cannot query field"}])
+
+    with pytest.raises(GraphQLError, match="Cannot query field"):
+        list(iter_graphql_records(_api(session), "interface_list", "id"))
+
+
+def test_interfaces_graphql_fetch_feeds_plan_and_ip_index():
+    session = Session(
+        graphql_items=[
+            {
+                "id": "1",
+                "name": "eth0",
+                "device": {"id": "7", "name": "sw1"},
+                "tagged_vlans": [{"id": "3", "vid": 10, "name": "users", "group": None, "site": None}],
+                "ip_addresses": [{"id": "9", "address": "10.0.0.1/24", "vrf": {"name": "mgmt"}}],
+            },
+            {"id": "2", "name": "eth1", "device": {"id": "7", "name": "sw1"}, "tagged_vlans": [], "ip_addresses": []},
+        ],
+        rest_results=[
+            {"id": 1, "type": {"value": "1000base-t", "label": "1000BASE-T"}, "mode": None},
+            {"id": 2, "type": {"value": "virtual", "label": "Virtual"}, "mode": {"value": "access", "label": "Access"}},
+        ],
+    )
+    endpoint = SimpleNamespace(api=_api(session), url="https://netbox.example/api/dcim/interfaces")
+    ip_endpoint = SimpleNamespace(filter=pytest.fail)
+    master = SimpleNamespace(ipam=SimpleNamespace(ip_addresses=ip_endpoint))
+    interfaces = Interfaces(master, None, graphql_fetch=True)
+
+    objects = list(interfaces._iter_master_objects(endpoint))
+    interfaces.pre_apply([{"action": "noop", "master_obj": obj} for obj in objects])
+
+    assert [(obj.name, obj.type["value"]) for obj in objects] == [("eth0", "1000base-t"), ("eth1", "virtual")]
+    assert objects[1].mode["value"] == "access"
+    assert "ip_addresses" not in objects[0]
+    assert session.gets[0][1]["fields"] == "id,type,mode"
+    ips = interfaces._get_master_ips(1)
+    assert [(ip.address, ip.vrf["name"], ip.assigned_object_id) for ip in ips] == [("10.0.0.1/24", "mgmt", 1)]
+    assert interfaces._get_master_ips(2) == []
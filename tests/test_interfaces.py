@@ -0,0 +1,209 @@
+import json
+from types import SimpleNamespace
+
+from sync.interfaces import Interfaces
+from sync.records import RecordView
+
+
+class Record(dict):
+    """Minimal stand-in for a pynetbox Record supporting item and attribute access."""
+
+    __getattr__ = dict.get
+
+
+class IpEndpoint:
+    def __init__(self, ips):
+        self.ips = ips
+        self.filter_calls = []
+
+    def filter(self, **filters):
+        self.filter_calls.append(filters)
+        wanted = filters.get("assigned_object_id")
+        if wanted is None:
+            return list(self.ips)
+        return [ip for ip in self.ips if ip.assigned_object_id in wanted]
+
+
+def _master_conn(ips):
+    return SimpleNamespace(ipam=SimpleNamespace(ip_addresses=IpEndpoint(ips)))
+
+
+def test_pre_apply_indexes_master_ips_by_interface():
+    ips = [
+        Record(address="10.0.0.1/24", assigned_object_id=1),
+        Record(address="10.0.0.2/24", assigned_object_id=1),
+        Record(address="10.0.1.1/24", assigned_object_id=3),
+    ]
+    master = _master_conn(ips)
+    interfaces = Interfaces(master, None)
+    interfaces.lookup_chunk_size = 2
+    plan = [{"action": "noop", "master_obj": Record(id=idx)} for idx in (1, 2, 3)]
+
+    interfaces.pre_apply(plan)
+
+    assert master.ipam.ip_addresses.filter_calls == [
+        {"assigned_object_type": "dcim.interface", "assigned_object_id": [1, 2]},
+        {"assigned_object_type": "dcim.interface", "assigned_object_id": [3]},
+    ]
+    assert [ip.address for ip in interfaces._get_master_ips(1)] == ["10.0.0.1/24", "10.0.0.2/24"]
+    assert interfaces._get_master_ips(2) == []
+
+
+def test_pre_apply_fetches_all_ips_for_large_plans():
+    master = _master_conn([Record(address="10.0.0.1/24", assigned_object_id=2)])
+    interfaces = Interfaces(master, None)
+    interfaces.ip_prefetch_all_threshold = 1
+
+    interfaces.pre_apply([{"action": "noop", "master_obj": Record(id=idx)} for idx in (1, 2)])
+
+    assert master.ipam.ip_addresses.filter_calls == [{"assigned_object_type": "dcim.interface"}]
+    assert len(interfaces._get_master_ips(2)) == 1
+
+
+def test_post_sync_reads_ips_from_index():
+    master = _master_conn([])
+    interfaces = Interfaces(master, None)
+    interfaces.pre_apply([{"action": "noop", "master_obj": Record(id=5)}])
+    calls_after_prefetch = len(master.ipam.ip_addresses.filter_calls)
+
+    interfaces.post_sync(Record(id=5, tagged_vlans=[]), Record(id=50))
+
+    assert len(master.ipam.ip_addresses.filter_calls) == calls_after_prefetch
+
+
+class VlanEndpoint:
+    def __init__(self, vlans):
+        self.vlans = vlans
+        self.all_calls = 0
+        self.get_calls = []
+        self.filter_calls = []
+
+    def all(self):
+        self.all_calls += 1
+        return list(self.vlans)
+
+    def get(self, **filters):
+        self.get_calls.append(filters)
+        matches = [vlan for vlan in self.vlans if vlan.vid == filters["vid"]]
+        return matches[0] if matches else None
+
+    def filter(self, **filters):
+        self.filter_calls.append(filters)
+        return [
+            vlan
+            for vlan in self.vlans
+            if vlan.vid == filters["vid"] and vlan.group is None and vlan.site is None
+        ]
+
+
+class SlaveInterface(Record):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.updates = []
+
+    def update(self, data):
+        self.updates.append(data)
+
+
+def _slave_conn(vlans):
+    return SimpleNamespace(ipam=SimpleNamespace(vlans=VlanEndpoint(vlans)))
+
+
+def test_sync_vlans_uses_run_scoped_index():
+    slave = _slave_conn(
+        [
+            Record(id=10, vid=100, name="users", group=None, site=Record(slug="dc1")),
+            Record(id=11, vid=100, name="users", group=None, site=Record(slug="dc2")),
+            Record(id=20, vid=200, name="voice", group=None, site=None),
+        ]
+    )
+    interfaces = Interfaces(None, slave)
+    first = SlaveInterface(id=1, tagged_vlans=[])
+    second = SlaveInterface(id=2, tagged_vlans=[])
+
+    interfaces.sync_vlans(first, [Record(vid=200, name="voice"), Record(vid=100, site=Record(slug="dc2"))])
+    interfaces.sync_vlans(second, [Record(vid=200, name="voice"), Record(vid=300, name="missing")])
+    interfaces.sync_vlans(second, [Record(vid=300, name="missing")])
+
+    assert first.updates == [{"tagged_vlans": [20, 11]}]
+    assert second.updates == [{"tagged_vlans": [20]}]
+    assert slave.ipam.vlans.all_calls == 1
+    assert slave.ipam.vlans.get_calls == [{"vid": 300}]
+
+    interfaces.invalidate_vlan_index()
+    interfaces.sync_vlans(second, [Record(vid=200)])
+    assert slave.ipam.vlans.all_calls == 2
+
+
+def test_sync_vlans_looks_up_global_vlan_when_master_vlan_has_no_scope():
+    slave = _slave_conn(
+        [
+            Record(id=10, vid=100, name="users", group=None, site=Record(slug="dc1")),
+            Record(id=11, vid=100, name="users", group=None, site=None),
+        ]
+    )
+    interfaces = Interfaces(None, slave)
+    interface = SlaveInterface(id=1, tagged_vlans=[])
+
+    interfaces.sync_vlans(interface, [Record(vid=100, name="users")])
+
+    assert interface.updates == [{"tagged_vlans": [11]}]
+    assert slave.ipam.vlans.filter_calls == [{"vid": 100, "group_id": "null", "site_id": "null"}]
+
+
+def test_vlan_index_is_rebuilt_for_each_run():
+    slave = _slave_conn([Record(id=20, vid=200, name="voice", group=None, site=None)])
+    interfaces = Interfaces(None, slave)
+    interfaces.sync_vlans(SlaveInterface(id=1, tagged_vlans=[]), [Record(vid=200)])
+
+    interfaces._reset_run_state()
+    interfaces.sync_vlans(SlaveInterface(id=1, tagged_vlans=[]), [Record(vid=200)])
+
+    assert slave.ipam.vlans.all_calls == 2
+
+
+def test_sync_vlans_skips_update_when_tagged_set_is_identical():
+    slave = _slave_conn([Record(id=20, vid=200, name="voice", group=None, site=None)])
+    interfaces = Interfaces(None, slave)
+    interface = SlaveInterface(id=1, tagged_vlans=[Record(id=20, vid=200)])
+
+    interfaces.sync_vlans(interface, [Record(vid=200, name="voice")])
+
+    assert interface.updates == []
+
+
+def test_interface_type_is_diffed_by_choice_value():
+    interfaces = Interfaces(None, None)
+    master = Record(name="eth0", type=Record(value="10gbase-x-sfpp", label="SFP+ (10GE)"))
+    same = Record(name="eth0", type={"value": "10gbase-x-sfpp", "label": "SFP+ (10GE)"})
+    changed = Record(name="eth0", type={"value": "1000base-t", "label": "1000BASE-T (1GE)"})
+
+    assert interfaces.create_payload(master)["type"] == "10gbase-x-sfpp"
+    assert not interfaces.get_differences(master, same)
+    assert interfaces.get_differences(master, changed) == {"type": "10gbase-x-sfpp"}
+
+
+def test_sync_ip_addresses_looks_up_and_creates_by_address_string():
+    class SlaveIpEndpoint:
+        def __init__(self):
+            self.filter_calls = []
+            self.created = []
+
+        def filter(self, **filters):
+            self.filter_calls.append(filters)
+            return []
+
+        def create(self, **payload):
+            # pynetbox sends the payload as JSON; a Record here would not serialize.
+            self.created.append(json.loads(json.dumps(payload)))
+
+    endpoint = SlaveIpEndpoint()
+    interfaces = Interfaces(None, SimpleNamespace(ipam=SimpleNamespace(ip_addresses=endpoint)))
+    # Master IPs from raw or GraphQL fetches are RecordViews, whose str() is not the address.
+    ip = RecordView(id=7, address="10.0.0.1/24", vrf={"name": "mgmt"})
+
+    interfaces.sync_ip_addresses(Record(id=50), [ip])
+
+    assert endpoint.filter_calls == [{"address": "10.0.0.1/24"}]
+    assert endpoint.created[0]["address"] == "10.0.0.1/24"
+    assert endpoint.created[0]["vrf"] == {"name": "mgmt"}
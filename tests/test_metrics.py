@@ -0,0 +1,73 @@
+import json
+
+from sync.metrics import build_run_summary, merge_run_summaries, render_prometheus, write_json_summary
+
+
+class FakeSync:
+    def __init__(self, api_object, timings, counters):
+        self.api_object = api_object
+        self.timings = timings
+        self.counters = counters
+
+    def run_summary(self):
+        return {"api_object": self.api_object, "timings": self.timings, "counters": self.counters}
+
+
+def _summary():
+    return build_run_summary(
+        [
+            FakeSync(
+                "dcim.devices",
+                {"fetch": 1.5, "apply": 0.25},
+                {"create": 2, "update": 1, "noop": 7, "errors": 1},
+            )
+        ],
+        100.0,
+        112.5,
+        critical_path=["Devices"],
+    )
+
+
+def test_render_prometheus_exports_phases_counters_and_errors():
+    text = render_prometheus(_summary(), labels={"shard": "0"})
+
+    assert 'netbox_sync_run_duration_seconds{shard="0"} 12.500' in text
+    assert (
+        'netbox_sync_phase_duration_seconds{api_object="dcim.devices",phase="fetch",shard="0"} 1.500000'
+        in text
+    )
+    assert 'netbox_sync_objects{action="noop",api_object="dcim.devices",shard="0"} 7' in text
+    assert 'netbox_sync_errors{api_object="dcim.devices",shard="0"} 1' in text
+
+
+def test_write_json_summary(tmp_path):
+    path = tmp_path / "summary.json"
+
+    write_json_summary(str(path), _summary())
+
+    data = json.loads(path.read_text())
+    assert data["critical_path"] == ["Devices"]
+    assert data["types"][0]["counters"]["create"] == 2
+
+
+def test_merge_run_summaries_sums_types_across_shards():
+    first = dict(_summary(), shard={"index": 0, "count": 2, "scope": {}})
+    second = build_run_summary(
+        [FakeSync("dcim.devices", {"fetch": 0.5}, {"create": 1, "update": 0, "noop": 3, "errors": 0})],
+        105.0,
+        120.0,
+        shard={"index": 1, "count": 2, "scope": {}},
+    )
+
+    merged = merge_run_summaries([first, second])
+
+    assert merged["duration_seconds"] == 20.0
+    assert merged["types"] == [
+        {
+            "api_object": "dcim.devices",
+            "timings": {"fetch": 2.0, "apply": 0.25},
+            "counters": {"create": 3, "update": 1, "noop": 10, "errors": 1},
+        }
+    ]
+    assert [shard["index"] for shard in merged["shards"]] == [0, 1]
+    assert "netbox_sync_errors" in render_prometheus(merged)
@@ -0,0 +1,89 @@
+import threading
+
+from sync.ratelimit import AdaptiveLimiter, parse_retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _request(limiter, clock, **outcome):
+    clock.now = max(clock.now, limiter._next_slot, limiter._blocked_until)
+    limiter.acquire()
+    limiter.release(**outcome)
+
+
+def test_healthy_responses_increase_limits_additively():
+    clock = Clock()
+    limiter = AdaptiveLimiter(max_concurrency=8, max_rate=40.0, clock=clock)
+    start = limiter.snapshot()
+
+    for _ in range(20):
+        _request(limiter, clock, status=200, latency=0.1)
+
+    snapshot = limiter.snapshot()
+    assert start["concurrency_limit"] == 2 and start["rate_limit"] == 10.0
+    assert 2 < snapshot["concurrency_limit"] <= 8
+    assert 10.0 < snapshot["rate_limit"] < 40.0
+    assert snapshot["requests"] == 20
+    assert snapshot["avg_latency"] == 0.1
+
+
+def test_throttling_errors_and_slow_responses_decrease_limits_once_per_cooldown():
+    clock = Clock()
+    limiter = AdaptiveLimiter(max_concurrency=16, max_rate=40.0, latency_target=1.0, cooldown=5.0, clock=clock)
+    limiter.concurrency, limiter.rate = 16.0, 40.0
+
+    _request(limiter, clock, status=429)
+    _request(limiter, clock, status=500)
+    assert (limiter.snapshot()["concurrency_limit"], limiter.rate) == (8, 20.0)
+
+    clock.now += 5
+    _request(limiter, clock, status=200, latency=3.0)
+    clock.now += 5
+    _request(limiter, clock, status=201, retried_statuses=[503])
+    clock.now += 5
+    _request(limiter, clock, status=None)
+
+    snapshot = limiter.snapshot()
+    assert snapshot["decreases"] == 4
+    assert (snapshot["throttled"], snapshot["errors"], snapshot["slow"]) == (2, 2, 1)
+    assert snapshot["concurrency_limit"] == 1
+    assert snapshot["rate_limit"] == 2.5
+
+
+def test_retry_after_holds_new_requests():
+    clock = Clock()
+    limiter = AdaptiveLimiter(clock=clock)
+
+    _request(limiter, clock, status=429, retry_after=30)
+
+    assert limiter._blocked_until == clock.now + 30
+
+
+def test_acquire_blocks_at_concurrency_limit():
+    limiter = AdaptiveLimiter(max_concurrency=1, max_rate=1000.0)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def second():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not acquired.wait(0.1)
+    limiter.release(status=200, latency=0.01)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=lambda: 1445412480.0) == 10.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+from sync.raw import iter_raw_records
+from sync.records import RecordView
+from sync.sync import Sync
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, params=None, headers=None):
+        self.calls.append((url, params, headers))
+        return FakeResponse(self.pages[len(self.calls) - 1])
+
+
+def _endpoint(pages):
+    api = SimpleNamespace(http_session=FakeSession(pages), token="secret")
+    return SimpleNamespace(url="https://netbox.example/api/dcim/devices", api=api)
+
+
+def test_iter_raw_records_follows_pagination_and_keeps_sync_fields():
+    endpoint = _endpoint(
+        [
+            {
+                "next": "https://netbox.example/api/dcim/devices/?limit=1&offset=1",
+                "results": [{"id": 1, "name": "a", "site": {"slug": "dc1"}, "comments": "x" * 100}],
+            },
+            {"next": None, "results": [{"id": 2, "name": "b", "site": None}]},
+        ]
+    )
+
+    records = list(iter_raw_records(endpoint, keep_fields=["id", "name", "site"], page_size=1, site="dc1"))
+
+    assert records == [{"id": 1, "name": "a", "site": {"slug": "dc1"}}, {"id": 2, "name": "b", "site": None}]
+    assert records[0].name == "a"
+    assert records[0]["site"]["slug"] == "dc1"
+    calls = endpoint.api.http_session.calls
+    assert calls[0][0] == "https://netbox.example/api/dcim/devices/"
+    assert calls[0][1] == {"site": "dc1", "limit": 1, "offset": 0}
+    assert calls[0][2]["Authorization"] == "Token secret"
+    assert calls[1][:2] == ("https://netbox.example/api/dcim/devices/?limit=1&offset=1", None)
+
+
+def test_record_view_feeds_the_plan_builder():
+    class RawSync(Sync):
+        api_object = "dcim.devices"
+        sync_parameters = ["name", "site", "status"]
+        unique_parameter = ["name"]
+        global_sync_values = {}
+
+    sync = RawSync(None, None)
+    master = RecordView(id=1, name="a", site={"slug": "dc1"}, status={"value": "active", "label": "Active"})
+    slave = RecordView(id=9, name="a", site={"slug": "dc2"}, status={"value": "active", "label": "Active"})
+
+    plan = sync._build_sync_plan([master], sync._build_slave_index([slave]))
+
+    assert plan[0]["action"] == "update"
+    assert plan[0]["payload"] == {"site": {"slug": "dc1"}}
+
+
+def test_materialize_builds_record_only_for_views():
+    class FakeRecord:
+        def __init__(self, values, api, endpoint):
+            self.values = values
+
+    endpoint = SimpleNamespace(return_obj=FakeRecord, api="api")
+    sync = Sync(None, None)
+
+    record = sync._materialize(endpoint, RecordView(id=3, name="x"))
+    assert isinstance(record, FakeRecord)
+    assert record.values == {"id": 3, "name": "x"}
+    untouched = object()
+    assert sync._materialize(endpoint, untouched) is untouched
@@ -0,0 +1,108 @@
+import threading
+from types import SimpleNamespace
+
+from sync.relations import RelationResolver
+from sync.sync import Sync
+
+
+def _resolver(objects_by_endpoint):
+    calls = []
+
+    def fetch(endpoint, fields):
+        calls.append((endpoint.name, fields))
+        return [SimpleNamespace(**obj) for obj in endpoint.objects]
+
+    slave_conn = SimpleNamespace(
+        dcim=SimpleNamespace(
+            **{name: SimpleNamespace(name=name, objects=objects) for name, objects in objects_by_endpoint.items()}
+        ),
+        extras=SimpleNamespace(tags=SimpleNamespace(name="tags", objects=[{"id": 5, "slug": "core"}])),
+    )
+    return RelationResolver(slave_conn, fetch=fetch), calls
+
+
+def test_resolver_replaces_known_lookups_and_keeps_misses_and_ambiguous_values():
+    resolver, calls = _resolver(
+        {
+            "sites": [{"id": 1, "slug": "dc1"}, {"id": 2, "slug": "dc2"}],
+            "devices": [{"id": 10, "name": "sw1"}, {"id": 11, "name": "dup"}, {"id": 12, "name": "dup"}],
+        }
+    )
+    payload = {
+        "name": "eth0",
+        "site": {"slug": "dc1"},
+        "device": {"name": "dup"},
+        "tags": [{"slug": "core"}, {"slug": "missing"}],
+        "parent": {"name": "eth1"},
+    }
+
+    resolved = resolver.resolve_payload(Sync.relation_endpoints, payload)
+    again = resolver.resolve_payload(Sync.relation_endpoints, {"device": {"name": "sw1"}, "site": {"slug": "dc3"}})
+
+    assert resolved == {
+        "name": "eth0",
+        "site": 1,
+        "device": {"name": "dup"},
+        "tags": [5, {"slug": "missing"}],
+        "parent": {"name": "eth1"},
+    }
+    assert payload["site"] == {"slug": "dc1"}
+    assert again == {"device": 10, "site": {"slug": "dc3"}}
+    assert calls == [("sites", ["id", "slug"]), ("devices", ["id", "name"]), ("tags", ["id", "slug"])]
+    assert resolver.stats() == {"hits": 3, "misses": 3, "maps": 3}
+
+
+def test_resolver_registers_objects_created_during_the_run():
+    resolver, calls = _resolver({"devices": [{"id": 10, "name": "sw1"}]})
+    endpoints = {"device": "dcim.devices"}
+    resolver.resolve_payload(endpoints, {"device": {"name": "sw1"}})
+
+    resolver.register("dcim.devices", SimpleNamespace(id=20, name="sw2"))
+    resolver.register("dcim.devices", SimpleNamespace(id=21, name="sw1"))
+
+    assert resolver.resolve_payload(endpoints, {"device": {"name": "sw2"}}) == {"device": 20}
+    assert resolver.resolve_payload(endpoints, {"device": {"name": "sw1"}}) == {"device": {"name": "sw1"}}
+    assert len(calls) == 1
+
+
+def test_slow_map_load_does_not_block_other_maps():
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def fetch(endpoint, fields):
+        loads.append(endpoint.name)
+        if endpoint.name == "devices":
+            started.set()
+            assert release.wait(5)
+        return [SimpleNamespace(**obj) for obj in endpoint.objects]
+
+    slave_conn = SimpleNamespace(
+        dcim=SimpleNamespace(
+            devices=SimpleNamespace(name="devices", objects=[{"id": 10, "name": "sw1"}]),
+            sites=SimpleNamespace(name="sites", objects=[{"id": 1, "slug": "dc1"}]),
+        )
+    )
+    resolver = RelationResolver(slave_conn, fetch=fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(resolver.resolve("dcim.devices", {"name": "sw1"})))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+
+    sites = []
+    lookup = threading.Thread(target=lambda: sites.append(resolver.resolve("dcim.sites", {"slug": "dc1"})))
+    lookup.start()
+    lookup.join(2)
+    resolved_while_loading = list(sites)
+    release.set()
+    lookup.join()
+    for thread in threads:
+        thread.join()
+
+    assert resolved_while_loading == [1]
+    assert results == [10, 10]
+    assert sorted(loads) == ["devices", "sites"]
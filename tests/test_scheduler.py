@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from sync.scheduler import SyncScheduler
+from sync.sync import Sync
+
+
+class RecordingSync(Sync):
+    delay = 0.0
+    events = None
+
+    def sync(self):
+        self.events.append(("start", type(self).__name__))
+        time.sleep(self.delay)
+        self.events.append(("end", type(self).__name__))
+
+
+def _make_classes(events):
+    class Base(RecordingSync):
+        pass
+
+    Base.events = events
+
+    class ChainA(Base):
+        delay = 0.05
+
+    class ChainB(Base):
+        delay = 0.05
+        depends_on = [ChainA]
+
+    class Other(Base):
+        delay = 0.01
+
+    return ChainA, ChainB, Other
+
+
+def test_scheduler_respects_dependencies_and_runs_branches_concurrently():
+    events = []
+    chain_a, chain_b, other = _make_classes(events)
+    scheduler = SyncScheduler(
+        [chain_b, other, chain_a],
+        lambda sync_class: sync_class(None, None),
+        max_workers=2,
+    )
+
+    assert scheduler.run() == []
+    assert set(scheduler.instances) == {chain_a, chain_b, other}
+    assert events.index(("end", "ChainA")) < events.index(("start", "ChainB"))
+    assert events.index(("start", "Other")) < events.index(("end", "ChainA"))
+    path, duration = scheduler.critical_path()
+    assert path == [chain_a, chain_b]
+    assert duration >= 0.1
+
+
+def test_scheduler_serial_mode_keeps_declared_order():
+    events = []
+    chain_a, chain_b, other = _make_classes(events)
+    scheduler = SyncScheduler([chain_a, chain_b, other], lambda sync_class: sync_class(None, None))
+
+    scheduler.run()
+
+    assert [name for kind, name in events if kind == "start"] == ["ChainA", "ChainB", "Other"]
+
+
+def test_scheduler_skips_dependents_of_failed_types():
+    class Broken(Sync):
+        def sync(self):
+            raise RuntimeError("fetch failed")
+
+    class Dependent(Sync):
+        depends_on = [Broken]
+        ran = threading.Event()
+
+        def sync(self):
+            self.ran.set()
+
+    scheduler = SyncScheduler([Broken, Dependent], lambda sync_class: sync_class(None, None))
+    unsuccessful = scheduler.run()
+
+    assert unsuccessful == [Broken, Dependent]
+    assert scheduler.failed == [Broken]
+    assert scheduler.skipped == [Dependent]
+    assert not Dependent.ran.is_set()
+
+
+def test_scheduler_detects_cycles():
+    class First(Sync):
+        pass
+
+    class Second(Sync):
+        depends_on = [First]
+
+    First.depends_on = [Second]
+
+    with pytest.raises(ValueError):
+        SyncScheduler([First, Second], lambda sync_class: sync_class(None, None)).run()
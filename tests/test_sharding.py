@@ -0,0 +1,163 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sync.sharding import Partition, parse_scope, parse_shard, shard_of, shard_path
+from sync.sync import Sync
+
+
+class ListEndpoint:
+    def __init__(self, objects):
+        self.objects = objects
+        self.filter_calls = []
+        self.created = []
+
+    def all(self):
+        return list(self.objects)
+
+    def create(self, payload):
+        self.created.append(payload)
+        return SimpleNamespace(id=len(self.created), **payload)
+
+    def filter(self, **filters):
+        self.filter_calls.append(filters)
+        matches = []
+        for obj in self.objects:
+            if all(self._matches(obj, key, value) for key, value in filters.items()):
+                matches.append(obj)
+        return matches
+
+    @staticmethod
+    def _matches(obj, key, value):
+        if value == "null" and key.endswith("_id"):
+            return getattr(obj, key[: -len("_id")], None) is None
+        return getattr(obj, key, None) in (value if isinstance(value, list) else [value])
+
+
+def _device(name, site):
+    return SimpleNamespace(id=name, display=name, name=name, site=site, status=None)
+
+
+class ShardedDevices(Sync):
+    api_object = "dcim.devices"
+    sync_parameters = ["name", "site"]
+    unique_parameter = ["name"]
+    global_sync_values = {}
+    shard_by = ("site", "dcim.sites", "slug")
+    scope_filters = {"site": "site", "tenant": "tenant"}
+
+
+class HashedTypes(Sync):
+    api_object = "dcim.device_types"
+    sync_parameters = ["name"]
+    unique_parameter = ["name"]
+    global_sync_values = {}
+
+
+def _sync(sync_class, master_objects, slave_objects, partition, sites=()):
+    master = SimpleNamespace(
+        dcim=SimpleNamespace(
+            devices=ListEndpoint(master_objects),
+            device_types=ListEndpoint(master_objects),
+            sites=ListEndpoint([SimpleNamespace(id=n, slug=slug) for n, slug in enumerate(sites)]),
+        )
+    )
+    slave = SimpleNamespace(
+        dcim=SimpleNamespace(devices=ListEndpoint(slave_objects), device_types=ListEndpoint(slave_objects))
+    )
+    return sync_class(master, slave, partition=partition)
+
+
+def test_parse_shard_scope_and_paths():
+    assert parse_shard("2/4") == (2, 4)
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+    assert parse_scope(["site=dc1,tenant=acme", "site=dc2"]) == {"site": ["dc1", "dc2"], "tenant": ["acme"]}
+    with pytest.raises(ValueError):
+        parse_scope(["site"])
+    assert shard_path("out/summary.json", "shard-1-of-4") == "out/summary.shard-1-of-4.json"
+    assert shard_path("summary.json", None) == "summary.json"
+    assert Partition(1, 4, {"site": ["dc1"]}).label == "shard-1-of-4.scope-site-dc1"
+
+
+def test_partition_pushes_owned_site_values_into_master_fetch():
+    sites = [f"dc{n}" for n in range(6)]
+    owned = [site for site in sites if shard_of(site, 2) == 1]
+    master_objects = [_device(f"d-{site}", site) for site in sites]
+    sync = _sync(ShardedDevices, master_objects, [], Partition(1, 2), sites)
+    sync.lookup_chunk_size = 2
+
+    fetched = list(sync.partition.iter_fetch(sync, sync.master_conn.dcim.devices))
+
+    assert sorted(obj.site for obj in fetched) == owned
+    assert [call["site"] for call in sync.master_conn.dcim.devices.filter_calls] == [
+        owned[start:start + 2] for start in range(0, len(owned), 2)
+    ]
+
+
+def test_partition_assigns_objects_without_shard_value_to_shard_zero():
+    sites = [f"dc{n}" for n in range(6)]
+    master_objects = [_device(f"d-{site}", site) for site in sites] + [_device("d-none", None)]
+    unsharded = _sync(ShardedDevices, master_objects, [], Partition(), sites)
+    expected = sorted(obj.name for obj in unsharded.partition.iter_fetch(unsharded, unsharded.master_conn.dcim.devices))
+
+    slices = []
+    for index in range(3):
+        sync = _sync(ShardedDevices, master_objects, [], Partition(index, 3), sites)
+        slices.append(sorted(obj.name for obj in sync.partition.iter_fetch(sync, sync.master_conn.dcim.devices)))
+
+    assert "d-none" in slices[0]
+    assert sorted(name for names in slices for name in names) == expected
+
+
+def test_partition_hashes_unique_keys_of_types_without_shard_by():
+    objects = [SimpleNamespace(id=n, display=f"t{n}", name=f"t{n}") for n in range(20)]
+    slices = []
+    for index in range(3):
+        sync = _sync(HashedTypes, objects, [], Partition(index, 3))
+        slices.append({obj.name for obj in sync.partition.iter_fetch(sync, sync.master_conn.dcim.device_types)})
+
+    assert set().union(*slices) == {obj.name for obj in objects}
+    assert sum(len(names) for names in slices) == len(objects)
+
+
+def test_scope_filters_types_and_skips_types_without_the_key():
+    master_objects = [_device("a", "dc1"), _device("b", "dc2")]
+    sync = _sync(ShardedDevices, master_objects, [], Partition(scope={"site": ["dc1"]}))
+    assert [obj.name for obj in sync.partition.iter_fetch(sync, sync.master_conn.dcim.devices)] == ["a"]
+
+    sync = _sync(ShardedDevices, master_objects, [], Partition(scope={"cluster": ["c1"]}))
+    assert list(sync.partition.iter_fetch(sync, sync.master_conn.dcim.devices)) == []
+
+    objects = [SimpleNamespace(id=1, display="t", name="t")]
+    sync = _sync(HashedTypes, objects, [], Partition(scope={"site": ["dc1"]}))
+    assert list(sync.partition.iter_fetch(sync, sync.master_conn.dcim.device_types)) == objects
+
+
+def test_sharded_sync_looks_up_slave_objects_by_key():
+    master_objects = [_device("a", "dc1"), _device("b", "dc2")]
+    slave_objects = [_device("a", "dc9"), _device("z", "dc1")]
+    sync = _sync(ShardedDevices, master_objects, slave_objects, Partition(scope={"site": ["dc1"]}))
+
+    master_objects, slave_found = sync._fetch_objects(sync.master_conn.dcim.devices, sync.slave_conn.dcim.devices)
+
+    assert [obj.name for obj in master_objects] == ["a"]
+    assert [obj.name for obj in slave_found] == ["a"]
+    assert sync.slave_conn.dcim.devices.filter_calls == [{"name": ["a"]}]
+
+
+def test_sync_objects_only_syncs_objects_of_the_partition():
+    sites = [f"dc{n}" for n in range(6)]
+    master_objects = [_device(f"d-{site}", site) for site in sites]
+    for number, obj in enumerate(master_objects):
+        obj.id = number
+    owned = {f"d-{site}" for site in sites if shard_of(site, 2) == 1}
+    sync = _sync(ShardedDevices, master_objects, [], Partition(1, 2), sites)
+
+    sync.sync_objects([obj.id for obj in master_objects])
+
+    assert {payload["name"] for payload in sync.slave_conn.dcim.devices.created} == owned
+
+    sync = _sync(ShardedDevices, master_objects, [], Partition(scope={"site": ["dc0"]}), sites)
+    sync.sync_objects([obj.id for obj in master_objects])
+    assert [payload["name"] for payload in sync.slave_conn.dcim.devices.created] == ["d-dc0"]
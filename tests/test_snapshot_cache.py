@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+from sync.records import RecordView
+from sync.snapshot_cache import SnapshotCache
+from sync.sync import Sync
+
+
+class CachedSync(Sync):
+    api_object = "dcim.devices"
+    sync_parameters = ["name"]
+    unique_parameter = ["name"]
+    global_sync_values = {}
+
+
+class FakeEndpoint:
+    def __init__(self, objects):
+        self.objects = objects
+        self.api = SimpleNamespace(base_url="https://master.example/api")
+        self.fetches = []
+        self.after_changes = None
+
+    def all(self):
+        self.fetches.append({})
+        return [dict(obj) for obj in self.objects]
+
+    def filter(self, **filters):
+        self.fetches.append(filters)
+        if filters.get("ordering") == "-last_updated":
+            return [dict(max(self.objects, key=lambda obj: obj["last_updated"]))]
+        since = filters["last_updated__gte"]
+        changed = [dict(obj) for obj in self.objects if obj["last_updated"] >= since]
+        if self.after_changes is not None:
+            self.after_changes()
+        return changed
+
+    def count(self):
+        return len(self.objects)
+
+
+def _objects():
+    return [
+        {"id": 1, "display": "a", "name": "a", "last_updated": "2024-01-01"},
+        {"id": 2, "display": "b", "name": "b", "last_updated": "2024-01-02"},
+    ]
+
+
+def test_snapshot_cache_revalidates_with_last_updated(tmp_path):
+    endpoint = FakeEndpoint(_objects())
+    sync = CachedSync(None, None)
+    cache = SnapshotCache(str(tmp_path))
+
+    first = cache.fetch(sync, endpoint)
+    endpoint.objects[0] = {"id": 1, "display": "a", "name": "a-renamed", "last_updated": "2024-02-01"}
+    second = SnapshotCache(str(tmp_path)).fetch(sync, endpoint)
+
+    assert [obj.name for obj in first] == ["a", "b"]
+    assert all(isinstance(obj, RecordView) for obj in second)
+    assert sorted(obj.name for obj in second) == ["a-renamed", "b"]
+    assert endpoint.fetches == [
+        {},
+        {"last_updated__gte": "2024-01-02"},
+        {"ordering": "-last_updated", "limit": 1},
+    ]
+
+
+def test_snapshot_cache_refetches_on_count_mismatch_and_refresh(tmp_path):
+    endpoint = FakeEndpoint(_objects())
+    sync = CachedSync(None, None)
+    SnapshotCache(str(tmp_path)).fetch(sync, endpoint)
+
+    del endpoint.objects[1]
+    after_delete = SnapshotCache(str(tmp_path)).fetch(sync, endpoint)
+    SnapshotCache(str(tmp_path), refresh=True).fetch(sync, endpoint)
+    SnapshotCache(str(tmp_path), ttl=-1).fetch(sync, endpoint)
+
+    assert [obj.name for obj in after_delete] == ["a"]
+    assert endpoint.fetches == [{}, {"last_updated__gte": "2024-01-02"}, {}, {}, {}]
+
+
+def test_snapshot_cache_refetches_when_newest_change_was_missed(tmp_path):
+    endpoint = FakeEndpoint(_objects())
+    sync = CachedSync(None, None)
+    SnapshotCache(str(tmp_path)).fetch(sync, endpoint)
+
+    def update_after_revalidation():
+        endpoint.objects[0] = {"id": 1, "display": "a", "name": "a-late", "last_updated": "2024-03-01"}
+
+    endpoint.after_changes = update_after_revalidation
+    objects = SnapshotCache(str(tmp_path)).fetch(sync, endpoint)
+
+    assert sorted(obj.name for obj in objects) == ["a-late", "b"]
+    assert endpoint.fetches[1:] == [
+        {"last_updated__gte": "2024-01-02"},
+        {"ordering": "-last_updated", "limit": 1},
+        {},
+    ]
+    assert len(list(tmp_path.glob("*.sqlite"))) == 1
+
+
+def test_snapshot_cache_round_trips_value_types(tmp_path):
+    objects = [
+        {
+            "id": 1,
+            "display": "a",
+            "name": "a",
+            "last_updated": "2024-01-01",
+            "enabled": False,
+            "mtu": None,
+            "weight": 1.5,
+            "site": {"slug": "dc1"},
+            "tags": [{"slug": "core"}],
+        },
+        {"id": 2, "display": "b", "name": "b", "last_updated": "2024-01-02"},
+    ]
+    endpoint = FakeEndpoint(objects)
+    sync = CachedSync(None, None)
+    fields = ["id", "display", "last_updated", "name", "enabled", "mtu", "weight", "site", "tags"]
+    first = SnapshotCache(str(tmp_path)).fetch(sync, endpoint, fields=fields)
+
+    second = SnapshotCache(str(tmp_path)).fetch(sync, endpoint, fields=fields)
+
+    assert endpoint.fetches[-1] == {"ordering": "-last_updated", "limit": 1}
+    assert second == first
+    assert second[0]["enabled"] is False and second[0]["mtu"] is None
+    # Fields missing from an object stay missing rather than becoming None.
+    assert "enabled" not in second[1]
@@ -1,5 +1,9 @@
 from types import SimpleNamespace
 
+from sync.cursor import CursorStore, newest_timestamp
+from sync.fingerprints import FingerprintStore
+from sync.journal import RunJournal
+from sync.plan_file import read_plan_file, write_plan_file
 from sync.sync import Sync
 
 
@@ -19,10 +23,19 @@ class DummyEndpoint:
     def __init__(self, objects):
         self._objects = objects
         self.created_payloads = []
+        self.filter_calls = []
 
     def all(self):
         return self._objects
 
+    def filter(self, **filters):
+        self.filter_calls.append(filters)
+        matches = []
+        for obj in self._objects:
+            if all(_matches_filter(obj, key, value) for key, value in filters.items()):
+                matches.append(obj)
+        return matches
+
     def create(self, payload):
         self.created_payloads.append(payload)
         created = DummyObj(**payload)
@@ -30,6 +43,18 @@ class DummyEndpoint:
         return created
 
 
+def _matches_filter(obj, key, value):
+    if key == "fields":
+        return True
+    if key == "last_updated__gte":
+        return getattr(obj, "last_updated", "") >= value
+    actual = getattr(obj, key, None)
+    actual = getattr(actual, "name", actual)
+    if isinstance(value, list):
+        return actual in value
+    return actual == value
+
+
 class DummyConnection:
     def __init__(self, endpoint):
         self.dcim = endpoint
@@ -267,3 +292,795 @@ def test_sync_create_handles_invalid_child_relation_values():
             "tags": [{"slug": "uplink"}],
         }
     ]
+
+
+class BulkEndpoint(DummyEndpoint):
+    def __init__(self, objects, fail_bulk_create=False):
+        super().__init__(objects)
+        self.fail_bulk_create = fail_bulk_create
+        self.bulk_create_calls = 0
+        self.bulk_update_calls = []
+        self.delete_calls = []
+
+    def create(self, payload):
+        if isinstance(payload, list):
+            self.bulk_create_calls += 1
+            if self.fail_bulk_create:
+                raise RuntimeError("bulk create rejected")
+            return [super(BulkEndpoint, self).create(item) for item in payload]
+        if payload.get("name") == "bad":
+            raise RuntimeError("invalid object")
+        return super().create(payload)
+
+    def delete(self, objects):
+        self.delete_calls.append(list(objects))
+        self._objects[:] = [obj for obj in self._objects if getattr(obj, "id", None) not in objects]
+        return True
+
+    def update(self, objects):
+        self.bulk_update_calls.append(objects)
+        by_id = {getattr(obj, "id", None): obj for obj in self._objects}
+        updated = []
+        for changes in objects:
+            current = by_id[changes["id"]]
+            updated.append(DummyObj(**dict(vars(current), **changes)))
+        return updated
+
+
+class BulkSync(DummySync):
+    api_object = "dcim"
+    sync_parameters = ["name", "status"]
+    unique_parameter = ["name"]
+    global_sync_values = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.post_synced = []
+
+    def post_sync(self, oldobj, newobj):
+        self.post_synced.append(newobj.name)
+        return newobj
+
+
+def test_sync_bulk_mode_batches_creates_and_updates():
+    master_objects = [
+        DummyObj(name=f"device-{idx}", status=SimpleNamespace(value="active"))
+        for idx in range(5)
+    ]
+    slave_objects = [
+        DummySaveObj(id=1, name="device-0", status=SimpleNamespace(value="planned")),
+    ]
+    slave_endpoint = BulkEndpoint(slave_objects)
+
+    sync = BulkSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        bulk_size=2,
+    )
+    sync.sync()
+
+    assert sync.errors == []
+    assert slave_endpoint.bulk_create_calls == 2
+    assert slave_endpoint.bulk_update_calls == [[{"status": "active", "id": 1}]]
+    assert slave_objects[0].save_calls == 0
+    assert sorted(sync.post_synced) == [f"device-{idx}" for idx in range(5)]
+
+
+def test_sync_bulk_mode_falls_back_to_per_item_for_failed_batch():
+    master_objects = [
+        DummyObj(name="good", status=SimpleNamespace(value="active")),
+        DummyObj(name="bad", status=SimpleNamespace(value="active")),
+        DummyObj(name="good-2", status=SimpleNamespace(value="active")),
+    ]
+    slave_endpoint = BulkEndpoint([], fail_bulk_create=True)
+
+    sync = BulkSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        bulk_size=10,
+    )
+    sync.sync()
+
+    assert slave_endpoint.bulk_create_calls == 1
+    assert [payload["name"] for payload in slave_endpoint.created_payloads] == ["good", "good-2"]
+    assert [error["object"] for error in sync.errors] == [repr(master_objects[1])]
+    assert sync.post_synced == ["good", "good-2"]
+
+
+def test_sync_concurrent_apply_collects_all_errors():
+    class ConcurrentSync(BulkSync):
+        def post_sync(self, oldobj, newobj):
+            if newobj.name.startswith("bad"):
+                raise RuntimeError("post sync failed")
+            return super().post_sync(oldobj, newobj)
+
+    master_objects = [
+        DummyObj(name=f"{prefix}-{idx}", status=SimpleNamespace(value="active"))
+        for idx in range(20)
+        for prefix in ("good", "bad")
+    ]
+    slave_endpoint = DummyEndpoint([])
+
+    sync = ConcurrentSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        apply_workers=4,
+    )
+    sync.sync()
+
+    assert len(slave_endpoint.created_payloads) == 40
+    assert len(sync.errors) == 20
+    assert sorted(sync.post_synced) == sorted(f"good-{idx}" for idx in range(20))
+
+
+def test_split_plan_waves_applies_same_type_references_last():
+    class ParentSync(BulkSync):
+        apply_order_fields = ["parent"]
+
+    sync = ParentSync(None, None, apply_workers=2)
+    plan = [
+        {"action": "create", "master_obj": None, "payload": {"name": "eth0.1", "parent": {"name": "eth0"}}},
+        {"action": "create", "master_obj": None, "payload": {"name": "eth0", "parent": None}},
+        {"action": "noop", "master_obj": None, "slave_obj": None},
+    ]
+
+    waves = sync._split_plan_waves(plan)
+
+    assert [[item.get("payload", {}).get("name") for item in wave] for wave in waves] == [
+        ["eth0", None],
+        ["eth0.1"],
+    ]
+
+
+def test_split_plan_waves_applies_reference_chains_level_by_level():
+    class ParentSync(BulkSync):
+        apply_order_fields = ["parent"]
+
+    eth0 = {"id": 1, "name": "eth0", "parent": None}
+    vlan = {"id": 2, "name": "eth0.1", "parent": {"id": 1, "name": "eth0"}}
+    sub = {"id": 3, "name": "eth0.1.100", "parent": {"id": 2, "name": "eth0.1"}}
+    sync = ParentSync(None, None, bulk_size=10)
+    plan = [
+        {"action": "create", "master_obj": master_obj, "payload": {"name": master_obj["name"], "parent": master_obj["parent"]}}
+        for master_obj in (sub, vlan, eth0)
+    ]
+
+    waves = sync._split_plan_waves(plan)
+
+    assert [[item["payload"]["name"] for item in wave] for wave in waves] == [
+        ["eth0"],
+        ["eth0.1"],
+        ["eth0.1.100"],
+    ]
+
+
+def test_incremental_sync_only_fetches_updated_master_objects(tmp_path):
+    class IncrementalSync(BulkSync):
+        pass
+
+    master_objects = [
+        DummyObj(name="old", status=SimpleNamespace(value="active"), last_updated="2024-01-01T00:00:00Z"),
+        DummyObj(name="new", status=SimpleNamespace(value="active"), last_updated="2024-03-01T00:00:00Z"),
+    ]
+    slave_objects = [
+        DummySaveObj(name="old", status=SimpleNamespace(value="planned")),
+        DummySaveObj(name="new", status=SimpleNamespace(value="planned")),
+    ]
+    master_endpoint = DummyEndpoint(master_objects)
+    slave_endpoint = DummyEndpoint(slave_objects)
+    store = CursorStore(str(tmp_path / "cursors.json"))
+    store.set("dcim", "2024-02-01T00:00:00Z")
+
+    sync = IncrementalSync(
+        DummyConnection(master_endpoint),
+        DummyConnection(slave_endpoint),
+        cursor_store=store,
+    )
+    sync.sync()
+
+    assert master_endpoint.filter_calls == [{"last_updated__gte": "2024-02-01T00:00:00Z"}]
+    assert slave_endpoint.filter_calls == [{"name": ["new"]}]
+    assert slave_objects[0].save_calls == 0
+    assert slave_objects[1].save_calls == 1
+    assert slave_endpoint.created_payloads == []
+    assert CursorStore(str(tmp_path / "cursors.json")).get("dcim") == "2024-03-01T00:00:00Z"
+
+
+def test_cursor_advances_to_newest_timestamp_across_formats(tmp_path):
+    assert newest_timestamp(["2024-03-01T10:00:00Z", "2024-03-01T10:00:00.123456+00:00", None]) == (
+        "2024-03-01T10:00:00.123456+00:00"
+    )
+    assert newest_timestamp(["2024-03-01T12:00:00+02:00", "2024-03-01T10:30:00Z"]) == "2024-03-01T10:30:00Z"
+
+    master_objects = [
+        DummyObj(name="a", status=SimpleNamespace(value="active"), last_updated="2024-03-01T10:00:00Z"),
+        DummyObj(name="b", status=SimpleNamespace(value="active"), last_updated="2024-03-01T10:00:00.500000+00:00"),
+        DummyObj(name="c", status=SimpleNamespace(value="active"), last_updated="2024-03-01T10:00:00.250000Z"),
+    ]
+    store = CursorStore(str(tmp_path / "cursors.json"))
+    BulkSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(DummyEndpoint([])),
+        cursor_store=store,
+        full_sync=True,
+    ).sync()
+
+    assert store.get("dcim") == "2024-03-01T10:00:00.500000+00:00"
+
+
+def test_sync_objects_fetches_and_syncs_only_given_master_ids():
+    master_objects = [
+        DummyObj(id=1, name="a", status=SimpleNamespace(value="active")),
+        DummyObj(id=2, name="b", status=SimpleNamespace(value="active")),
+    ]
+    slave_objects = [DummySaveObj(name="b", status=SimpleNamespace(value="planned"))]
+    master_endpoint = DummyEndpoint(master_objects)
+    slave_endpoint = DummyEndpoint(slave_objects)
+
+    sync = BulkSync(DummyConnection(master_endpoint), DummyConnection(slave_endpoint))
+    sync.sync_objects([2])
+
+    assert master_endpoint.filter_calls == [{"id": [2]}]
+    assert slave_endpoint.filter_calls == [{"name": ["b"]}]
+    assert slave_objects[0].save_calls == 1
+    assert slave_endpoint.created_payloads == []
+
+
+def test_incremental_sync_full_reconcile_and_errors_keep_cursor(tmp_path):
+    class FailingSync(BulkSync):
+        def post_sync(self, oldobj, newobj):
+            raise RuntimeError("boom")
+
+    master_objects = [
+        DummyObj(name="a", status=SimpleNamespace(value="active"), last_updated="2024-05-01T00:00:00Z"),
+    ]
+    master_endpoint = DummyEndpoint(master_objects)
+    store = CursorStore(str(tmp_path / "cursors.json"))
+    store.set("dcim", "2024-02-01T00:00:00Z")
+
+    sync = FailingSync(
+        DummyConnection(master_endpoint),
+        DummyConnection(DummyEndpoint([])),
+        cursor_store=store,
+        full_sync=True,
+    )
+    sync.sync()
+
+    assert master_endpoint.filter_calls == []
+    assert len(sync.errors) == 1
+    assert store.get("dcim") == "2024-02-01T00:00:00Z"
+
+
+def test_fetch_fields_are_derived_from_class_attributes():
+    class ProjectedSync(DummySync):
+        sync_parameters = ["name", "status", "device"]
+        unique_parameter = ["name", "device"]
+        extra_fetch_fields = ["tagged_vlans"]
+
+    assert ProjectedSync.fetch_fields() == [
+        "id",
+        "display",
+        "last_updated",
+        "name",
+        "device",
+        "status",
+        "tenant",
+        "tagged_vlans",
+    ]
+
+
+def test_sync_with_projected_fields_requests_only_needed_columns():
+    master_endpoint = DummyEndpoint([])
+    slave_endpoint = DummyEndpoint([])
+
+    sync = BulkSync(
+        DummyConnection(master_endpoint),
+        DummyConnection(slave_endpoint),
+        project_fields=True,
+    )
+    sync.sync()
+
+    expected = {"fields": "id,display,last_updated,name,status"}
+    assert master_endpoint.filter_calls == [expected]
+    assert slave_endpoint.filter_calls == [expected]
+
+
+def test_streaming_sync_plans_and_applies_per_batch():
+    class StreamingSync(BulkSync):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.plan_sizes = []
+
+        def pre_apply(self, sync_plan):
+            self.plan_sizes.append(len(sync_plan))
+
+    master_objects = [
+        DummyObj(name=f"device-{idx}", status=SimpleNamespace(value="active"))
+        for idx in range(5)
+    ]
+    slave_objects = [
+        DummySaveObj(name="device-1", status=SimpleNamespace(value="planned")),
+        DummySaveObj(name="unrelated", status=SimpleNamespace(value="planned")),
+    ]
+    master_endpoint = DummyEndpoint(master_objects)
+    slave_endpoint = DummyEndpoint(slave_objects)
+
+    sync = StreamingSync(
+        DummyConnection(master_endpoint),
+        DummyConnection(slave_endpoint),
+        stream_batch_size=2,
+    )
+    sync.sync()
+
+    assert sync.errors == []
+    assert sync.plan_sizes == [2, 2, 1]
+    assert slave_endpoint.filter_calls == [
+        {"name": ["device-0", "device-1"]},
+        {"name": ["device-2", "device-3"]},
+        {"name": ["device-4"]},
+    ]
+    assert slave_objects[0].save_calls == 1
+    assert [payload["name"] for payload in slave_endpoint.created_payloads] == [
+        "device-0",
+        "device-2",
+        "device-3",
+        "device-4",
+    ]
+
+
+def test_plan_export_and_apply_round_trip(tmp_path, caplog):
+    class PlanSync(BulkSync):
+        pass
+
+    master_objects = [
+        DummyObj(id=1, name="device-a", status=SimpleNamespace(value="active")),
+        DummyObj(id=2, name="device-b", status=SimpleNamespace(value="planned")),
+        DummyObj(id=3, name="device-c", status=SimpleNamespace(value="active")),
+    ]
+    slave_objects = [
+        DummySaveObj(id=11, name="device-a", status=SimpleNamespace(value="offline")),
+        DummySaveObj(id=13, name="device-c", status=SimpleNamespace(value="active")),
+    ]
+    slave_endpoint = DummyEndpoint(slave_objects)
+    planner = PlanSync(DummyConnection(DummyEndpoint(master_objects)), DummyConnection(slave_endpoint))
+
+    with caplog.at_level("INFO", logger="sync.sync"):
+        plan = planner.build_plan()
+    plan_path = tmp_path / "plan.jsonl"
+    write_plan_file(str(plan_path), (planner.serialize_plan_item(item) for item in plan))
+
+    assert slave_endpoint.created_payloads == []
+    assert slave_objects[0].save_calls == 0
+    assert set(planner.timings) == {"fetch", "index", "plan"}
+    assert "Phase timings for dcim: fetch=" in caplog.text
+    assert planner.run_summary()["counters"] == {"create": 1, "update": 1, "noop": 1, "errors": 0}
+
+    entries = read_plan_file(str(plan_path))["dcim"]
+    assert [entry["action"] for entry in entries] == ["update", "create", "noop"]
+    assert entries[0]["slave_id"] == 11
+    assert entries[1]["master"]["name"] == "device-b"
+
+    applier = PlanSync(None, DummyConnection(slave_endpoint))
+    applier.apply_saved_plan(entries)
+
+    assert applier.errors == []
+    assert slave_objects[0].status == "active"
+    assert slave_objects[0].save_calls == 1
+    assert slave_endpoint.created_payloads == [{"name": "device-b", "status": "planned"}]
+    assert sorted(applier.post_synced) == ["device-a", "device-b", "device-c"]
+    assert slave_endpoint.filter_calls == [{"id": [11, 13]}]
+    assert set(applier.timings) == {"fetch", "apply", "post_hooks"}
+
+
+class HooklessSync(DummySync):
+    api_object = "dcim"
+    sync_parameters = ["name", "status"]
+    unique_parameter = ["name"]
+    global_sync_values = {}
+
+
+def test_plan_round_trip_without_post_sync_hook_skips_noops(tmp_path, caplog):
+    master_objects = [
+        DummyObj(id=1, name="device-a", status=SimpleNamespace(value="active")),
+        DummyObj(id=2, name="device-b", status=SimpleNamespace(value="active")),
+    ]
+    slave_objects = [
+        DummySaveObj(id=11, name="device-a", status=SimpleNamespace(value="active")),
+        DummySaveObj(id=12, name="device-b", status=SimpleNamespace(value="planned")),
+    ]
+    slave_endpoint = DummyEndpoint(slave_objects)
+    planner = HooklessSync(DummyConnection(DummyEndpoint(master_objects)), DummyConnection(slave_endpoint))
+    plan_path = tmp_path / "plan.jsonl"
+    write_plan_file(str(plan_path), (planner.serialize_plan_item(item) for item in planner.build_plan()))
+    entries = read_plan_file(str(plan_path))["dcim"]
+    assert [entry["action"] for entry in entries] == ["noop", "update"]
+
+    applier = HooklessSync(None, DummyConnection(slave_endpoint))
+    applier.apply_saved_plan(entries)
+
+    assert applier.errors == []
+    assert applier.counters == {"create": 0, "update": 1, "noop": 1}
+    assert slave_endpoint.filter_calls[-1] == {"id": [12]}
+    assert slave_objects[1].save_calls == 1
+
+    # A missing slave object is reported without a bogus traceback.
+    slave_objects[1].id = 99
+    applier.apply_saved_plan(entries)
+    assert [error["error"] for error in applier.errors] == ["Slave object 12 no longer exists"]
+    assert "NoneType: None" not in caplog.text
+
+
+class Crash(BaseException):
+    """Simulates the process dying; not caught like per-object errors."""
+
+
+def test_checkpointed_run_resumes_after_crash(tmp_path):
+    class CrashingSync(BulkSync):
+        crash_on = "device-b"
+
+        def post_sync(self, oldobj, newobj):
+            if newobj.name == self.crash_on:
+                raise Crash()
+            return super().post_sync(oldobj, newobj)
+
+    class IdEndpoint(DummyEndpoint):
+        def create(self, payload):
+            created = DummySaveObj(id=100 + len(self._objects), **payload)
+            self.created_payloads.append(payload)
+            self._objects.append(created)
+            return created
+
+    master_objects = [
+        DummyObj(id=idx, name=f"device-{name}", status=SimpleNamespace(value="active"))
+        for idx, name in enumerate("abc", start=1)
+    ]
+    slave_endpoint = IdEndpoint([])
+    journal_dir = str(tmp_path / "journal")
+
+    crashed = CrashingSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        journal=RunJournal(journal_dir),
+    )
+    try:
+        crashed.sync()
+    except Crash:
+        pass
+    assert [payload["name"] for payload in slave_endpoint.created_payloads] == ["device-a", "device-b"]
+
+    master_endpoint = DummyEndpoint(master_objects)
+    resumed = CrashingSync(
+        DummyConnection(master_endpoint),
+        DummyConnection(slave_endpoint),
+        journal=RunJournal(journal_dir, resume=True),
+    )
+    resumed.crash_on = None
+    resumed.sync()
+
+    # device-a is skipped, device-b already exists and is updated, device-c is created.
+    assert master_endpoint.filter_calls == []
+    assert [payload["name"] for payload in slave_endpoint.created_payloads] == ["device-a", "device-b", "device-c"]
+    assert resumed.counters == {"create": 1, "update": 1, "noop": 0}
+    assert resumed.post_synced == ["device-b", "device-c"]
+    assert resumed.errors == []
+
+    skipped = CrashingSync(None, None, journal=RunJournal(journal_dir, resume=True))
+    skipped.sync()
+    assert skipped.counters == {"create": 0, "update": 0, "noop": 0}
+
+
+def test_resume_without_post_sync_hook_completes_unapplied_noops(tmp_path):
+    class CrashingSave(DummySaveObj):
+        crash = True
+
+        def save(self):
+            if CrashingSave.crash:
+                raise Crash()
+            super().save()
+
+    master_objects = [
+        DummyObj(id=idx, name=f"device-{name}", status=SimpleNamespace(value="active"))
+        for idx, name in enumerate("abcd", start=1)
+    ]
+    slave_objects = [
+        DummySaveObj(id=11, name="device-a", status=SimpleNamespace(value="planned")),
+        CrashingSave(id=12, name="device-b", status=SimpleNamespace(value="planned")),
+        DummySaveObj(id=13, name="device-c", status=SimpleNamespace(value="active")),
+    ]
+    slave_endpoint = DummyEndpoint(slave_objects)
+    journal_dir = str(tmp_path / "journal")
+
+    crashed = HooklessSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        journal=RunJournal(journal_dir),
+    )
+    try:
+        crashed.sync()
+    except Crash:
+        pass
+
+    CrashingSave.crash = False
+    resumed = HooklessSync(None, DummyConnection(slave_endpoint), journal=RunJournal(journal_dir, resume=True))
+    resumed.sync()
+
+    assert resumed.errors == []
+    assert resumed.counters == {"create": 1, "update": 1, "noop": 1}
+    assert [obj.save_calls for obj in slave_objects[:3]] == [1, 1, 0]
+    assert [payload["name"] for payload in slave_endpoint.created_payloads] == ["device-d"]
+    assert RunJournal(journal_dir, resume=True).is_complete("dcim")
+
+
+def test_normalizers_are_compiled_per_subclass():
+    class CompiledSync(DummySync):
+        sync_parameters = ["name", "site", "status"]
+        unique_parameter = ["name", "site"]
+
+    assert [param for param, _ in CompiledSync._sync_normalizers] == ["name", "site", "status"]
+    assert [param for param, _ in CompiledSync._unique_normalizers] == ["name", "site"]
+    assert [key for key, _, _ in CompiledSync._global_normalizers] == ["tenant"]
+    assert DummySync._normalizers is not CompiledSync._normalizers
+
+    sync = CompiledSync(None, None)
+    obj = DummyObj(name="edge", site={"slug": "dc1"}, status={"value": "active"})
+    assert sync._build_unique_key(obj) == ("edge", (("slug", "dc1"),))
+    assert sync._normalize_value("site", [SimpleNamespace(slug="dc1"), None, {"slug": "nan"}]) == [
+        {"slug": "dc1"}
+    ]
+    assert sync._normalize_value("status", [{"value": "active"}, "planned"]) == ["active", "planned"]
+
+
+class FingerprintSync(BulkSync):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.diffed = []
+
+    def get_differences(self, master_obj, slave_obj):
+        self.diffed.append(master_obj.name)
+        return super().get_differences(master_obj, slave_obj)
+
+
+def test_fingerprint_store_skips_diffing_unchanged_objects(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    master_objects = [
+        DummyObj(id=1, name="a", status=SimpleNamespace(value="active")),
+        DummyObj(id=2, name="b", status=SimpleNamespace(value="active")),
+    ]
+    slave_objects = [
+        DummySaveObj(id=11, name="a", status=SimpleNamespace(value="active"), last_updated="t1"),
+        DummySaveObj(id=12, name="b", status=SimpleNamespace(value="active"), last_updated="t1"),
+    ]
+
+    def run():
+        sync = FingerprintSync(
+            DummyConnection(DummyEndpoint(master_objects)),
+            DummyConnection(DummyEndpoint(slave_objects)),
+            fingerprint_store=store,
+        )
+        sync.sync()
+        return sync
+
+    assert run().diffed == ["a", "b"]
+    assert run().diffed == []
+
+    slave_objects[1].last_updated = "t2"
+    master_objects[0].status = SimpleNamespace(value="planned")
+    second = run()
+    assert second.diffed == ["a", "b"]
+    assert second.counters == {"create": 0, "update": 1, "noop": 1}
+
+
+def test_fingerprint_store_records_last_updated_of_saved_objects(tmp_path):
+    class StaleSaveObj(DummySaveObj):
+        def save(self):
+            # Like a pynetbox Record, the local copy keeps its old last_updated.
+            super().save()
+            self.saved_last_updated = "t2"
+
+    class RefreshingEndpoint(DummyEndpoint):
+        def filter(self, **filters):
+            if "id" not in filters:
+                return super().filter(**filters)
+            self.filter_calls.append(filters)
+            return [
+                DummyObj(id=obj.id, last_updated=getattr(obj, "saved_last_updated", obj.last_updated))
+                for obj in self._objects
+                if obj.id in filters["id"]
+            ]
+
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    master_objects = [
+        DummyObj(id=1, name="a", status=SimpleNamespace(value="planned")),
+        DummyObj(id=2, name="b", status=SimpleNamespace(value="active")),
+    ]
+    slave_objects = [
+        StaleSaveObj(id=11, name="a", status=SimpleNamespace(value="active"), last_updated="t1"),
+        StaleSaveObj(id=12, name="b", status=SimpleNamespace(value="active"), last_updated="t1"),
+    ]
+    slave_endpoint = RefreshingEndpoint(slave_objects)
+    FingerprintSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        fingerprint_store=store,
+    ).sync()
+
+    assert slave_endpoint.filter_calls[-1] == {"id": [11]}
+    assert {key: last_updated for key, (_, last_updated) in store.load("dcim").items()} == {
+        '["a"]': "t2",
+        '["b"]': "t1",
+    }
+
+
+def test_fingerprint_store_fetches_full_slave_detail_only_for_changed_objects(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    master_objects = [
+        DummyObj(id=1, name="a", status=SimpleNamespace(value="active")),
+        DummyObj(id=2, name="b", status=SimpleNamespace(value="active")),
+    ]
+    slave_objects = [
+        DummySaveObj(id=11, name="a", status=SimpleNamespace(value="active"), last_updated="t1"),
+        DummySaveObj(id=12, name="b", status=SimpleNamespace(value="active"), last_updated="t1"),
+    ]
+    FingerprintSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(DummyEndpoint(slave_objects)),
+        fingerprint_store=store,
+    ).sync()
+
+    slave_objects[1].last_updated = "t2"
+    slave_endpoint = DummyEndpoint(slave_objects)
+    sync = FingerprintSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        fingerprint_store=store,
+        project_fields=True,
+    )
+    sync.sync()
+
+    assert slave_endpoint.filter_calls == [
+        {"fields": "id,last_updated,name"},
+        {"id": [12], "fields": "id,display,last_updated,name,status"},
+    ]
+    assert sync.diffed == ["b"]
+
+
+def test_fingerprint_noops_with_light_fetch_keep_hook_fields(tmp_path):
+    class ProjectingEndpoint(DummyEndpoint):
+        """Returns copies limited to the requested fields; saves write back and bump last_updated."""
+
+        def filter(self, **filters):
+            matches = super().filter(**filters)
+            fields = filters.get("fields")
+            return [self._project(obj, fields.split(",") if fields else None) for obj in matches]
+
+        def _project(self, obj, fields):
+            values = {key: value for key, value in vars(obj).items() if fields is None or key in fields}
+            copy = DummyObj(**values)
+
+            def save():
+                self.writes += 1
+                obj.label = copy.label
+                obj.last_updated = f"t{self.writes + 1}"
+
+            copy.save = save
+            return copy
+
+    class LabelSync(FingerprintSync):
+        extra_fetch_fields = ["label"]
+
+        def post_sync(self, oldobj, newobj):
+            if getattr(newobj, "label", None) != oldobj.label:
+                newobj.label = oldobj.label
+                newobj.save()
+            return newobj
+
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    master_objects = [
+        DummyObj(id=n, name=f"if{n}", status=SimpleNamespace(value="active"), label="uplink") for n in range(4)
+    ]
+    slave_endpoint = ProjectingEndpoint(
+        [
+            DummyObj(id=10 + n, name=f"if{n}", status=SimpleNamespace(value="active"), label="uplink", last_updated="t1")
+            for n in range(4)
+        ]
+    )
+    slave_endpoint.writes = 0
+
+    writes = []
+    for _ in range(3):
+        before = slave_endpoint.writes
+        LabelSync(
+            DummyConnection(DummyEndpoint(master_objects)),
+            DummyConnection(slave_endpoint),
+            fingerprint_store=store,
+            project_fields=True,
+        ).sync()
+        writes.append(slave_endpoint.writes - before)
+
+    assert writes[1:] == [0, 0]
+
+
+def test_bulk_writes_send_resolved_relation_ids():
+    from sync.relations import RelationResolver
+
+    class SiteSync(BulkSync):
+        sync_parameters = ["name", "site"]
+
+    sites = SimpleNamespace(objects=[DummyObj(id=3, slug="dc1")])
+    resolver = RelationResolver(
+        SimpleNamespace(dcim=SimpleNamespace(sites=sites)),
+        fetch=lambda endpoint, fields: endpoint.objects,
+    )
+    master_objects = [
+        DummyObj(name="device-0", site=SimpleNamespace(slug="dc1")),
+        DummyObj(name="device-1", site=SimpleNamespace(slug="dc2")),
+    ]
+    slave_endpoint = BulkEndpoint([])
+
+    sync = SiteSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        bulk_size=10,
+        relation_resolver=resolver,
+    )
+    sync.sync()
+
+    assert sync.errors == []
+    assert slave_endpoint.created_payloads == [
+        {"name": "device-0", "site": 3},
+        {"name": "device-1", "site": {"slug": "dc2"}},
+    ]
+
+
+def _prune_fixture(slave_names, **kwargs):
+    master_objects = [DummyObj(name=name, status=SimpleNamespace(value="active")) for name in ("a", "b")]
+    slave_objects = [
+        DummySaveObj(id=idx, name=name, status=SimpleNamespace(value="active"))
+        for idx, name in enumerate(slave_names, start=1)
+    ]
+    slave_endpoint = BulkEndpoint(slave_objects)
+    sync = BulkSync(
+        DummyConnection(DummyEndpoint(master_objects)),
+        DummyConnection(slave_endpoint),
+        prune=True,
+        **kwargs,
+    )
+    return sync, slave_endpoint
+
+
+def test_prune_deletes_slave_objects_missing_on_master_in_batches():
+    sync, slave_endpoint = _prune_fixture(["a", "b", "x", "y", "z"], prune_max=5)
+    sync.delete_batch_size = 2
+    sync.sync()
+
+    assert sync.prune() == 3
+    assert slave_endpoint.delete_calls == [[3, 4], [5]]
+    assert sync.counters["delete"] == 3
+    assert "prune" in sync.timings
+    assert sync.prune() == 0
+
+
+def test_prune_refuses_above_thresholds_and_after_errors():
+    sync, slave_endpoint = _prune_fixture(["a", "b", "x", "y"], prune_max_percent=40)
+    sync.sync()
+
+    assert sync.prune() == 0
+    assert slave_endpoint.delete_calls == []
+    assert "Refusing to prune 2 of 4" in sync.errors[0]["error"]
+
+    sync, slave_endpoint = _prune_fixture(["a", "b", "x"])
+    sync.sync()
+    sync.errors.append({"object": "a", "error": "failed"})
+
+    assert sync.prune() == 0
+    assert slave_endpoint.delete_calls == []
+
+
+def test_prune_is_skipped_for_incremental_runs(tmp_path):
+    store = CursorStore(str(tmp_path / "cursors.json"))
+    store.set("dcim", "2024-02-01T00:00:00Z")
+    sync, slave_endpoint = _prune_fixture(["a", "b", "x"], cursor_store=store)
+    sync.sync()
+
+    assert sync.prune() == 0
+    assert slave_endpoint.delete_calls == []
@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from sync.ratelimit import AdaptiveLimiter
+from sync.transport import IDEMPOTENT_METHODS, AdaptiveHTTPAdapter, TimeoutHTTPAdapter, build_http_session
+
+
+def test_build_http_session_mounts_tuned_adapter():
+    session = build_http_session(pool_size=24, retries=5, backoff_factor=1.0, timeout=30)
+
+    adapter = session.get_adapter("https://netbox.example/api/")
+    assert isinstance(adapter, TimeoutHTTPAdapter)
+    assert adapter.timeout == 30
+    assert adapter._pool_maxsize == 24
+    assert adapter.max_retries.total == 5
+    assert adapter.max_retries.backoff_factor == 1.0
+    assert 429 in adapter.max_retries.status_forcelist
+    assert "POST" not in IDEMPOTENT_METHODS
+    assert session.get_adapter("http://netbox.example/api/") is adapter
+
+
+def test_build_http_session_with_limiter_mounts_adaptive_adapter():
+    limiter = AdaptiveLimiter(max_concurrency=4)
+    session = build_http_session(pool_size=4, limiter=limiter)
+
+    adapter = session.get_adapter("https://netbox.example/api/")
+    assert isinstance(adapter, AdaptiveHTTPAdapter)
+    assert adapter.limiter is limiter
+    assert adapter.timeout == 60